@@ -0,0 +1,70 @@
+import numpy as np
+
+
+def is_counter_clockwise(point1, point2, point3):
+    """
+    Vectorized form of the ccw test used by LineIntrusionDetector.intersection_of_line.
+    Arguments are broadcastable arrays whose last axis holds (x, y).
+    """
+    return ((point3[..., 1] - point1[..., 1]) * (point2[..., 0] - point1[..., 0])
+            > (point2[..., 1] - point1[..., 1]) * (point3[..., 0] - point1[..., 0]))
+
+
+def compute_crossing_matrix(previous_centers, current_centers, line_starts, line_ends):
+    """
+    Tests every object movement (previous -> current center) against every line segment in one pass.
+
+    :param previous_centers: (N, 2) array of object centers on the previous frame.
+    :param current_centers: (N, 2) array of object centers on the current frame.
+    :param line_starts: (L, 2) array of line starting points.
+    :param line_ends: (L, 2) array of line ending points.
+    :return: Tuple (crossed, direction): an (N, L) bool matrix and an (N, L) int8 matrix that is +1 when the
+             object moved onto the side where cross(end - start, center - start) > 0 (right of the
+             start -> end direction on screen, since image y points down), -1 for the opposite way, 0 otherwise.
+    """
+    previous_centers = np.asarray(previous_centers, dtype=np.float64).reshape(-1, 1, 2)
+    current_centers = np.asarray(current_centers, dtype=np.float64).reshape(-1, 1, 2)
+    line_starts = np.asarray(line_starts, dtype=np.float64).reshape(1, -1, 2)
+    line_ends = np.asarray(line_ends, dtype=np.float64).reshape(1, -1, 2)
+
+    previous_side = is_counter_clockwise(previous_centers, line_starts, line_ends)
+    current_side = is_counter_clockwise(current_centers, line_starts, line_ends)
+    crossed = ((previous_side != current_side)
+               & (is_counter_clockwise(previous_centers, current_centers, line_starts)
+                  != is_counter_clockwise(previous_centers, current_centers, line_ends)))
+
+    direction = np.where(current_side, 1, -1).astype(np.int8)
+    direction[~crossed] = 0
+    return crossed, direction
+
+
+class LineCrossingEngine:
+    def __init__(self, starting_points_of_lines, ending_points_of_lines, line_names=None):
+        """
+        Holds the intrusion lines as contiguous arrays so crossings for all tracks are computed in one call.
+
+        :param starting_points_of_lines: List of (x, y) line starting points.
+        :param ending_points_of_lines: List of corresponding (x, y) line ending points.
+        :param line_names: Optional names for the lines; defaults to "line_0", "line_1", ...
+        """
+        self.line_starts = np.asarray([] if starting_points_of_lines is None else starting_points_of_lines, dtype=np.float64).reshape(-1, 2)
+        self.line_ends = np.asarray([] if ending_points_of_lines is None else ending_points_of_lines, dtype=np.float64).reshape(-1, 2)
+        if len(self.line_starts) != len(self.line_ends):
+            raise ValueError("Every intrusion line needs both a starting and an ending point.")
+        self.line_names = list(line_names) if line_names else [f"line_{index}" for index in range(len(self.line_starts))]
+        if len(self.line_names) != len(self.line_starts):
+            raise ValueError(f"Got {len(self.line_names)} line names for {len(self.line_starts)} intrusion lines.")
+
+
+    def __len__(self):
+        return len(self.line_starts)
+
+
+    def detect(self, previous_centers, current_centers):
+        """
+        Returns the (N, L) crossed and direction matrices for N object movements against all lines.
+        """
+        if len(self) == 0 or len(current_centers) == 0:
+            empty_shape = (len(current_centers), len(self))
+            return np.zeros(empty_shape, dtype=bool), np.zeros(empty_shape, dtype=np.int8)
+        return compute_crossing_matrix(previous_centers, current_centers, self.line_starts, self.line_ends)
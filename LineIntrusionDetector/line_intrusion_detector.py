@@ -1,39 +1,53 @@
+import numpy as np
+from LineIntrusionDetector.line_crossing_engine import LineCrossingEngine
+from utils.track_state_store import TrackStateStore
+
+
 class LineIntrusionDetector:
-    def __init__(self, starting_points_of_intrusion_line = None, ending_points_of_instrusion_line=None):
+    def __init__(self, starting_points_of_intrusion_line = None, ending_points_of_instrusion_line=None, line_names=None, max_tracks=4096, track_ttl_seconds=30.0):
         """
         Initializes the Line Intrusion Detector with predefined intrusion start and end points.
+
+        :param line_names: Optional names for the lines, reported in each object's crossed_lines.
+        :param max_tracks: Maximum number of track positions remembered at once.
+        :param track_ttl_seconds: Tracks unseen for this long are forgotten.
         """
         self.starting_points_of_intrusion_line = starting_points_of_intrusion_line # [(50, 400)]   # List of starting points
         self.ending_points_of_intrusion_line = ending_points_of_instrusion_line # [(1300, 200)]   # List of corresponding end points
-        self.obj_previous_positions = {}  # Store previous positions of tracked objects
+        self.track_state = TrackStateStore(max_tracks, track_ttl_seconds)  # Bounded store of previous positions
+        self.line_crossing_engine = LineCrossingEngine(
+            self.starting_points_of_intrusion_line,
+            self.ending_points_of_intrusion_line,
+            line_names
+        )
 
 
-    def detect_intrusion(self, tracked_objects):
-        """Detects if any tracked object crosses an intrusion line and updates its status."""
-        for obj in tracked_objects:
-            bbox = list(map(int, obj.bounding_box))
-            if len(bbox) != 4:
-                continue  # Skip invalid bounding boxes
+    def detect_intrusion(self, tracked_objects, timestamp=None):
+        """
+        Detects if any tracked object crosses an intrusion line and updates its status.
 
-            obj_current_center = ((bbox[0] + bbox[2]) // 2, (bbox[1] + bbox[3]) // 2)
-            obj_track_id = obj.track_id  # Unique ID of the object
-            obj_previous_center = self.obj_previous_positions.get(obj_track_id, obj_current_center)
-            self.obj_previous_positions[obj_track_id] = obj_current_center  # Update previous position
+        :param tracked_objects: FrameDetections batch; intrusion flags and crossed lines are written back into it.
+        :param timestamp: Capture timestamp in seconds, used for track expiry (defaults to the monotonic clock).
+        """
+        previous_centers, _ = self.track_state.observe(tracked_objects.track_ids, tracked_objects.centers, timestamp)  # Also updates previous positions
 
-            # Check if the object crosses any intrusion line
-            intrusion_detected = any(
-                self.intersection_of_line(obj_previous_center, obj_current_center, starting_point_of_line, ending_point_of_line)
-                for starting_point_of_line, ending_point_of_line in zip(self.starting_points_of_intrusion_line, self.ending_points_of_intrusion_line)
-            )
-            obj.intrusion_detected = intrusion_detected  # Update object status
+        # Check every object against every intrusion line in one vectorized pass
+        crossed, direction = self.line_crossing_engine.detect(previous_centers, tracked_objects.centers)
+        tracked_objects.intrusion_detected[:] = crossed.any(axis=1)  # Update object status
+        tracked_objects.crossed_lines = {
+            int(index): [(self.line_crossing_engine.line_names[line_index], int(direction[index, line_index]))
+                         for line_index in np.flatnonzero(crossed[index])]
+            for index in np.flatnonzero(tracked_objects.intrusion_detected)
+        }
 
 
     def intersection_of_line(self, obj_previous_center, obj_current_center, starting_point_of_line, ending_point_of_line):
         """
         Checks if two line segments (point1-point2) and (point3-point4) intersect using vector cross products.
+        Scalar reference implementation; detect_intrusion uses the vectorized LineCrossingEngine instead.
         """
         def is_counter_clockwise(point1, point2, point3):
             return (point3[1] - point1[1]) * (point2[0] - point1[0]) > (point2[1] - point1[1]) * (point3[0] - point1[0])
 
         return ((is_counter_clockwise(obj_previous_center, starting_point_of_line, ending_point_of_line) != is_counter_clockwise(obj_current_center, starting_point_of_line, ending_point_of_line))
-                and (is_counter_clockwise(obj_previous_center, obj_current_center, starting_point_of_line) != is_counter_clockwise(obj_previous_center, obj_current_center, ending_point_of_line)))
\ No newline at end of file
+                and (is_counter_clockwise(obj_previous_center, obj_current_center, starting_point_of_line) != is_counter_clockwise(obj_previous_center, obj_current_center, ending_point_of_line)))
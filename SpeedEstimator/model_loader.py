@@ -1,19 +1,27 @@
-from ultralytics import YOLO
+from utils.model_backends import DEFAULT_CACHE_DIR, load_model
 
 
 class ModelLoader:
-    def __init__(self, model_path, use_gpu=False):
+    def __init__(self, model_path, use_gpu=False, backend="pytorch", precision="fp32", imgsz=640, cache_dir=DEFAULT_CACHE_DIR):
         """
         Initializes the ModelLoader.
 
         :param model_path: Path to the YOLO model file.
         :param device: Device to load the model on ("cuda" or "cpu").
                        If None, it will use CUDA if available, otherwise CPU.
+        :param backend: "pytorch", "onnx" or "openvino"; exported models are cached and reused on later starts.
+        :param precision: "fp32", "fp16" or "int8" for exported backends.
+        :param imgsz: Input size the model is exported for.
+        :param cache_dir: Directory holding exported models, keyed by weights hash, input size, backend and precision.
         """
         self.model_path = model_path
         self.model = None
         self.device = "cuda" if use_gpu else "cpu"
         self.class_labels = None
+        self.backend = backend
+        self.precision = precision
+        self.imgsz = imgsz
+        self.cache_dir = cache_dir
 
 
     def load_yolo_model(self):
@@ -24,8 +32,7 @@ class ModelLoader:
         :return: Tuple having (model, class_labels, device)
         """
         try:
-            self.model = YOLO(self.model_path)  # .to(self.device) Move model to device
-            self.model.eval()  # Set model to evaluation mode
+            self.model = load_model(self.model_path, self.backend, self.imgsz, self.precision, self.cache_dir)
             return self.model
         except Exception as e:
             raise ValueError(f"Failed to load model: {str(e)}")
\ No newline at end of file
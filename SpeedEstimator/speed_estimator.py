@@ -1,54 +1,98 @@
+import logging
 import time
+import cv2
 import numpy as np
+from utils.track_state_store import TrackStateStore
+
+logger = logging.getLogger(__name__)
+
+
+def compute_ground_homography(image_points, ground_points):
+    """
+    Computes the 3x3 image -> ground-plane homography from point correspondences.
+
+    :param image_points: At least 4 (x, y) pixel positions of reference marks on the road.
+    :param ground_points: The same marks in meters on the ground plane, e.g. [(0, 0), (3.5, 0), (3.5, 20), (0, 20)].
+    """
+    image_points = np.asarray(image_points, dtype=np.float32).reshape(-1, 2)
+    ground_points = np.asarray(ground_points, dtype=np.float32).reshape(-1, 2)
+    if len(image_points) < 4 or len(image_points) != len(ground_points):
+        raise ValueError("A ground homography needs at least 4 matching image and ground points.")
+    if len(image_points) == 4:
+        return cv2.getPerspectiveTransform(image_points, ground_points)
+    homography, _ = cv2.findHomography(image_points, ground_points, cv2.RANSAC)
+    return homography
 
 
 class SpeedEstimator:
-    def __init__(self, frames_per_second=30, pixels_per_meter=10):
+    def __init__(self, pixels_per_meter=10, max_tracks=4096, track_ttl_seconds=30.0,
+                 window_size=8, homography=None, outlier_threshold=3.0):
         """
         Initializes the Speed Estimator with predefined points for tracking speed.
-        :param frames_per_second: Frames per second of the video.
-        :param pixels_per_meter: Conversion factor for real-world speed calculation.
+        :param pixels_per_meter: Conversion factor for real-world speed calculation (ignored with a homography).
+        :param max_tracks: Maximum number of tracks whose recent positions and timestamps are remembered.
+        :param track_ttl_seconds: Tracks unseen for this long are forgotten.
+        :param window_size: Number of recent observations per track the speed is computed over.
+        :param homography: Optional 3x3 image -> ground-plane (meters) homography, see compute_ground_homography.
+                           When given, the bottom-center of each box is projected onto the ground plane.
+        :param outlier_threshold: Steps whose speed deviates from the track's median step speed by more than this
+                                  many (scaled) median absolute deviations are ignored.
         """
-        self.obj_previous_positions = {}  # Stores previous positions of objects
-        self.obj_timestamps = {}  # Stores timestamps of previous positions
-        self.frames_per_second = frames_per_second  # Frames per second (adjust based on actual video)
+        self.track_state = TrackStateStore(max_tracks, track_ttl_seconds, history_length=max(2, window_size))
         self.pixels_per_meter = pixels_per_meter  # Pixel-to-meter conversion
+        self.homography = None if homography is None else np.asarray(homography, dtype=np.float64).reshape(3, 3)
+        self.outlier_threshold = outlier_threshold
 
 
-    def estimate_speed(self, tracked_objects):
-        """Calculates speed for each tracked object."""
-        for obj in tracked_objects:
-            bbox = list(map(int, obj.bounding_box))
-            if len(bbox) != 4:
-                continue  # Skip invalid bounding boxes
+    def ground_positions(self, tracked_objects):
+        """Returns (N, 2) positions in meters: projected foot points with a homography, scaled centers otherwise."""
+        if self.homography is None:
+            return tracked_objects.centers / self.pixels_per_meter
 
-            obj_current_center = ((bbox[0] + bbox[2]) // 2, (bbox[1] + bbox[3]) // 2)
-            obj_track_id = obj.track_id  # Unique ID for each tracked object
+        boxes = tracked_objects.boxes
+        foot_points = np.stack([(boxes[:, 0] + boxes[:, 2]) / 2, boxes[:, 3], np.ones(len(boxes))], axis=1)
+        projected = foot_points @ self.homography.T
+        return projected[:, :2] / projected[:, 2:3]
 
-            # Get previous position & time
-            obj_previous_center = self.obj_previous_positions.get(obj_track_id, obj_current_center)
-            previous_time = self.obj_timestamps.get(obj_track_id, time.time())
 
-            # Update tracking info
-            self.obj_previous_positions[obj_track_id] = obj_current_center
-            self.obj_timestamps[obj_track_id] = time.time()
+    def estimate_speed(self, tracked_objects, timestamp=None):
+        """
+        Calculates speed for each tracked object over its recent window of observations.
 
-            # Calculate distance traveled in pixels
-            distance_pixels = np.linalg.norm(np.array(obj_current_center) - np.array(obj_previous_center))
+        :param tracked_objects: FrameDetections batch; speeds in km/h are written to its speeds array.
+        :param timestamp: Capture timestamp of the frame in seconds (CAP_PROP_POS_MSEC or frame index / FPS).
+                          Falls back to the wall clock, which makes speeds depend on processing rate.
+        """
+        if timestamp is None:
+            timestamp = time.time()
 
-            # Calculate time difference
-            time_diff = time.time() - previous_time  # Time in seconds
-            if time_diff == 0:
-                continue  # Avoid division by zero
+        # Append the current positions to each track's window and read the windows back, oldest first
+        slots = self.track_state.record(tracked_objects.track_ids, self.ground_positions(tracked_objects), timestamp)
+        positions, times, valid = self.track_state.history(slots)
 
-            # Convert pixels to real-world distance (meters)
-            distance_meters = distance_pixels / self.pixels_per_meter
+        # Per-step distances (meters), durations (seconds) and speeds across the window
+        step_distances = np.linalg.norm(positions[:, 1:] - positions[:, :-1], axis=2)
+        step_durations = times[:, 1:] - times[:, :-1]
+        step_valid = valid[:, 1:] & (step_durations > 0)
+        step_speeds = np.full(step_distances.shape, np.nan)
+        step_speeds[step_valid] = step_distances[step_valid] / step_durations[step_valid]
 
-            # Compute speed (meters per second)
-            speed_mps = distance_meters / time_diff
-            speed_kph = speed_mps * 3.6  # Convert to km/h
+        # Outlier rejection against each track's median step speed (robust to ID switches and box jitter)
+        has_steps = step_valid.any(axis=1)
+        inliers = np.zeros_like(step_valid)
+        if has_steps.any():
+            median_speeds = np.nanmedian(step_speeds[has_steps], axis=1, keepdims=True)
+            deviations = np.abs(step_speeds[has_steps] - median_speeds)
+            tolerance = np.maximum(self.outlier_threshold * 1.4826 * np.nanmedian(deviations, axis=1, keepdims=True),
+                                   0.25 * median_speeds + 1e-6)
+            inliers[has_steps] = step_valid[has_steps] & (deviations <= tolerance)
 
-            # Store speed in the object
-            obj.speed = round(speed_kph, 2)
+        # Compute speed (meters per second) over the inlier steps and convert to km/h
+        inlier_durations = np.where(inliers, step_durations, 0.0).sum(axis=1)
+        inlier_distances = np.where(inliers, step_distances, 0.0).sum(axis=1)
+        moving = inlier_durations > 0
+        tracked_objects.speeds[moving] = np.round(inlier_distances[moving] / inlier_durations[moving] * 3.6, 2)
 
-            print(f"Object {obj.track_id} Speed: {obj.speed} km/h")  # Debugging output
+        if logger.isEnabledFor(logging.DEBUG):  # Skip building per-object messages unless they will be shown
+            for track_id, speed in zip(tracked_objects.track_ids[moving].tolist(), tracked_objects.speeds[moving].tolist()):
+                logger.debug("Object %s Speed: %s km/h", track_id, speed)
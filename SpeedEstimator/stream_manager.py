@@ -1,67 +1,141 @@
-import cv2
+import logging
 from SpeedEstimator.object_tracker import ObjectTracker
 from SpeedEstimator.speed_estimator import SpeedEstimator
-from SpeedEstimator.utils import display_annotated_frame
+from utils.annotation_renderer import AnnotationRenderer
+from utils.shared_frame_ring import SharedMemoryCapture
+from utils.stream_ingestion import ResilientStream, process_stream
+from utils.output_sinks import WindowSink
+from utils.events import SpeedThresholdMonitor
+
+logger = logging.getLogger(__name__)
 
 
 class StreamManager:
-    def __init__(self, input_media_source):
+    def __init__(self, input_media_source, pixels_per_meter=10, tracker=None, output_sink=None, adaptive_stride=None, homography=None, metrics=None, event_writer=None, speed_threshold_kph=None, preview_scale=1.0, render_every=1):
         """
         Initialize the StreamManager with all necessary components.
+
+        :param tracker: Optional ObjectTracker to share one loaded model between several stream managers.
+        :param output_sink: Where processed frames go (see utils.output_sinks); defaults to an OpenCV window.
+                            Use NullSink, VideoFileSink or JpegRingSink to run headless.
+        :param adaptive_stride: Optional AdaptiveStrideController to run detection only every N frames.
+        :param homography: Optional image -> ground-plane homography replacing pixels_per_meter.
+        :param metrics: Optional PipelineMetrics for per-stage latencies; defaults to the tracker's.
+        :param event_writer: Optional EventWriter (see utils.event_writer) receiving this source's speed-over-threshold events.
+                             It is owned by the caller, who closes it after processing.
+        :param speed_threshold_kph: Speed above which a track emits a speed-over-threshold event.
+        :param preview_scale: Draw annotations on a copy downscaled by this factor, e.g. 0.5 for a 4K feed shown in 1080p.
+        :param render_every: Annotate and output only every Nth frame; analytics still run on all frames.
         """
         self.input_media_source = input_media_source
         self.model_path = "Models/Yolov12/weights/yolov12n.pt"
         self.objects_of_interest = ["person", "car", "cell phone"]
         self.conf_threshold = 0.3
         self.use_gpu = False
-        self.tracker = ObjectTracker(self.model_path, self.conf_threshold, self.objects_of_interest, self.use_gpu)
+        self.tracker = tracker or ObjectTracker(self.model_path, self.conf_threshold, self.objects_of_interest, self.use_gpu, adaptive_stride, metrics)
+        self.metrics = metrics or self.tracker.metrics
+        self.output_sink = output_sink or WindowSink("Object Tracking")
+        self.event_writer = event_writer
+        self.speed_threshold_monitor = SpeedThresholdMonitor(speed_threshold_kph, input_media_source) if speed_threshold_kph else None
+        self.frame_index = -1
 
-        # Initialize intrusion detector
-        self.speed_estimator = SpeedEstimator(frames_per_second, pixels_per_meter)
+        # Initialize speed estimator
+        self.speed_estimator = SpeedEstimator(pixels_per_meter, homography=homography)
+        self.annotation_renderer = AnnotationRenderer(preview_scale=preview_scale, render_every=render_every)
 
 
-    def process_video(self):
+    def analyze_frame(self, frame, timestamp=None):
         """
-        Process a video for object tracking and intrusion detection.
+        Runs object tracking and speed estimation on a single frame.
+
+        :param timestamp: Capture timestamp of the frame in seconds.
         """
-        video_capture = cv2.VideoCapture(self.input_media_source)
-        if not video_capture.isOpened():
-            raise ValueError(f"Error: Could not open {self.input_media_source}")
+        tracked_objects = self.tracker.process_frame(frame)  # Perform object tracking
+        return self.run_analytics(tracked_objects, frame.shape, timestamp)
 
-        cv2.namedWindow("Object Tracking")
 
-        while video_capture.isOpened():
-            frame_available, frame = video_capture.read()
+    def run_analytics(self, tracked_objects, frame_shape=None, timestamp=None):
+        """
+        Runs speed estimation on already tracked objects (updates object properties).
+
+        :param frame_shape: Shape of the analysed frame; accepted for a uniform interface with the zone detector.
+        :param timestamp: Capture timestamp in seconds; speeds are computed from these, not from processing time.
+        """
+        if not tracked_objects:
+            logger.debug("No objects detected")
 
-            # Check if frame is valid
-            if not frame_available or frame is None:
-                print("Warning: Empty frame received. Exiting loop.")
-                break
+        with self.metrics.time_stage("analytics"):
+            self.speed_estimator.estimate_speed(tracked_objects, timestamp)
 
-            tracked_objects = self.tracker.process_frame(frame)  # Perform object tracking
+        self.frame_index += 1
+        if self.event_writer is not None and self.speed_threshold_monitor is not None and timestamp is not None:
+            self.event_writer.submit(self.speed_threshold_monitor.update(tracked_objects, timestamp, self.frame_index))
+        return tracked_objects
 
-            if not tracked_objects:
-                print("Warning: No objects detected.")
 
-            # Perform intrusion detection (updates object properties)
-            self.line_intrusion_detector.detect_intrusion(tracked_objects)
+    def render_frame(self, frame, tracked_objects):
+        """
+        Draws annotations and hands the frame to the output sink. Returns False to stop processing.
+        Frames skipped by render_every are neither drawn nor output.
+        """
+        if not self.output_sink.requires_annotation:
+            with self.metrics.time_stage("display"):
+                return self.output_sink.write(frame)  # Analytics-only sinks skip drawing entirely
+        if not self.annotation_renderer.should_render():
+            return True  # Skipped by render_every
 
-            # Draw annotations (bounding boxes & intrusion lines)
-            frame = display_annotated_frame(
-                frame, tracked_objects,
-                self.starting_points_of_intrusion_line,
-                self.ending_points_of_intrusion_line
-            )
+        with self.metrics.time_stage("annotation"):
+            frame = self.annotation_renderer.render(frame, tracked_objects)  # Draw bounding boxes, labels and track IDs
 
-            # Ensure frame is valid before displaying
-            if frame is None or frame.size == 0:
-                print("Warning: Processed frame is empty. Skipping display.")
-                continue
+        # Ensure frame is valid before displaying
+        if frame is None or frame.size == 0:
+            logger.warning("Processed frame is empty. Skipping display.")
+            return True
 
-            cv2.imshow("Object Tracking", frame)  # Display frame
+        with self.metrics.time_stage("display"):
+            return self.output_sink.write(frame)
 
-            if cv2.waitKey(1) & 0xFF == ord('q'):  # Exit on 'q' key press
-                break
 
-        video_capture.release()
-        cv2.destroyAllWindows()
\ No newline at end of file
+    def process_video(self, pipelined=False, queue_size=4, drop_policy=None, multiprocess=False, capture_backend="opencv", inference_resolution=None):
+        """
+        Process a video for object tracking and speed estimation.
+
+        :param pipelined: Run capture, inference and rendering on separate stages connected by bounded queues.
+        :param queue_size: Capacity of each inter-stage queue in pipelined mode.
+        :param drop_policy: "drop_oldest" or "block"; defaults to drop-oldest for live sources and block for files.
+        :param multiprocess: Decode in a separate capture process that hands frames over through shared memory
+                             (queue_size + 2 frame slots) instead of reading them on this process.
+        :param capture_backend: "opencv", "ffmpeg" or "gstreamer" (see utils.capture_backends).
+        :param inference_resolution: (width, height) to track at; frames are scaled at decode unless the output
+                                     sink draws on them, and boxes are mapped back to source pixels.
+                                     Not supported with multiprocess, which tracks at source resolution.
+        """
+        if multiprocess and inference_resolution:
+            raise ValueError("Multiprocess capture tracks at source resolution; drop inference_resolution.")
+        if multiprocess:
+            capture = SharedMemoryCapture(self.input_media_source, queue_size + 2, drop_policy, backend=capture_backend)
+            if self.tracker.adaptive_stride is not None:
+                self.tracker.adaptive_stride.set_source_fps(capture.frames_per_second)
+            try:
+                capture.run(self.analyze_frame, self.render_frame, self.metrics)
+            finally:
+                self.output_sink.close()
+            return
+
+        stream = ResilientStream(  # Reconnects live sources instead of ending
+            self.input_media_source,
+            metrics=self.metrics,
+            backend=capture_backend,
+            inference_resolution=inference_resolution,
+            full_resolution=self.output_sink.requires_annotation
+        )
+        if self.tracker.adaptive_stride is not None:
+            self.tracker.adaptive_stride.set_source_fps(stream.frames_per_second)
+
+        def analyze_frame(frame, timestamp):
+            tracked_objects, frame_shape = stream.track_frame(self.tracker, frame)
+            tracked_objects = self.run_analytics(tracked_objects, frame_shape, timestamp)
+            stream.record_frame_age(timestamp)
+            return tracked_objects
+
+        process_stream(stream, analyze_frame, self.render_frame, self.output_sink, pipelined, queue_size, drop_policy, self.metrics)
@@ -8,6 +8,7 @@ class TrackedObjects:
         self.class_label = class_label
         self.bounding_box = bounding_box
         self.intrusion_detected = False  # Initialize intrusion_detected
+        self.crossed_lines = []  # (line_name, direction) pairs crossed on the current frame
 
 
     def __repr__(self):
@@ -10,20 +10,18 @@ def display_annotated_frame(frame, tracked_objects, starting_points_of_line=None
         for starting_point, ending_point in zip(starting_points_of_line, ending_points_of_line):
             cv2.line(frame, starting_point, ending_point, (0, 0, 255), 2)  # Red intrusion lines
 
-    # Draw bounding boxes class labels and Tracking_ID
-    for obj in tracked_objects:
-        bbox = list(map(int, obj.bounding_box))
-        class_label = obj.class_label
-        track_id = obj.track_id
-
-        if len(bbox) != 4:
-            continue
-
-        color = (0, 0, 255) if obj.intrusion_detected else (0, 255, 0)  # Red if intrusion, Green otherwise
+    # Draw bounding boxes class labels and Tracking_ID, reading the FrameDetections arrays directly
+    class_labels = tracked_objects.class_labels
+    for bbox, class_id, track_id, intrusion_detected in zip(
+            tracked_objects.pixel_boxes.tolist(),
+            tracked_objects.class_ids.tolist(),
+            tracked_objects.track_ids.tolist(),
+            tracked_objects.intrusion_detected.tolist()):
+        color = (0, 0, 255) if intrusion_detected else (0, 255, 0)  # Red if intrusion, Green otherwise
         cv2.rectangle(frame, (bbox[0], bbox[1]), (bbox[2], bbox[3]), color, 2)
 
         # Display class label and track ID
-        label = f"{class_label} [ID: {track_id}]"
+        label = f"{class_labels[class_id]} [ID: {track_id}]"
         cv2.putText(frame, label, (bbox[0], bbox[1] - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
     return frame
 
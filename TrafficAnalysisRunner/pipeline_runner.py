@@ -0,0 +1,232 @@
+"""
+Runs the traffic analytics described by a config file.
+
+Usage (from the repository root):
+    python -m TrafficAnalysisRunner.pipeline_runner config.yaml
+"""
+import argparse
+import functools
+import logging
+import threading
+from LineIntrusionDetector.object_tracker import ObjectTracker
+from TrafficAnalysisRunner.runner_config import load_runner_config
+from TrafficAnalysisRunner.source_analytics import SourceAnalytics
+from utils.adaptive_stride import AdaptiveStrideController
+from utils.event_writer import EventWriter
+from utils.logging_setup import configure_logging
+from utils.multi_source_engine import MultiSourceEngine
+from utils.shared_frame_ring import SharedMemoryCapture
+from utils.stream_ingestion import ResilientStream, process_stream
+from utils.traffic_counters import TrafficCounters
+
+logger = logging.getLogger(__name__)
+
+
+def create_tracker(config, single_source=None):
+    """
+    Loads the model described by the config's "model" section into an ObjectTracker.
+
+    :param single_source: Whether the tracker serves one source (enables adaptive stride); defaults to
+                          whether the config has exactly one source.
+    """
+    model_config = config["model"]
+    if single_source is None:
+        single_source = len(config["sources"]) == 1
+    adaptive_stride = None
+    if config["pipeline"]["adaptive_stride"] and single_source:
+        adaptive_stride = AdaptiveStrideController()
+    return ObjectTracker(
+        model_config["path"],
+        model_config["conf_threshold"],
+        model_config["objects_of_interest"],
+        model_config["use_gpu"],
+        adaptive_stride,
+        None,
+        model_config["backend"],
+        model_config["precision"],
+        model_config["imgsz"]
+    )
+
+
+def stream_options(config):
+    """
+    Returns the ResilientStream arguments set in the config's "stream" section.
+    """
+    stream_config = config["stream"]
+    return {option: stream_config[option] for option in
+            ("reconnect", "latest_frame_only", "initial_backoff_seconds", "max_backoff_seconds", "max_reconnect_attempts",
+             "backend", "hwaccel", "inference_resolution")}
+
+
+def warm_up_shape(config):
+    width, height = config["stream"]["inference_resolution"] or config["pipeline"]["warm_up_resolution"]
+    return (height, width, 3)
+
+
+class PipelineRunner:
+    def __init__(self, config, tracker=None):
+        """
+        Builds one tracker (one loaded model) and the configured analytics for every source.
+
+        :param config: Normalized runner configuration, see TrafficAnalysisRunner.runner_config.
+        :param tracker: Optional already loaded (and warmed up) ObjectTracker, e.g. from a WarmModelPool worker.
+        """
+        self.config = config
+        self.tracker = tracker or create_tracker(config)
+        self.metrics = self.tracker.metrics
+        self.warmed_up = tracker is not None
+
+        self.event_writer = EventWriter(config["events"]["path"]) if config["events"]["path"] else None
+        self.traffic_counters = None
+        if config["counters"]["snapshot_path"]:
+            self.traffic_counters = TrafficCounters(
+                snapshot_path=config["counters"]["snapshot_path"],
+                snapshot_interval_seconds=config["counters"]["snapshot_interval_seconds"],
+                media_start_time=config["counters"]["media_start_time"]
+            )
+
+        self.sources = [SourceAnalytics(source_config, self.metrics, self.event_writer, self.traffic_counters)
+                        for source_config in config["sources"]]
+
+
+    def start_metrics_export(self):
+        metrics_config = self.config["metrics"]
+        if metrics_config["http_port"]:
+            host, port = self.metrics.start_http_server(metrics_config["http_port"])
+            logger.info("Serving metrics on http://%s:%s/metrics", host, port)
+        if metrics_config["json_path"]:
+            self.metrics.start_json_dump(metrics_config["json_path"], metrics_config["json_interval_seconds"])
+
+
+    def open_while_warming_up(self, open_source):
+        """
+        Calls open_source() while the model warms up on another thread (connecting to a stream can take
+        seconds on its own) and returns its result once both are done.
+        """
+        warm_up_thread = None
+        if self.config["pipeline"]["warm_up"] and not self.warmed_up:
+            warm_up_thread = threading.Thread(target=self.tracker.warm_up, args=(warm_up_shape(self.config),), name="warm-up")
+            warm_up_thread.start()
+        try:
+            return open_source()
+        finally:
+            if warm_up_thread is not None:
+                warm_up_thread.join()
+                self.warmed_up = True
+
+
+    def attach_tracker(self, source, frames_per_second):
+        """
+        Points the shared tracker at this source's frame rate, ROI cropper and motion gate.
+        """
+        if self.tracker.adaptive_stride is not None:
+            self.tracker.adaptive_stride.set_source_fps(frames_per_second)
+        self.tracker.roi_cropper = source.roi_cropper
+        self.tracker.motion_gate = source.motion_gate
+
+
+    def analyze_frame(self, source, frame, timestamp, stream=None):
+        if stream is None:
+            return source.run_analytics(self.tracker.process_frame(frame), frame.shape, timestamp)
+        tracked_objects, frame_shape = stream.track_frame(self.tracker, frame)
+        tracked_objects = source.run_analytics(tracked_objects, frame_shape, timestamp)
+        stream.record_frame_age(timestamp)
+        return tracked_objects
+
+
+    def run_shared_memory_source(self, source):
+        """
+        Tracks one source whose frames are decoded in a separate capture process and handed over through
+        shared memory.
+        """
+        pipeline_config = self.config["pipeline"]
+        stream_config = self.config["stream"]
+        capture = self.open_while_warming_up(lambda: SharedMemoryCapture(
+            source.input_media_source,
+            pipeline_config["queue_size"] + 2,
+            pipeline_config["drop_policy"],
+            reconnect=stream_config["reconnect"],
+            initial_backoff_seconds=stream_config["initial_backoff_seconds"],
+            max_backoff_seconds=stream_config["max_backoff_seconds"],
+            max_reconnect_attempts=stream_config["max_reconnect_attempts"],
+            backend=stream_config["backend"],
+            hwaccel=stream_config["hwaccel"]
+        ))
+        self.attach_tracker(source, capture.frames_per_second)
+        try:
+            capture.run(functools.partial(self.analyze_frame, source), source.render_frame, self.metrics)
+        finally:
+            source.output_sink.close()
+
+
+    def run_single_source(self, source):
+        """
+        Tracks one source with model.track and feeds every analytic from that single pass.
+        """
+        stream = self.open_while_warming_up(lambda: ResilientStream(
+            source.input_media_source,
+            **stream_options(self.config),
+            metrics=self.metrics,
+            full_resolution=source.output_sink.requires_annotation  # Full frames only when they are drawn on
+        ))
+        self.attach_tracker(source, stream.frames_per_second)
+
+        pipeline_config = self.config["pipeline"]
+        process_stream(
+            stream,
+            functools.partial(self.analyze_frame, source, stream=stream),
+            source.render_frame,
+            source.output_sink,
+            pipelined=pipeline_config["pipelined"],
+            queue_size=pipeline_config["queue_size"],
+            drop_policy=pipeline_config["drop_policy"],
+            metrics=self.metrics,
+            source_name=source.source_id
+        )
+
+
+    def run_multiple_sources(self):
+        """
+        Runs all sources through one batched model call per step, with per-source ByteTrack state.
+        """
+        engine = MultiSourceEngine(self.tracker, stream_options=stream_options(self.config))
+        for source in self.sources:
+            engine.add_source(source.source_id, source, source.roi_cropper, source.motion_gate)
+        if self.config["pipeline"]["warm_up"] and not self.warmed_up:
+            self.tracker.warm_up(warm_up_shape(self.config))
+            self.warmed_up = True
+        engine.run()
+
+
+    def run(self):
+        self.start_metrics_export()
+        try:
+            if len(self.sources) == 1 and self.config["pipeline"]["multiprocess_capture"]:
+                self.run_shared_memory_source(self.sources[0])
+            elif len(self.sources) == 1:
+                self.run_single_source(self.sources[0])
+            else:
+                self.run_multiple_sources()
+        finally:
+            if self.event_writer is not None:
+                self.event_writer.close()
+            if self.traffic_counters is not None:
+                self.traffic_counters.close()
+            for source in self.sources:
+                if source.motion_gate is not None:
+                    logger.info("Motion gate for source '%s': %s", source.source_id, source.motion_gate.stats())
+            self.metrics.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("config", nargs="?", default="config.yaml", help="YAML or JSON runner configuration")
+    arguments = parser.parse_args()
+
+    config = load_runner_config(arguments.config)
+    configure_logging(config["logging"]["level"], config["logging"]["log_file"])
+    PipelineRunner(config).run()
+
+
+if __name__ == "__main__":
+    main()
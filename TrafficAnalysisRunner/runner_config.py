@@ -0,0 +1,179 @@
+import copy
+import json
+import os
+
+from utils.capture_backends import CAPTURE_BACKENDS
+
+DEFAULT_RUNNER_CONFIG = {
+    "model": {
+        "path": "Models/Yolov12/weights/yolov12n.pt",
+        "objects_of_interest": ["person", "car"],
+        "conf_threshold": 0.3,
+        "use_gpu": False,
+        "backend": "pytorch",  # "onnx" or "openvino" export the weights once and reuse the cached artifact
+        "precision": "fp32",  # "fp16" or "int8" for exported backends
+        "imgsz": 640,
+    },
+    "pipeline": {
+        "pipelined": False,  # Single source: run capture, inference and render as separate stages
+        "queue_size": 4,
+        "multiprocess_capture": False,  # Single source: decode in a separate process, frames shared through shared memory
+        "drop_policy": None,  # "drop_oldest" or "block"; chosen per source type when None
+        "adaptive_stride": False,  # Single source: detect only every N frames, predicting tracks in between
+        "warm_up": True,  # Run dummy frames through the model while the capture opens
+        "warm_up_resolution": [1280, 720],  # Width, height of the dummy frames; use the streams' resolution
+    },
+    "stream": {
+        "reconnect": None,  # Reopen dropped sources with backoff; defaults to on for webcams and network streams
+        "latest_frame_only": None,  # Grab continuously and process only the newest frame; defaults to on for live sources
+        "initial_backoff_seconds": 0.5,
+        "max_backoff_seconds": 30.0,
+        "max_reconnect_attempts": None,  # None = keep retrying
+        "backend": "opencv",  # "ffmpeg" or "gstreamer" decode and scale outside Python; falls back to opencv
+        "hwaccel": None,  # ffmpeg -hwaccel method, e.g. "auto", "cuda" or "vaapi"
+        "inference_resolution": None,  # [width, height] the model gets, e.g. [640, 360]; keep the source's aspect ratio
+    },
+    "logging": {
+        "level": "INFO",
+        "log_file": None,
+    },
+    "metrics": {
+        "http_port": None,  # Serve /metrics on this port
+        "json_path": None,  # Or dump snapshots to this file
+        "json_interval_seconds": 10.0,
+    },
+    "events": {
+        "path": None,  # .jsonl, .csv, .parquet or .sqlite
+    },
+    "counters": {
+        "snapshot_path": None,  # Enables per-line/per-zone traffic counters persisted to this file
+        "snapshot_interval_seconds": 60.0,
+        "media_start_time": None,  # Wall-clock start of file sources (epoch or ISO 8601); defaults to the run's start
+    },
+    "sources": [],
+}
+
+DEFAULT_SOURCE_CONFIG = {
+    "id": None,
+    "input": None,  # File path, stream URL or webcam index
+    "output": {"type": "window"},  # create_output_sink arguments: window, video (output_path), jpeg_ring, none
+    "lines": [],  # [{"name": ..., "start": [x, y], "end": [x, y]}]
+    "zones": None,  # {"name": [[x, y], ...]} or a single list of points
+    "zone_options": {"use_lookup_mask": False, "anchor_point": "center"},
+    "speed": None,  # Estimate speeds: {} for defaults, see DEFAULT_SPEED_CONFIG
+    "roi": None,  # Detect only around the lines/zones: {"margin": 64}, or explicit {"regions": [[x0, y0, x1, y1]]}
+    "motion_gate": None,  # Skip detection on static frames: {} for defaults, see DEFAULT_MOTION_GATE_CONFIG
+    "render": {},  # Annotation drawing, see DEFAULT_RENDER_CONFIG
+}
+
+DEFAULT_SPEED_CONFIG = {
+    "pixels_per_meter": 10,  # Flat scale, used when there is no homography
+    "window_size": 8,  # Positions the speed of a track is fitted over
+    "homography": None,  # Ground-plane calibration: {"image_points": [[x, y] * 4], "ground_points": [[x, y] * 4]} in meters
+    "threshold_kph": None,  # Emit an event when a track goes faster
+}
+
+DEFAULT_ROI_CONFIG = {
+    "regions": None,  # Explicit regions; derived from the source's lines and zones when None
+    "margin": 64,  # Pixels added around every region
+}
+
+DEFAULT_MOTION_GATE_CONFIG = {
+    "method": "diff",  # "diff" (frame differencing) or "mog2" (background subtraction)
+    "thumbnail_width": 160,
+    "pixel_threshold": 25,
+    "min_changed_fraction": 0.002,  # Lower is more sensitive
+    "keepalive_frames": 30,  # Detect at least this often even without motion
+    "hold_frames": 5,  # Keep detecting this many frames after motion stops
+    "restrict_to_analytics": False,  # Only look for motion around the source's lines and zones
+    "margin": 64,  # Pixels around the lines and zones when restricted
+}
+
+DEFAULT_RENDER_CONFIG = {
+    "preview_scale": 1.0,  # Draw on a downscaled copy, e.g. 0.5 to show a 4K feed in 1080p
+    "render_every": 1,  # Annotate and output only every Nth frame; analytics still run on all frames
+    "label_cache_size": 512,  # Rasterized labels kept for reuse
+}
+
+
+def _merge(defaults, overrides, section):
+    if overrides is None:
+        return copy.deepcopy(defaults)
+    if not isinstance(overrides, dict):
+        raise ValueError(f"Config section '{section}' must be a mapping.")
+    unknown_keys = set(overrides) - set(defaults)
+    if unknown_keys:
+        raise ValueError(f"Unknown keys in config section '{section}': {sorted(unknown_keys)}")
+    merged = copy.deepcopy(defaults)
+    merged.update(overrides)
+    return merged
+
+
+def load_runner_config(config_path):
+    """
+    Reads a YAML or JSON runner configuration and fills in defaults for everything not set.
+    """
+    with open(config_path) as config_file:
+        if os.path.splitext(config_path)[1].lower() in (".yaml", ".yml"):
+            import yaml
+            raw_config = yaml.safe_load(config_file) or {}
+        else:
+            raw_config = json.load(config_file)
+    return normalize_runner_config(raw_config)
+
+
+def normalize_runner_config(raw_config):
+    """
+    Validates a runner configuration dict and returns a copy with all defaults filled in.
+    """
+    unknown_sections = set(raw_config) - set(DEFAULT_RUNNER_CONFIG)
+    if unknown_sections:
+        raise ValueError(f"Unknown config sections: {sorted(unknown_sections)}")
+
+    config = {section: _merge(defaults, raw_config.get(section), section)
+              for section, defaults in DEFAULT_RUNNER_CONFIG.items() if section != "sources"}
+
+    sources = raw_config.get("sources") or []
+    if not sources:
+        raise ValueError("The config needs at least one entry under 'sources'.")
+    if config["stream"]["backend"] not in CAPTURE_BACKENDS:
+        raise ValueError(f"stream.backend must be one of {CAPTURE_BACKENDS}.")
+    config["sources"] = []
+    for source_index, raw_source in enumerate(sources):
+        source = _merge(DEFAULT_SOURCE_CONFIG, raw_source, f"sources[{source_index}]")
+        if source["input"] is None:
+            raise ValueError(f"sources[{source_index}] has no 'input'.")
+        source["id"] = str(source["id"] if source["id"] is not None else source["input"])
+        source["zone_options"] = _merge(DEFAULT_SOURCE_CONFIG["zone_options"], source["zone_options"], f"sources[{source_index}].zone_options")
+        for line_index, line in enumerate(source["lines"]):
+            if "start" not in line or "end" not in line:
+                raise ValueError(f"sources[{source_index}].lines[{line_index}] needs 'start' and 'end'.")
+            line.setdefault("name", f"line_{line_index}")
+        if source["speed"] is not None:
+            source["speed"] = _merge(DEFAULT_SPEED_CONFIG, source["speed"], f"sources[{source_index}].speed")
+        if not (source["lines"] or source["zones"] or source["speed"] is not None):
+            raise ValueError(f"sources[{source_index}] has no analytics; configure lines, zones and/or speed.")
+        if source["roi"] is not None:
+            source["roi"] = _merge(DEFAULT_ROI_CONFIG, source["roi"], f"sources[{source_index}].roi")
+            if not (source["roi"]["regions"] or source["lines"] or source["zones"]):
+                raise ValueError(f"sources[{source_index}].roi needs explicit regions when the source has no lines or zones.")
+        if source["motion_gate"] is not None:
+            source["motion_gate"] = _merge(DEFAULT_MOTION_GATE_CONFIG, source["motion_gate"], f"sources[{source_index}].motion_gate")
+        if config["stream"]["inference_resolution"] and (
+                source["roi"] is not None or (source["motion_gate"] or {}).get("restrict_to_analytics")):
+            raise ValueError(f"sources[{source_index}]: roi and motion_gate.restrict_to_analytics work in source pixels "
+                             "and cannot be combined with stream.inference_resolution.")
+        source["render"] = _merge(DEFAULT_RENDER_CONFIG, source["render"], f"sources[{source_index}].render")
+        config["sources"].append(source)
+
+    if len({source["id"] for source in config["sources"]}) != len(config["sources"]):
+        raise ValueError("Source ids must be unique.")
+    single_source_options = [option for option in ("pipelined", "multiprocess_capture", "adaptive_stride")
+                             if config["pipeline"][option]]
+    if len(config["sources"]) > 1 and single_source_options:
+        raise ValueError(f"pipeline.{', pipeline.'.join(single_source_options)} only apply to a single source; "
+                         "disable them to run several sources.")
+    if len(config["sources"]) == 1 and config["pipeline"]["multiprocess_capture"] and config["stream"]["inference_resolution"]:
+        raise ValueError("pipeline.multiprocess_capture tracks at source resolution and cannot be combined with "
+                         "stream.inference_resolution.")
+    return config
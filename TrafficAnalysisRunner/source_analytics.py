@@ -0,0 +1,150 @@
+import logging
+from LineIntrusionDetector.line_intrusion_detector import LineIntrusionDetector
+from SpeedEstimator.speed_estimator import SpeedEstimator, compute_ground_homography
+from ZoneIntrusionDetector.zone_index import normalize_zones
+from ZoneIntrusionDetector.zone_intrusion_detector import ZoneIntrusionDetector
+from utils.annotation_renderer import AnnotationRenderer
+from utils.events import SpeedThresholdMonitor, ZoneEventTracker, line_crossing_events
+from utils.frame_pipeline import is_live_source
+from utils.motion_gate import MotionGate
+from utils.output_sinks import create_output_sink
+from utils.roi_cropping import RoiCropper, regions_from_analytics
+
+logger = logging.getLogger(__name__)
+
+
+class SourceAnalytics:
+    def __init__(self, source_config, metrics, event_writer=None, traffic_counters=None):
+        """
+        All analytics configured for one source (lines, zones, speed), fed by a single tracking pass.
+
+        Exposes the same run_analytics/render_frame interface as the StreamManagers, so it can be driven
+        by the runner directly or added to a MultiSourceEngine.
+
+        :param source_config: One normalized entry of the runner config's "sources".
+        :param metrics: PipelineMetrics shared with the tracker.
+        :param event_writer: Optional EventWriter receiving this source's events.
+        :param traffic_counters: Optional TrafficCounters counting line crossings and zone entries.
+        """
+        self.source_id = source_config["id"]
+        self.input_media_source = source_config["input"]
+        self.metrics = metrics
+        self.event_writer = event_writer
+        self.traffic_counters = traffic_counters
+        self.frame_index = -1
+
+        output_options = dict(source_config["output"])
+        self.output_sink = create_output_sink(output_options.pop("type", "window"), **output_options)
+
+        lines = source_config["lines"]
+        self.starting_points_of_lines = [tuple(line["start"]) for line in lines]
+        self.ending_points_of_lines = [tuple(line["end"]) for line in lines]
+        self.line_intrusion_detector = LineIntrusionDetector(
+            self.starting_points_of_lines,
+            self.ending_points_of_lines,
+            [line["name"] for line in lines]
+        ) if lines else None
+
+        self.zone_intrusion_points = source_config["zones"]
+        self.zone_intrusion_detector = None
+        self.zone_event_tracker = None
+        if self.zone_intrusion_points:
+            self.zone_intrusion_detector = ZoneIntrusionDetector(self.zone_intrusion_points, **source_config["zone_options"])
+            self.zone_event_tracker = ZoneEventTracker(self.source_id)
+
+        speed_config = source_config["speed"]
+        self.speed_estimator = None
+        self.speed_threshold_monitor = None
+        if speed_config is not None:
+            homography = speed_config["homography"]
+            if isinstance(homography, dict):
+                homography = compute_ground_homography(homography["image_points"], homography["ground_points"])
+            self.speed_estimator = SpeedEstimator(
+                pixels_per_meter=speed_config["pixels_per_meter"],
+                window_size=speed_config["window_size"],
+                homography=homography
+            )
+            if speed_config["threshold_kph"]:
+                self.speed_threshold_monitor = SpeedThresholdMonitor(speed_config["threshold_kph"], self.source_id)
+
+        roi_config = source_config["roi"]
+        self.roi_cropper = RoiCropper(
+            regions=roi_config["regions"],
+            lines=zip(self.starting_points_of_lines, self.ending_points_of_lines),
+            zones=normalize_zones(self.zone_intrusion_points).values(),
+            margin=roi_config["margin"]
+        ) if roi_config else None
+
+        self.motion_gate = None
+        gate_config = source_config["motion_gate"]
+        if gate_config is not None:
+            gate_options = dict(gate_config)
+            margin = gate_options.pop("margin")
+            gate_regions = None
+            if gate_options.pop("restrict_to_analytics"):
+                analytics_regions = regions_from_analytics(
+                    zip(self.starting_points_of_lines, self.ending_points_of_lines),
+                    normalize_zones(self.zone_intrusion_points).values(),
+                    margin
+                )
+                gate_regions = [[(x0, y0), (x1, y0), (x1, y1), (x0, y1)] for x0, y0, x1, y1 in analytics_regions]
+            self.motion_gate = MotionGate(regions=gate_regions, **gate_options)
+
+        self.annotation_renderer = AnnotationRenderer(
+            self.starting_points_of_lines,
+            self.ending_points_of_lines,
+            self.zone_intrusion_points,
+            **source_config["render"]
+        )
+
+
+    def run_analytics(self, tracked_objects, frame_shape=None, timestamp=None):
+        """
+        Runs every configured analytic on one frame's tracked objects and emits their events.
+        An object is flagged as intruding if it crossed a line or is inside a zone.
+        """
+        self.frame_index += 1
+        events = []
+        with self.metrics.time_stage("analytics"):
+            line_intrusions = None
+            if self.line_intrusion_detector is not None:
+                self.line_intrusion_detector.detect_intrusion(tracked_objects, timestamp)
+                line_intrusions = tracked_objects.intrusion_detected.copy()
+                if timestamp is not None:
+                    events += line_crossing_events(tracked_objects, timestamp, self.frame_index, self.source_id)
+
+            if self.zone_intrusion_detector is not None:
+                self.zone_intrusion_detector.detect_intrusion(tracked_objects, frame_shape)
+                if line_intrusions is not None:
+                    tracked_objects.intrusion_detected |= line_intrusions  # Zone detection overwrites the flags
+                if timestamp is not None:
+                    events += self.zone_event_tracker.update(tracked_objects, timestamp, self.frame_index)
+
+            if self.speed_estimator is not None:
+                self.speed_estimator.estimate_speed(tracked_objects, timestamp)
+                if self.speed_threshold_monitor is not None and timestamp is not None:
+                    events += self.speed_threshold_monitor.update(tracked_objects, timestamp, self.frame_index)
+
+        if events:
+            if self.event_writer is not None:
+                self.event_writer.submit(events)
+            if self.traffic_counters is not None:
+                self.traffic_counters.record_events(events, media_time=not is_live_source(self.input_media_source))
+        return tracked_objects
+
+
+    def render_frame(self, frame, tracked_objects):
+        """
+        Draws all configured overlays and hands the frame to the output sink. Returns False to stop processing.
+        Frames skipped by the render config's render_every are neither drawn nor output.
+        """
+        if not self.output_sink.requires_annotation:
+            with self.metrics.time_stage("display"):
+                return self.output_sink.write(frame)  # Analytics-only sinks skip drawing entirely
+        if not self.annotation_renderer.should_render():
+            return True
+
+        with self.metrics.time_stage("annotation"):
+            frame = self.annotation_renderer.render(frame, tracked_objects)
+        with self.metrics.time_stage("display"):
+            return self.output_sink.write(frame)
@@ -0,0 +1,147 @@
+"""
+Keeps a few worker processes with the model already loaded and warmed up, so a new camera session starts
+processing its first frame immediately instead of after model load and first-inference costs.
+
+Usage (from the repository root):
+    python -m TrafficAnalysisRunner.warm_model_pool config.yaml --size 2
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import queue
+import time
+from TrafficAnalysisRunner.pipeline_runner import PipelineRunner, create_tracker, warm_up_shape
+from TrafficAnalysisRunner.runner_config import load_runner_config, normalize_runner_config
+from utils.logging_setup import configure_logging
+
+logger = logging.getLogger(__name__)
+
+
+def _warm_worker(config, session_queue, ready_queue):
+    """
+    Loads and warms up the model, reports readiness, then waits for one session (a source config) to run.
+    """
+    configure_logging(config["logging"]["level"], config["logging"]["log_file"])
+    tracker = create_tracker(config, single_source=True)
+    tracker.warm_up(warm_up_shape(config))
+    ready_queue.put(os.getpid())
+
+    source_config = session_queue.get()
+    if source_config is None:  # Pool shutdown before a session arrived
+        return
+    logger.info("Worker %s attached to source '%s'", os.getpid(), source_config["id"])
+    PipelineRunner(dict(config, sources=[source_config]), tracker).run()
+
+
+class WarmModelPool:
+    def __init__(self, config, size=2, start_method="spawn"):
+        """
+        :param config: Normalized runner configuration; its model, pipeline, logging, events and counters
+                       sections apply to every session. Its sources are only used as templates by main().
+        :param size: Number of idle warm workers kept ready. Each attached session takes one worker and a
+                     replacement starts warming up in the background.
+        :param start_method: multiprocessing start method; "spawn" keeps CUDA/torch state out of the children.
+        """
+        if size < 1:
+            raise ValueError("The warm model pool needs at least one worker.")
+        self.config = config
+        self.size = size
+        self.context = multiprocessing.get_context(start_method)
+        self.session_queue = self.context.Queue()
+        self.ready_queue = self.context.Queue()
+        self.processes = []
+        self.ready_workers = 0  # Workers that finished warming up, attached or not
+        self.sessions = 0
+
+
+    def _start_worker(self):
+        process = self.context.Process(
+            target=_warm_worker,
+            args=(self.config, self.session_queue, self.ready_queue),
+            daemon=False
+        )
+        process.start()
+        self.processes.append(process)
+
+
+    def start(self):
+        for _ in range(self.size):
+            self._start_worker()
+        return self
+
+
+    def _collect_ready(self, timeout=None):
+        try:
+            self.ready_queue.get(timeout=timeout)
+        except queue.Empty:
+            return False
+        self.ready_workers += 1
+        return True
+
+
+    def idle_ready_workers(self):
+        return max(self.ready_workers - self.sessions, 0)
+
+
+    def wait_until_ready(self, timeout=None):
+        """
+        Blocks until every started worker has warmed up or the timeout passes. Returns the number of idle ready workers.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.ready_workers < len(self.processes):
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not self._collect_ready(remaining):
+                break
+        return self.idle_ready_workers()
+
+
+    def attach(self, source_config):
+        """
+        Hands a source to the next warm worker and starts a replacement worker, keeping `size` workers idle.
+        Returns immediately; the session starts as soon as a worker is ready (instantly if one already is).
+        """
+        session_config = normalize_runner_config(dict(self.config, sources=[source_config]))["sources"][0]
+        while self._collect_ready(timeout=0):
+            pass
+        if self.idle_ready_workers() == 0:
+            logger.warning("No warm worker ready for source '%s'; it starts once one finishes warming up", session_config["id"])
+        self.sessions += 1
+        self.session_queue.put(session_config)
+        self._start_worker()
+
+
+    def join(self):
+        """
+        Waits for all attached sessions to finish.
+        """
+        for process in self.processes:
+            process.join()
+
+
+    def shutdown(self):
+        """
+        Releases idle workers and waits for running sessions to finish.
+        """
+        for _ in range(len(self.processes) - self.sessions):
+            self.session_queue.put(None)
+        self.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("config", nargs="?", default="config.yaml", help="YAML or JSON runner configuration")
+    parser.add_argument("--size", type=int, default=2, help="Idle warm workers kept ready")
+    arguments = parser.parse_args()
+
+    config = load_runner_config(arguments.config)
+    configure_logging(config["logging"]["level"], config["logging"]["log_file"])
+    pool = WarmModelPool(config, arguments.size).start()
+    logger.info("%s warm workers ready", pool.wait_until_ready())
+    for source_config in config["sources"]:
+        pool.attach(source_config)
+    pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,82 +1,139 @@
-import sys
+import logging
+import time
+import numpy as np
 from ZoneIntrusionDetector.model_loader import ModelLoader
 from ZoneIntrusionDetector.utils import get_class_ids_from_names
-from ZoneIntrusionDetector.tracked_objects import TrackedObjects
+from utils.adaptive_stride import ConstantVelocityPredictor
+from utils.byte_tracking import apply_byte_tracker, create_byte_tracker
+from utils.frame_detections import FrameDetections
+from utils.metrics import PipelineMetrics
+
+logger = logging.getLogger(__name__)
 
 
 class ObjectTracker:
-    def __init__(self, model_path, conf_threshold=0.5, objects_of_interest=None, use_gpu=False):
+    def __init__(self, model_path, conf_threshold=0.5, objects_of_interest=None, use_gpu=False, adaptive_stride=None, metrics=None, backend="pytorch", precision="fp32", imgsz=640, roi_cropper=None, motion_gate=None):
         """
         Initialize the Object Tracker .
+
+        :param adaptive_stride: Optional AdaptiveStrideController; when set, detection only runs on the frames
+                                it selects and tracks are carried forward with a constant-velocity predictor.
+        :param metrics: Optional PipelineMetrics receiving inference and post-processing latencies.
+        :param backend: Inference backend, "pytorch", "onnx" or "openvino" (see utils.model_backends).
+        :param precision: "fp32", "fp16" or "int8" for the exported backends.
+        :param imgsz: Model input size.
+        :param roi_cropper: Optional RoiCropper; when set, detection only runs on its crops (see utils.roi_cropping).
+        :param motion_gate: Optional MotionGate; frames without motion skip detection and keep the last tracks.
         """
-        self.model = ModelLoader(model_path, use_gpu).load_yolo_model()
+        self.model = ModelLoader(model_path, use_gpu, backend, precision, imgsz).load_yolo_model()
         self.class_labels = self.model.names
         self.conf_threshold = conf_threshold
         self.expected_class_ids = get_class_ids_from_names(self.class_labels, objects_of_interest)
         self.device = "cuda" if use_gpu else "cpu"
+        self.adaptive_stride = adaptive_stride
+        self.track_predictor = ConstantVelocityPredictor() if adaptive_stride is not None else None
+        self.frame_index = 0
+        self.metrics = metrics or PipelineMetrics()
+        self.roi_cropper = roi_cropper
+        self.roi_byte_tracker = None  # model.track keeps its own tracker; ROI mode tracks the merged crop results itself
+        self.motion_gate = motion_gate
+        self.last_tracked_objects = FrameDetections.empty(self.class_labels)
+
+
+    def warm_up(self, frame_shape=(720, 1280, 3), iterations=2):
+        """
+        Runs dummy frames at the stream resolution through the model, so one-time costs (lazy imports,
+        graph compilation, buffer allocation) are paid before the first real frame instead of on it.
+        """
+        dummy_frame = np.zeros(frame_shape, dtype=np.uint8)
+        started = time.perf_counter()
+        for _ in range(iterations):
+            self.model.predict(dummy_frame, verbose=False, classes=self.expected_class_ids)
+        logger.info("Model warm-up at %sx%s took %.2f s", frame_shape[1], frame_shape[0], time.perf_counter() - started)
 
 
     def process_tracked_objects(self, detection_results):
         """
-        Process detection results and return a list of tracked objects.
+        Process detection results and return the frame's tracked objects as a columnar FrameDetections batch.
         """
-        tracked_objects = []
-        print(f"Tracked Objects Memory Usage: {sys.getsizeof(tracked_objects)} bytes")
+        tracked_objects = FrameDetections.empty(self.class_labels)
 
         if not detection_results or len(detection_results) == 0: # Check if detection_results exist and are not empty
-            print("No detection results available!")
-            return tracked_objects  # Return an empty list safely
+            logger.debug("No detection results available")
+            return tracked_objects  # Return an empty batch safely
 
-        if detection_results[0].boxes is None or len(detection_results[0].boxes) == 0: # Check if any bounding boxes exist
-            print("No objects detected in this frame!")
-            return tracked_objects  # Return an empty list safely
+        detected_boxes = detection_results[0].boxes
+        if detected_boxes is None or len(detected_boxes) == 0: # Check if any bounding boxes exist
+            logger.debug("No objects detected in this frame")
+            return tracked_objects  # Return an empty batch safely
 
-        conf_scores = detection_results[0].boxes.conf.to(self.device)
+        conf_scores = detected_boxes.conf.cpu().numpy()
         valid_indices = conf_scores > self.conf_threshold  # Filter confidence scores
 
-        if valid_indices.sum() == 0:  # If no objects pass confidence threshold
-            print("No valid detections (all below confidence threshold)!")
+        if not valid_indices.any():  # If no objects pass confidence threshold
+            logger.debug("No valid detections (all below confidence threshold)")
             return tracked_objects
 
-        bounding_boxes = detection_results[0].boxes.xyxy[valid_indices].to(self.device).tolist()
-        detected_class_ids = detection_results[0].boxes.cls[valid_indices].to(self.device).tolist()
-
-        track_ids = detection_results[0].boxes.id
-        if track_ids is None:
-            track_ids = [-1] * len(detected_class_ids)  # Assign -1 if no tracking info
-        else:
-            track_ids = track_ids[valid_indices].int().tolist()
-
+        if detected_boxes.id is None:
+            return tracked_objects  # No tracking info, untracked objects are skipped
 
-        for index, bbox in enumerate(bounding_boxes):
-            class_id = int(detected_class_ids[index])
-            track_id = int(track_ids[index])
+        # Skip untracked objects and keep everything else as contiguous arrays, without per-object instances
+        track_ids = detected_boxes.id.cpu().numpy().astype(np.int64)
+        valid_indices &= track_ids != -1
+        return FrameDetections(
+            boxes=detected_boxes.xyxy.cpu().numpy()[valid_indices],
+            class_ids=detected_boxes.cls.cpu().numpy()[valid_indices],
+            track_ids=track_ids[valid_indices],
+            confidences=conf_scores[valid_indices],
+            class_labels=self.class_labels
+        )
 
-            # Skip untracked objects
-            if track_id == -1:
-                continue
 
-            # Append tracked object
-            tracked_objects.append(TrackedObjects(
-                track_id=track_id,
-                class_id=class_id,
-                class_label=self.class_labels[class_id],
-                bounding_box=bbox
-            ))
-
-        return tracked_objects
+    def track_roi(self, frame):
+        """
+        Detects only inside the ROI crops (one batched call) and tracks the boxes mapped back to the full frame.
+        """
+        if self.roi_byte_tracker is None:
+            self.roi_byte_tracker = create_byte_tracker()
+        detection_result = self.roi_cropper.detect(self.model, frame, verbose=False, classes=self.expected_class_ids)
+        return apply_byte_tracker(self.roi_byte_tracker, detection_result, frame)
 
 
     def process_frame(self, frame):
-
-        detection_results = self.model.track(frame,
-                                             persist=True,
-                                             tracker="bytetrack.yaml",
-                                             verbose=True,
-                                             classes=self.expected_class_ids
-                                             )
-
-        return self.process_tracked_objects(detection_results)
+        self.frame_index += 1
+
+        # Static scene: nothing moved, so the last tracks are still where they were
+        if self.motion_gate is not None and not self.motion_gate.should_detect(frame):
+            self.metrics.increment("motion_gated_frames")
+            return self.last_tracked_objects.select(slice(None))
+
+        # In adaptive stride mode, skipped frames get predicted tracks instead of a detection
+        if self.adaptive_stride is not None and not self.adaptive_stride.should_detect(frame, self.frame_index):
+            return self.track_predictor.predict(self.frame_index)
+
+        inference_started = time.perf_counter()
+        with self.metrics.time_stage("inference"):
+            if self.roi_cropper is not None:
+                detection_results = [self.track_roi(frame)]
+            else:
+                detection_results = self.model.track(frame,
+                                                     persist=True,
+                                                     tracker="bytetrack.yaml",
+                                                     verbose=False,  # ultralytics' per-frame console output is a bottleneck at high frame rates
+                                                     classes=self.expected_class_ids
+                                                     )
+
+        with self.metrics.time_stage("postprocess"):
+            tracked_objects = self.process_tracked_objects(detection_results)
+
+        inference_seconds = time.perf_counter() - inference_started
+        if self.adaptive_stride is not None:
+            self.adaptive_stride.record_inference_latency(inference_seconds)
+            self.track_predictor.update(tracked_objects, self.frame_index)
+        if self.motion_gate is not None:
+            self.motion_gate.record_inference_latency(inference_seconds)
+        self.last_tracked_objects = tracked_objects
+        return tracked_objects
 
 
     # def process_video(self, input_media_source):
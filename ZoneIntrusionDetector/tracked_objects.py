@@ -6,6 +6,7 @@ class TrackedObjects:
         self.class_label = class_label
         self.bounding_box = bounding_box
         self.intrusion_detected = False
+        self.occupied_zones = []  # Names of the zones containing the object's center
 
 
     def __repr__(self):
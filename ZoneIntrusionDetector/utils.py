@@ -1,31 +1,34 @@
 import cv2
 import numpy as np
+from ZoneIntrusionDetector.zone_index import normalize_zones
 
 def display_annotated_frame(frame, tracked_objects, intrusion_zone_points=None):
     """
     Draws:
     - Bounding boxes around detected objects
     - Labels with class name and ID
-    - Intrusion zone boundary (if provided)
+    - Intrusion zone boundaries (if provided)
     """
-    # Draw Intrusion Zone (if points are given)
-    if intrusion_zone_points and len(intrusion_zone_points) >= 3:
-        polygon = np.array(intrusion_zone_points, np.int32).reshape((-1, 1, 2))
-        cv2.polylines(frame, [polygon], isClosed=True, color=(0, 255, 255), thickness=2)  # Yellow boundary
-
-    # Draw bounding boxes on tracked objects
-    for obj in tracked_objects:
-        bbox = list(map(int, obj.bounding_box))
-        if len(bbox) != 4:
-            continue
-
-        color = (0, 0, 255) if obj.intrusion_detected else (0, 255, 0)  # Red if intrusion, Green otherwise
+    # Draw Intrusion Zones (if points are given); accepts one polygon or a dict of named polygons
+    for zone_points in normalize_zones(intrusion_zone_points).values():
+        if len(zone_points) >= 3:
+            polygon = np.array(zone_points, np.int32).reshape((-1, 1, 2))
+            cv2.polylines(frame, [polygon], isClosed=True, color=(0, 255, 255), thickness=2)  # Yellow boundary
+
+    # Draw bounding boxes on tracked objects, reading the FrameDetections arrays directly
+    class_labels = tracked_objects.class_labels
+    for bbox, class_id, track_id, intrusion_detected in zip(
+            tracked_objects.pixel_boxes.tolist(),
+            tracked_objects.class_ids.tolist(),
+            tracked_objects.track_ids.tolist(),
+            tracked_objects.intrusion_detected.tolist()):
+        color = (0, 0, 255) if intrusion_detected else (0, 255, 0)  # Red if intrusion, Green otherwise
 
         # Draw bounding box
         cv2.rectangle(frame, (bbox[0], bbox[1]), (bbox[2], bbox[3]), color, 2)
 
         # Display label with Track ID
-        label = f"{obj.class_label} [ID: {obj.track_id}]"
+        label = f"{class_labels[class_id]} [ID: {track_id}]"
         cv2.putText(frame, label, (bbox[0], bbox[1] - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
 
     return frame
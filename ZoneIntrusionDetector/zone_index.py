@@ -0,0 +1,109 @@
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_zones(zone_intrusion_points):
+    """
+    Accepts a single polygon (list of (x, y) points) or a dict of named polygons and returns a dict.
+    A single polygon is named "zone".
+    """
+    if not zone_intrusion_points:
+        return {}
+    if isinstance(zone_intrusion_points, dict):
+        return dict(zone_intrusion_points)
+    return {"zone": zone_intrusion_points}
+
+
+class ZoneIndex:
+    def __init__(self, zones):
+        """
+        Compiles named polygons once into padded vertex/edge arrays and bounding boxes so that all object
+        centers can be tested against all zones in a single vectorized call.
+
+        :param zones: Dict of zone name -> list of (x, y) points, or a single list of points.
+                      Polygons with fewer than 3 points are ignored.
+        """
+        self.zone_names = []
+        polygons = []
+        for zone_name, zone_points in normalize_zones(zones).items():
+            if len(zone_points) < 3:
+                logger.warning("Zone '%s' has fewer than 3 points and is ignored.", zone_name)
+                continue
+            self.zone_names.append(zone_name)
+            polygons.append(np.asarray(zone_points, dtype=np.float64).reshape(-1, 2))
+
+        max_edges = max((len(polygon) for polygon in polygons), default=0)
+        number_of_zones = len(polygons)
+        self.edge_starts = np.zeros((number_of_zones, max_edges, 2))
+        self.edge_ends = np.zeros((number_of_zones, max_edges, 2))
+        self.edge_valid = np.zeros((number_of_zones, max_edges), dtype=bool)  # Padding edges are masked out
+        self.bbox_min = np.zeros((number_of_zones, 2))
+        self.bbox_max = np.zeros((number_of_zones, 2))
+
+        for zone_index, polygon in enumerate(polygons):
+            number_of_edges = len(polygon)
+            self.edge_starts[zone_index, :number_of_edges] = polygon
+            self.edge_ends[zone_index, :number_of_edges] = np.roll(polygon, -1, axis=0)
+            self.edge_valid[zone_index, :number_of_edges] = True
+            self.bbox_min[zone_index] = polygon.min(axis=0)
+            self.bbox_max[zone_index] = polygon.max(axis=0)
+
+
+    def __len__(self):
+        return len(self.zone_names)
+
+
+    def contains(self, points):
+        """
+        Tests N points against all zones. Points on a zone boundary count as inside, like
+        cv2.pointPolygonTest(...) >= 0.
+
+        :param points: (N, 2) array of (x, y) points.
+        :return: (N, Z) bool matrix, True where point n lies in zone z.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        inside = np.zeros((len(points), len(self)), dtype=bool)
+        if len(points) == 0 or len(self) == 0:
+            return inside
+
+        # Bounding box pruning: only (point, zone) pairs whose bbox contains the point are tested exactly
+        in_bbox = np.all((points[:, None, :] >= self.bbox_min[None]) & (points[:, None, :] <= self.bbox_max[None]), axis=2)
+        point_indices, zone_indices = np.nonzero(in_bbox)
+        if len(point_indices) == 0:
+            return inside
+
+        point_x = points[point_indices, 0][:, None]
+        point_y = points[point_indices, 1][:, None]
+        start_x, start_y = self.edge_starts[zone_indices, :, 0], self.edge_starts[zone_indices, :, 1]
+        end_x, end_y = self.edge_ends[zone_indices, :, 0], self.edge_ends[zone_indices, :, 1]
+        edge_valid = self.edge_valid[zone_indices]
+
+        # Even-odd ray casting towards +x
+        edge_dy = end_y - start_y
+        safe_dy = np.where(edge_dy == 0, 1.0, edge_dy)
+        straddles = (start_y > point_y) != (end_y > point_y)
+        intersection_x = start_x + (point_y - start_y) * (end_x - start_x) / safe_dy
+        ray_crossings = straddles & (point_x < intersection_x) & edge_valid
+        pair_inside = (np.count_nonzero(ray_crossings, axis=1) % 2) == 1
+
+        # Boundary points: collinear with an edge and within its extent
+        cross_product = (end_x - start_x) * (point_y - start_y) - edge_dy * (point_x - start_x)
+        on_edge = ((cross_product == 0)
+                   & (point_x >= np.minimum(start_x, end_x)) & (point_x <= np.maximum(start_x, end_x))
+                   & (point_y >= np.minimum(start_y, end_y)) & (point_y <= np.maximum(start_y, end_y))
+                   & edge_valid)
+        pair_inside |= on_edge.any(axis=1)
+
+        inside[point_indices, zone_indices] = pair_inside
+        return inside
+
+
+    def occupancy(self, points):
+        """
+        Returns a dict of zone name -> indices of the points inside that zone.
+        """
+        inside = self.contains(points)
+        return {zone_name: np.flatnonzero(inside[:, zone_index]) for zone_index, zone_name in enumerate(self.zone_names)}
@@ -1,33 +1,71 @@
-import cv2
+import logging
 import sys
 import numpy as np
+from ZoneIntrusionDetector.zone_index import ZoneIndex
+from ZoneIntrusionDetector.zone_lookup_mask import ZoneLookupMask
+
+logger = logging.getLogger(__name__)
 
 
 class ZoneIntrusionDetector:
-    def __init__(self, zone_intrusion_points):
+    def __init__(self, zone_intrusion_points, use_lookup_mask=False, anchor_point="center"):
         """
-        :param zone_intrusion_points: List of (x, y) points defining the polygon.
+        :param zone_intrusion_points: List of (x, y) points defining the polygon,
+                                      or a dict of zone name -> list of points for several zones.
+        :param use_lookup_mask: Rasterize the zones once per frame size and answer membership with a mask lookup
+                                instead of polygon geometry (for fixed cameras with static zones).
+        :param anchor_point: "center" tests the bounding box center, "foot" tests the bottom-center point.
         """
+        if anchor_point not in ("center", "foot"):
+            raise ValueError(f"Unknown anchor point: {anchor_point}")
+        self.anchor_point = anchor_point
+        self.zone_lookup_mask = ZoneLookupMask() if use_lookup_mask else None
+        self.set_zones(zone_intrusion_points)
+
+    def set_zones(self, zone_intrusion_points):
+        """Replaces the zone configuration; the lookup mask picks up the change on the next frame."""
         self.zone_intrusion_points = zone_intrusion_points
-        self.zone_defined = len(self.zone_intrusion_points) >= 3  # Only valid if it has 3+ points
+        self.zone_index = ZoneIndex(zone_intrusion_points)  # Polygons are compiled once, not per frame
+        self.zone_defined = len(self.zone_index) > 0  # Only valid if at least one zone has 3+ points
+        self.zone_occupancy = {zone_name: 0 for zone_name in self.zone_index.zone_names}  # Objects per zone on the last frame
+
+    def anchor_points(self, bounding_boxes):
+        """Returns the point tested for each (N, 4) bounding box: its center or its bottom-center "foot"."""
+        bounding_boxes = np.asarray(bounding_boxes, dtype=np.float64).reshape(-1, 4)
+        center_x = (bounding_boxes[:, 0] + bounding_boxes[:, 2]) // 2
+        if self.anchor_point == "foot":
+            return np.stack([center_x, bounding_boxes[:, 3]], axis=1)
+        return np.stack([center_x, (bounding_boxes[:, 1] + bounding_boxes[:, 3]) // 2], axis=1)
 
     def is_inside_zone(self, bbox):
-        """Checks if a bounding box's center is inside the polygon."""
+        """Checks if a bounding box's anchor point is inside any zone."""
         if not self.zone_defined:
             return False  # No valid zone defined yet
 
-        bbox_center = ((bbox[0] + bbox[2]) // 2, (bbox[1] + bbox[3]) // 2)
-        polygon = np.array(self.zone_intrusion_points, np.int32).reshape((-1, 1, 2))
-        return cv2.pointPolygonTest(polygon, bbox_center, False) >= 0
+        return bool(self.zone_index.contains(self.anchor_points([bbox])).any())
 
-    def detect_intrusion(self, tracked_objects):
+    def detect_intrusion(self, tracked_objects, frame_shape=None):
         """
-        Updates each tracked object with intrusion status.
+        Updates each tracked object with intrusion status and the zones it occupies,
+        testing all objects against all zones in one vectorized call.
+
+        :param tracked_objects: FrameDetections batch; intrusion flags and zone membership are written back into it.
+        :param frame_shape: Shape of the current frame; required for the lookup mask, which falls back to
+                            polygon geometry when it is not given.
         """
         if not self.zone_defined:  # Exit early if not enough points
-            print("Not enough points to define a valid Zone.")
+            logger.warning("Not enough points to define a valid Zone.")
             # sys.exit(1) # to exit full program
             return
 
-        for obj in tracked_objects:
-            obj.intrusion_detected = self.is_inside_zone(obj.bounding_box)  # Intrusion flag update
\ No newline at end of file
+        points = self.anchor_points(tracked_objects.boxes)
+        if self.zone_lookup_mask is not None and frame_shape is not None:
+            self.zone_lookup_mask.ensure(frame_shape, self.zone_intrusion_points)  # Rebuilds only on size/config change
+            inside = self.zone_lookup_mask.contains(points)
+        else:
+            inside = self.zone_index.contains(points)
+
+        tracked_objects.intrusion_detected[:] = inside.any(axis=1)  # Intrusion flag update
+        tracked_objects.zone_membership = inside
+        tracked_objects.zone_names = self.zone_index.zone_names
+        self.zone_occupancy = dict(zip(self.zone_index.zone_names, inside.sum(axis=0).tolist()))
@@ -0,0 +1,102 @@
+import cv2
+import numpy as np
+from ZoneIntrusionDetector.zone_index import normalize_zones
+
+
+class ZoneLookupMask:
+    def __init__(self):
+        """
+        Rasterizes zones once at the frame resolution so membership becomes a single array lookup.
+
+        Non-overlapping zones are stored as a label mask (0 = no zone, i + 1 = zone i). If any zones
+        overlap, the mask switches to a bitmask where bit i is set for pixels inside zone i.
+        The mask is rebuilt automatically whenever the frame size or the zone configuration changes.
+        """
+        self.zone_names = []
+        self.mask = None
+        self.uses_bitmask = False
+        self.frame_shape = None
+        self.zone_signature = None
+        self.rebuild_count = 0
+
+
+    @staticmethod
+    def _signature(zones):
+        return tuple((zone_name, tuple(map(tuple, zone_points))) for zone_name, zone_points in zones.items())
+
+
+    def ensure(self, frame_shape, zone_intrusion_points):
+        """
+        Rebuilds the mask if the frame size or zone configuration differs from the one it was built for.
+        """
+        zones = {zone_name: zone_points for zone_name, zone_points in normalize_zones(zone_intrusion_points).items()
+                 if len(zone_points) >= 3}
+        frame_shape = tuple(frame_shape[:2])
+        zone_signature = self._signature(zones)
+        if self.mask is None or frame_shape != self.frame_shape or zone_signature != self.zone_signature:
+            self._build(frame_shape, zones)
+            self.frame_shape = frame_shape
+            self.zone_signature = zone_signature
+
+
+    def _build(self, frame_shape, zones):
+        self.zone_names = list(zones)
+        if len(self.zone_names) > 64:
+            raise ValueError("ZoneLookupMask supports at most 64 zones.")
+
+        polygons = [np.array(zone_points, np.int32).reshape((-1, 1, 2)) for zone_points in zones.values()]
+        label_dtype = np.uint8 if len(polygons) < 255 else np.uint16
+        label_mask = np.zeros(frame_shape, dtype=label_dtype)
+        zone_pixels = np.zeros(frame_shape, dtype=np.uint8)
+        overlapping = False
+        for zone_index, polygon in enumerate(polygons):
+            zone_pixels[:] = 0
+            cv2.fillPoly(zone_pixels, [polygon], 1)
+            zone_area = zone_pixels.view(bool)
+            overlapping = overlapping or bool(label_mask[zone_area].any())
+            label_mask[zone_area] = zone_index + 1
+
+        if overlapping:
+            bitmask_dtype = next(dtype for dtype in (np.uint8, np.uint16, np.uint32, np.uint64)
+                                 if np.iinfo(dtype).bits >= len(polygons))
+            bitmask = np.zeros(frame_shape, dtype=bitmask_dtype)
+            for zone_index, polygon in enumerate(polygons):
+                zone_pixels[:] = 0
+                cv2.fillPoly(zone_pixels, [polygon], 1)
+                bitmask[zone_pixels.view(bool)] |= bitmask_dtype(1 << zone_index)
+            self.mask = bitmask
+        else:
+            self.mask = label_mask
+        self.uses_bitmask = overlapping
+        self.rebuild_count += 1
+
+
+    def contains(self, points):
+        """
+        Looks up N points in the mask with one fancy-index operation.
+
+        :param points: (N, 2) array of (x, y) points; points outside the frame are in no zone, except points on
+                       its right or bottom edge (x == width, y == height), where box corners end up.
+        :return: (N, Z) bool matrix, True where point n lies in zone z.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        inside = np.zeros((len(points), len(self.zone_names)), dtype=bool)
+        if self.mask is None or len(points) == 0 or not self.zone_names:
+            return inside
+
+        frame_height, frame_width = self.mask.shape
+        pixel_x = np.rint(points[:, 0]).astype(np.intp)
+        pixel_y = np.rint(points[:, 1]).astype(np.intp)
+        in_frame = (pixel_x >= 0) & (pixel_x <= frame_width) & (pixel_y >= 0) & (pixel_y <= frame_height)
+        # xyxy boxes end at the frame size, so a foot point of an object at the bottom has y == height
+        pixel_x = np.minimum(pixel_x, frame_width - 1)
+        pixel_y = np.minimum(pixel_y, frame_height - 1)
+        values = self.mask[pixel_y[in_frame], pixel_x[in_frame]]
+
+        if self.uses_bitmask:
+            zone_bits = np.left_shift(np.ones(len(self.zone_names), dtype=self.mask.dtype),
+                                      np.arange(len(self.zone_names), dtype=self.mask.dtype))
+            inside[in_frame] = (values[:, None] & zone_bits[None, :]) != 0
+        else:
+            inside[in_frame] = values[:, None] == np.arange(1, len(self.zone_names) + 1)[None, :]
+        return inside
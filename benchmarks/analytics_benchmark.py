@@ -0,0 +1,291 @@
+"""
+Benchmarks the tracking post-processing, analytics and annotation hot paths on synthetic tracks.
+
+Runs on CPU without a camera or a model file: ObjectTracker.process_tracked_objects is fed synthetic
+ultralytics-style results, and the detectors, speed estimator and display functions are fed the
+FrameDetections it produces. Results (latency percentiles, allocations, throughput) are written as JSON.
+
+Usage (from the repository root):
+    python -m benchmarks.analytics_benchmark --objects 10 100 --lines 8 --zones 4 --resolution 1920x1080 \
+        --output benchmark_results.json
+    python -m benchmarks.analytics_benchmark --save-baseline benchmarks/baseline.json
+    python -m benchmarks.analytics_benchmark --baseline benchmarks/baseline.json --tolerance 0.2
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from LineIntrusionDetector.line_intrusion_detector import LineIntrusionDetector
+from LineIntrusionDetector.object_tracker import ObjectTracker
+from LineIntrusionDetector.utils import display_annotated_frame as display_line_frame
+from SpeedEstimator.speed_estimator import SpeedEstimator
+from SpeedEstimator.utils import display_annotated_frame as display_speed_frame
+from ZoneIntrusionDetector.utils import display_annotated_frame as display_zone_frame
+from utils.annotation_renderer import AnnotationRenderer
+from ZoneIntrusionDetector.zone_intrusion_detector import ZoneIntrusionDetector
+
+CLASS_LABELS = {0: "person", 1: "bicycle", 2: "car", 3: "motorcycle", 5: "bus", 7: "truck"}
+FRAMES_PER_SECOND = 30
+
+
+class SyntheticTensor:
+    """Stands in for a torch tensor: .cpu().numpy() returns the wrapped array."""
+    def __init__(self, values):
+        self.values = values
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.values
+
+
+class SyntheticBoxes:
+    """Stands in for ultralytics Boxes with the fields process_tracked_objects reads."""
+    def __init__(self, boxes, confidences, class_ids, track_ids):
+        self.xyxy = SyntheticTensor(boxes)
+        self.conf = SyntheticTensor(confidences)
+        self.cls = SyntheticTensor(class_ids)
+        self.id = SyntheticTensor(track_ids)
+
+    def __len__(self):
+        return len(self.conf.values)
+
+
+class SyntheticResult:
+    def __init__(self, boxes):
+        self.boxes = boxes
+
+
+class SyntheticScene:
+    def __init__(self, number_of_objects, number_of_lines, number_of_zones, frame_width, frame_height, number_of_frames, seed=0):
+        """
+        Objects moving at constant velocity (bouncing off the frame edges), plus random lines and zones.
+        """
+        random_generator = np.random.default_rng(seed)
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+
+        frame_size = np.array([frame_width, frame_height], dtype=np.float64)
+        sizes = random_generator.uniform(20, 120, size=(number_of_objects, 2))
+        start = random_generator.uniform(0, 1, size=(number_of_objects, 2)) * (frame_size - sizes)
+        velocity = random_generator.uniform(-8, 8, size=(number_of_objects, 2))
+        travel = start[None] + velocity[None] * np.arange(number_of_frames)[:, None, None]
+        span = frame_size - sizes
+        folded = np.mod(travel, 2 * span)
+        top_left = np.where(folded > span, 2 * span - folded, folded)  # Bounce off the edges
+        self.boxes = np.concatenate([top_left, top_left + sizes[None]], axis=2)  # (frames, objects, 4)
+
+        self.class_ids = random_generator.choice(list(CLASS_LABELS), size=number_of_objects).astype(np.float32)
+        self.confidences = random_generator.uniform(0.2, 0.95, size=(number_of_frames, number_of_objects)).astype(np.float32)
+        self.track_ids = np.arange(1, number_of_objects + 1, dtype=np.float32)
+
+        self.line_starts = [tuple(point) for point in random_generator.integers(0, [frame_width, frame_height], size=(number_of_lines, 2)).tolist()]
+        self.line_ends = [tuple(point) for point in random_generator.integers(0, [frame_width, frame_height], size=(number_of_lines, 2)).tolist()]
+
+        self.zones = {}
+        for zone_index in range(number_of_zones):
+            center = random_generator.uniform(0.2, 0.8, size=2) * frame_size
+            radius = random_generator.uniform(0.05, 0.2) * min(frame_width, frame_height)
+            angles = np.sort(random_generator.uniform(0, 2 * np.pi, size=6))
+            self.zones[f"zone_{zone_index}"] = [tuple(point) for point in
+                                                (center + radius * np.stack([np.cos(angles), np.sin(angles)], axis=1)).astype(int).tolist()]
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def detection_results(self, frame_index):
+        """Returns the [Results]-like list ObjectTracker.process_tracked_objects receives from model.track."""
+        return [SyntheticResult(SyntheticBoxes(self.boxes[frame_index].astype(np.float32), self.confidences[frame_index],
+                                               self.class_ids, self.track_ids))]
+
+
+def make_object_tracker(conf_threshold=0.3):
+    """An ObjectTracker without a loaded model, enough for process_tracked_objects."""
+    tracker = ObjectTracker.__new__(ObjectTracker)
+    tracker.class_labels = CLASS_LABELS
+    tracker.conf_threshold = conf_threshold
+    return tracker
+
+
+def measure(make_call, inputs, number_of_objects, warmup_calls=5):
+    """
+    Times make_call()(item) for every input, then repeats the pass under tracemalloc for allocation figures.
+    make_call is invoked once per pass so stateful stages start fresh each time.
+    """
+    call = make_call()
+    for item in inputs[:warmup_calls]:
+        call(item)
+
+    call = make_call()
+    durations = np.empty(len(inputs))
+    for index, item in enumerate(inputs):
+        started = time.perf_counter()
+        call(item)
+        durations[index] = time.perf_counter() - started
+
+    call = make_call()
+    peak_bytes = np.empty(len(inputs))
+    retained_bytes = np.empty(len(inputs))
+    tracemalloc.start()
+    for index, item in enumerate(inputs):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        call(item)
+        current, peak = tracemalloc.get_traced_memory()
+        peak_bytes[index] = peak - before
+        retained_bytes[index] = current - before
+    tracemalloc.stop()
+
+    durations_ms = durations * 1000.0
+    mean_seconds = max(durations.mean(), 1e-12)
+    return {
+        "calls": len(inputs),
+        "p50_ms": round(float(np.percentile(durations_ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(durations_ms, 95)), 4),
+        "p99_ms": round(float(np.percentile(durations_ms, 99)), 4),
+        "mean_ms": round(float(durations_ms.mean()), 4),
+        "calls_per_second": round(1.0 / mean_seconds, 1),
+        "objects_per_second": round(number_of_objects / mean_seconds, 1),
+        "peak_allocated_bytes_per_call": int(peak_bytes.mean()),
+        "retained_bytes_per_call": int(retained_bytes.mean()),
+    }
+
+
+def run_suite(number_of_objects, number_of_lines, number_of_zones, frame_width, frame_height, number_of_frames):
+    """
+    Runs every benchmark at one scale and returns {benchmark name: result}.
+    """
+    scene = SyntheticScene(number_of_objects, number_of_lines, number_of_zones, frame_width, frame_height, number_of_frames)
+    tracker = make_object_tracker()
+    detection_results = [scene.detection_results(frame_index) for frame_index in range(len(scene))]
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        frames = [(tracker.process_tracked_objects(results), frame_index / FRAMES_PER_SECOND)
+                  for frame_index, results in enumerate(detection_results)]
+    canvas = np.zeros((frame_height, frame_width, 3), dtype=np.uint8)
+    frame_shape = canvas.shape
+
+    def line_intrusion():
+        detector = LineIntrusionDetector(scene.line_starts, scene.line_ends)
+        return lambda frame: detector.detect_intrusion(frame[0], frame[1])
+
+    def zone_intrusion(use_lookup_mask):
+        def make_call():
+            detector = ZoneIntrusionDetector(scene.zones, use_lookup_mask=use_lookup_mask)
+            return lambda frame: detector.detect_intrusion(frame[0], frame_shape)
+        return make_call
+
+    def speed_estimation():
+        estimator = SpeedEstimator()
+        return lambda frame: estimator.estimate_speed(frame[0], frame[1])
+
+    def annotation_renderer():
+        renderer = AnnotationRenderer(scene.line_starts, scene.line_ends, scene.zones)
+        return lambda frame: renderer.render(canvas, frame[0])
+
+    benchmarks = {
+        "object_tracker.process_tracked_objects": (lambda: tracker.process_tracked_objects, detection_results),
+        "line_intrusion_detector.detect_intrusion": (line_intrusion, frames),
+        "zone_intrusion_detector.detect_intrusion": (zone_intrusion(False), frames),
+        "zone_intrusion_detector.detect_intrusion[lookup_mask]": (zone_intrusion(True), frames),
+        "speed_estimator.estimate_speed": (speed_estimation, frames),
+        "line_intrusion.display_annotated_frame": (
+            lambda: lambda frame: display_line_frame(canvas, frame[0], scene.line_starts, scene.line_ends), frames),
+        "zone_intrusion.display_annotated_frame": (
+            lambda: lambda frame: display_zone_frame(canvas, frame[0], scene.zones), frames),
+        "speed_estimator.display_annotated_frame": (
+            lambda: lambda frame: display_speed_frame(canvas, frame[0], scene.line_starts, scene.line_ends), frames),
+        "annotation_renderer.render": (annotation_renderer, frames),
+    }
+
+    results = {}
+    # Keep any console output of the hot paths in the measurement but off the terminal
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for name, (make_call, inputs) in benchmarks.items():
+            results[f"{name}[objects={number_of_objects}]"] = measure(make_call, inputs, number_of_objects)
+    return results
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """
+    Compares p50 latencies with a stored baseline.
+
+    :return: List of (name, baseline p50, current p50, ratio, regressed) for benchmarks present in both.
+    """
+    comparison = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        baseline_p50 = baseline[name]["p50_ms"]
+        ratio = result["p50_ms"] / max(baseline_p50, 1e-9)
+        comparison.append((name, baseline_p50, result["p50_ms"], ratio, ratio > 1.0 + tolerance))
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--objects", type=int, nargs="+", default=[10, 100], help="Tracked objects per frame (one run per value)")
+    parser.add_argument("--lines", type=int, default=8, help="Number of intrusion lines")
+    parser.add_argument("--zones", type=int, default=4, help="Number of intrusion zones")
+    parser.add_argument("--resolution", default="1920x1080", help="Frame resolution as WIDTHxHEIGHT")
+    parser.add_argument("--frames", type=int, default=300, help="Synthetic frames per benchmark")
+    parser.add_argument("--output", default=None, help="Write results JSON here instead of stdout")
+    parser.add_argument("--baseline", default=None, help="Baseline JSON to compare p50 latencies against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p50 slowdown before a regression is reported")
+    parser.add_argument("--save-baseline", default=None, help="Write these results as the new baseline")
+    arguments = parser.parse_args()
+
+    frame_width, frame_height = (int(value) for value in arguments.resolution.lower().split("x"))
+    results = {}
+    for number_of_objects in arguments.objects:
+        results.update(run_suite(number_of_objects, arguments.lines, arguments.zones, frame_width, frame_height, arguments.frames))
+
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "scale": {"objects": arguments.objects, "lines": arguments.lines, "zones": arguments.zones,
+                  "resolution": [frame_width, frame_height], "frames": arguments.frames},
+        "results": results,
+    }
+
+    regressions = []
+    if arguments.baseline:
+        with open(arguments.baseline) as baseline_file:
+            comparison = compare_to_baseline(results, json.load(baseline_file)["results"], arguments.tolerance)
+        report["baseline_comparison"] = [
+            {"name": name, "baseline_p50_ms": baseline_p50, "p50_ms": p50, "ratio": round(ratio, 3), "regressed": regressed}
+            for name, baseline_p50, p50, ratio, regressed in comparison
+        ]
+        regressions = [name for name, _, _, _, regressed in comparison if regressed]
+        for name, baseline_p50, p50, ratio, regressed in comparison:
+            print(f"{'REGRESSED' if regressed else 'ok':<9} {name:<70} {baseline_p50:9.4f} -> {p50:9.4f} ms ({ratio:.2f}x)", file=sys.stderr)
+
+    report_json = json.dumps(report, indent=2)
+    if arguments.output:
+        with open(arguments.output, "w") as output_file:
+            output_file.write(report_json + "\n")
+    else:
+        print(report_json)
+    if arguments.save_baseline:
+        with open(arguments.save_baseline, "w") as baseline_file:
+            baseline_file.write(report_json + "\n")
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Compares the scalar intersection_of_line loop against the vectorized LineCrossingEngine.
+
+Usage (from the repository root):
+    python -m benchmarks.line_crossing_benchmark --objects 100 --lines 24 --repeats 200
+"""
+import argparse
+import time
+
+import numpy as np
+
+from LineIntrusionDetector.line_crossing_engine import LineCrossingEngine
+from LineIntrusionDetector.line_intrusion_detector import LineIntrusionDetector
+
+
+def make_synthetic_scene(number_of_objects, number_of_lines, frame_width=1920, frame_height=1080, seed=0):
+    """
+    Returns random line endpoints plus previous/current centers with small per-frame motion.
+    """
+    random_generator = np.random.default_rng(seed)
+    line_starts = random_generator.integers(0, [frame_width, frame_height], size=(number_of_lines, 2))
+    line_ends = random_generator.integers(0, [frame_width, frame_height], size=(number_of_lines, 2))
+    previous_centers = random_generator.integers(0, [frame_width, frame_height], size=(number_of_objects, 2))
+    current_centers = previous_centers + random_generator.integers(-40, 41, size=(number_of_objects, 2))
+    return line_starts, line_ends, previous_centers, current_centers
+
+
+def scalar_crossings(detector, line_starts, line_ends, previous_centers, current_centers):
+    """
+    The original per-object, per-line any() loop.
+    """
+    line_pairs = list(zip(map(tuple, line_starts.tolist()), map(tuple, line_ends.tolist())))
+    return [
+        any(detector.intersection_of_line(previous_center, current_center, start, end) for start, end in line_pairs)
+        for previous_center, current_center in zip(map(tuple, previous_centers.tolist()), map(tuple, current_centers.tolist()))
+    ]
+
+
+def time_call(function, repeats):
+    durations = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - started)
+    return np.array(durations) * 1000.0  # milliseconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--objects", type=int, default=100, help="Tracked objects per frame")
+    parser.add_argument("--lines", type=int, default=24, help="Number of intrusion lines")
+    parser.add_argument("--repeats", type=int, default=200, help="Timed calls per implementation")
+    arguments = parser.parse_args()
+
+    line_starts, line_ends, previous_centers, current_centers = make_synthetic_scene(arguments.objects, arguments.lines)
+    detector = LineIntrusionDetector(line_starts.tolist(), line_ends.tolist())
+    engine = LineCrossingEngine(line_starts.tolist(), line_ends.tolist())
+
+    # Both implementations must agree before their timings mean anything
+    scalar_result = np.array(scalar_crossings(detector, line_starts, line_ends, previous_centers, current_centers))
+    vectorized_result = engine.detect(previous_centers, current_centers)[0].any(axis=1)
+    if not np.array_equal(scalar_result, vectorized_result):
+        raise AssertionError("Vectorized crossing results differ from the scalar implementation.")
+
+    scalar_ms = time_call(lambda: scalar_crossings(detector, line_starts, line_ends, previous_centers, current_centers), arguments.repeats)
+    vectorized_ms = time_call(lambda: engine.detect(previous_centers, current_centers), arguments.repeats)
+
+    print(f"{arguments.objects} objects x {arguments.lines} lines, {arguments.repeats} repeats")
+    for name, durations in (("scalar", scalar_ms), ("vectorized", vectorized_ms)):
+        print(f"  {name:<10} p50 {np.percentile(durations, 50):8.3f} ms   p95 {np.percentile(durations, 95):8.3f} ms")
+    print(f"  speedup    {np.median(scalar_ms) / np.median(vectorized_ms):.1f}x (median)")
+
+
+if __name__ == "__main__":
+    main()
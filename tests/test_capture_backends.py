@@ -0,0 +1,53 @@
+import cv2
+import pytest
+
+from utils import capture_backends
+from utils.capture_backends import open_gstreamer_capture
+
+
+class RecordingVideoCapture:
+    """
+    Stands in for cv2.VideoCapture and records every source it is opened with.
+    """
+    opened = None
+
+    def __init__(self, source, api_preference=None):
+        RecordingVideoCapture.opened.append(source)
+        self.source = source
+
+    def isOpened(self):
+        return True
+
+    def get(self, property_id):
+        return {cv2.CAP_PROP_FRAME_WIDTH: 640.0, cv2.CAP_PROP_FRAME_HEIGHT: 360.0}.get(property_id, 0.0)
+
+    def release(self):
+        pass
+
+
+@pytest.fixture
+def video_captures(monkeypatch):
+    RecordingVideoCapture.opened = []
+    monkeypatch.setattr(capture_backends.cv2, "VideoCapture", RecordingVideoCapture)
+    monkeypatch.setattr(capture_backends.shutil, "which", lambda program: f"/usr/bin/{program}")
+    return RecordingVideoCapture.opened
+
+
+def test_gstreamer_source_size_comes_from_ffprobe(video_captures, monkeypatch):
+    monkeypatch.setattr(capture_backends, "ffprobe_source", lambda source: ((1920, 1080), 25.0))
+    capture = open_gstreamer_capture("rtsp://camera/stream", output_size=(640, 360))
+    assert len(video_captures) == 1  # No second session just to learn the source size
+    assert "width=640,height=360" in video_captures[0]
+    assert capture.source_size == (1920, 1080) and capture.output_size is None
+
+
+@pytest.mark.parametrize("source", [0, "rtsp://camera/stream"])
+def test_gstreamer_scales_after_decoding_without_a_probed_size(video_captures, monkeypatch, source):
+    def unreadable(input_media_source):
+        raise ValueError("Error: ffprobe could not read it")
+
+    monkeypatch.setattr(capture_backends, "ffprobe_source", unreadable)
+    capture = open_gstreamer_capture(source, output_size=(320, 180))
+    assert len(video_captures) == 1
+    assert "width=" not in video_captures[0]
+    assert capture.output_size == (320, 180)
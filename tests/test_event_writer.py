@@ -0,0 +1,140 @@
+import csv
+import json
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from utils import event_writer
+from utils.event_writer import EventWriter
+from utils.events import LineCrossingEvent, ZoneEnterEvent
+
+EVENTS = [
+    LineCrossingEvent("cam", 1, "car", 10.0, 3, "gate", -1),
+    ZoneEnterEvent("cam", 2, "truck", 10.5, 4, "parking"),
+]
+
+
+class GatedBackend:
+    """
+    Records batches, but only opens once the test releases the gate, so events pile up in the queue first.
+    """
+    gate = None
+    batches = None
+
+    def __init__(self, output_path):
+        GatedBackend.gate.wait(timeout=5.0)
+
+    def write_batch(self, events):
+        GatedBackend.batches.append([event["track_id"] for event in events])
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def gated_backend(monkeypatch):
+    GatedBackend.gate = threading.Event()
+    GatedBackend.batches = []
+    monkeypatch.setitem(event_writer.EVENT_BACKENDS, "jsonl", GatedBackend)
+    return GatedBackend
+
+
+def test_jsonl_backend(tmp_path):
+    output_path = tmp_path / "events.jsonl"
+    writer = EventWriter(str(output_path))
+    writer.submit(EVENTS)
+    writer.close()
+
+    rows = [json.loads(line) for line in output_path.read_text().splitlines()]
+    assert rows == [event.to_dict() for event in EVENTS]
+    assert writer.written_events == 2
+
+
+def test_csv_backend_writes_header_once(tmp_path):
+    output_path = tmp_path / "events.csv"
+    for _ in range(2):
+        writer = EventWriter(str(output_path))
+        writer.submit(EVENTS)
+        writer.close()
+
+    with open(output_path, newline="") as csv_file:
+        rows = list(csv.DictReader(csv_file))
+    assert [row["event_type"] for row in rows] == ["line_crossing", "zone_enter"] * 2
+    assert rows[0]["line"] == "gate" and rows[0]["direction"] == "-1" and rows[0]["zone"] == ""
+
+
+def test_sqlite_backend(tmp_path):
+    output_path = tmp_path / "events.sqlite"
+    writer = EventWriter(str(output_path))
+    writer.submit(EVENTS + [{"event_type": "zone_exit", "source_id": 0, "track_id": 2, "dwell_seconds": 4.5}])
+    writer.close()
+
+    connection = sqlite3.connect(output_path)
+    rows = connection.execute("SELECT event_type, source_id, track_id, line, zone, dwell_seconds FROM events").fetchall()
+    connection.close()
+    assert rows == [("line_crossing", "cam", 1, "gate", None, None),
+                    ("zone_enter", "cam", 2, None, "parking", None),
+                    ("zone_exit", "0", 2, None, None, 4.5)]
+
+
+def test_events_are_written_in_batches(tmp_path, gated_backend):
+    writer = EventWriter(str(tmp_path / "events.jsonl"), batch_size=2)
+    writer.submit([{"track_id": track_id} for track_id in range(5)])
+    gated_backend.gate.set()
+    writer.close()  # Flushes the last, partial batch
+    assert gated_backend.batches == [[0, 1], [2, 3], [4]]
+    assert writer.written_events == 5
+
+
+def test_full_queue_drops_events(tmp_path, gated_backend):
+    writer = EventWriter(str(tmp_path / "events.jsonl"), queue_size=3)
+    writer.submit([{"track_id": track_id} for track_id in range(5)])
+    assert writer.dropped_events == 2
+    gated_backend.gate.set()
+    writer.close()
+    assert gated_backend.batches == [[0, 1, 2]]
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        EventWriter(str(tmp_path / "events.txt"))
+    with pytest.raises(ValueError):
+        EventWriter(str(tmp_path / "events.jsonl"), output_format="xml")
+
+
+class FailingBackend:
+    def __init__(self, output_path):
+        if output_path.endswith("unopenable.jsonl"):
+            raise OSError("disk full")
+
+    def write_batch(self, events):
+        raise OSError("disk full")
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize("file_name", ["unopenable.jsonl", "unwritable.jsonl"])
+def test_failed_writer_drops_events_and_closes(tmp_path, monkeypatch, file_name):
+    monkeypatch.setitem(event_writer.EVENT_BACKENDS, "jsonl", FailingBackend)
+    writer = EventWriter(str(tmp_path / file_name), queue_size=4)
+    writer.submit([{"track_id": 0}])
+    writer._thread.join(timeout=5.0)
+    assert writer.failed
+
+    dropped_before = writer.dropped_events
+    writer.submit([{"track_id": track_id} for track_id in range(10)])
+    assert writer.dropped_events - dropped_before == 10
+    writer.close(timeout=1.0)
+    assert not writer._thread.is_alive()
+
+
+def test_close_gives_up_on_a_stuck_writer(tmp_path, gated_backend):
+    writer = EventWriter(str(tmp_path / "events.jsonl"), queue_size=2)
+    writer.submit([{"track_id": track_id} for track_id in range(2)])
+    started = time.monotonic()
+    writer.close(timeout=0.3)  # The writer thread is still blocked opening its backend
+    assert time.monotonic() - started < 2.0
+    gated_backend.gate.set()
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from LineIntrusionDetector.line_crossing_engine import LineCrossingEngine, compute_crossing_matrix
+from LineIntrusionDetector.line_intrusion_detector import LineIntrusionDetector
+from utils.frame_detections import FrameDetections
+
+
+def scalar_crossing(detector, previous_center, current_center, start, end):
+    """
+    The per-object logic the engine replaced, with the direction taken from the sign of the cross product.
+    """
+    crossed = detector.intersection_of_line(previous_center, current_center, start, end)
+    if not crossed:
+        return False, 0
+    side = (end[0] - start[0]) * (current_center[1] - start[1]) - (end[1] - start[1]) * (current_center[0] - start[0])
+    return True, 1 if side > 0 else -1
+
+
+def test_matches_scalar_logic_on_random_movements():
+    rng = np.random.default_rng(0)
+    previous_centers = rng.integers(0, 200, (300, 2))
+    current_centers = previous_centers + rng.integers(-40, 41, (300, 2))
+    line_starts = rng.integers(0, 200, (7, 2))
+    line_ends = rng.integers(0, 200, (7, 2))
+    detector = LineIntrusionDetector()
+
+    crossed, direction = compute_crossing_matrix(previous_centers, current_centers, line_starts, line_ends)
+
+    assert crossed.any()
+    for object_index in range(len(previous_centers)):
+        for line_index in range(len(line_starts)):
+            expected = scalar_crossing(detector, tuple(previous_centers[object_index]), tuple(current_centers[object_index]),
+                                       tuple(line_starts[line_index]), tuple(line_ends[line_index]))
+            assert (crossed[object_index, line_index], direction[object_index, line_index]) == expected
+
+
+@pytest.mark.parametrize("previous_center, current_center, expected_direction", [
+    ((5, -5), (5, 5), 1),  # Moving down the screen across a left -> right line
+    ((5, 5), (5, -5), -1),
+])
+def test_direction_follows_line_orientation(previous_center, current_center, expected_direction):
+    crossed, direction = compute_crossing_matrix([previous_center], [current_center], [(0, 0)], [(10, 0)])
+    assert crossed[0, 0]
+    assert direction[0, 0] == expected_direction
+
+    crossed, direction = compute_crossing_matrix([previous_center], [current_center], [(10, 0)], [(0, 0)])
+    assert direction[0, 0] == -expected_direction
+
+
+def test_no_crossing_when_movement_misses_or_stays_on_one_side():
+    crossed, direction = compute_crossing_matrix([(20, -5), (2, 1)], [(20, 5), (8, 3)], [(0, 0)], [(10, 0)])
+    assert not crossed.any()
+    assert not direction.any()
+
+
+def test_empty_inputs_return_empty_matrices():
+    engine = LineCrossingEngine([(0, 0)], [(10, 0)])
+    crossed, direction = engine.detect(np.zeros((0, 2)), np.zeros((0, 2)))
+    assert crossed.shape == direction.shape == (0, 1)
+
+    crossed, direction = LineCrossingEngine([], []).detect([(0, 0)], [(1, 1)])
+    assert crossed.shape == (1, 0)
+
+
+def test_lines_can_be_given_as_arrays():
+    engine = LineCrossingEngine(np.array([[0, 0], [0, 5]]), np.array([[10, 0], [10, 5]]))
+    assert engine.line_names == ["line_0", "line_1"]
+    crossed, _ = engine.detect(np.array([[5, -1]]), np.array([[5, 1]]))
+    assert crossed.tolist() == [[True, False]]
+    assert len(LineCrossingEngine(None, None)) == 0
+
+
+def test_line_names_must_match_lines():
+    with pytest.raises(ValueError):
+        LineCrossingEngine([(0, 0), (0, 5)], [(10, 0), (10, 5)], ["only_one"])
+    with pytest.raises(ValueError):
+        LineCrossingEngine([(0, 0), (0, 5)], [(10, 0)])
+
+
+def test_detector_reports_named_crossings_with_direction():
+    detector = LineIntrusionDetector([(0, 50)], [(100, 50)], ["gate"])
+    labels = {0: "car"}
+
+    first = FrameDetections([[40, 30, 60, 40], [0, 0, 10, 10]], [0, 0], [1, 2], [0.9, 0.9], labels)
+    detector.detect_intrusion(first, timestamp=0.0)
+    assert not first.intrusion_detected.any()  # No previous position yet
+
+    second = FrameDetections([[40, 60, 60, 70], [0, 0, 10, 12]], [0, 0], [1, 2], [0.9, 0.9], labels)
+    detector.detect_intrusion(second, timestamp=0.1)
+    assert second.intrusion_detected.tolist() == [True, False]
+    assert second.crossed_lines == {0: [("gate", 1)]}
@@ -0,0 +1,64 @@
+import logging
+
+import pytest
+
+from utils import logging_setup
+from utils.logging_setup import RateLimitFilter, configure_logging, shutdown_logging
+
+
+def make_record(message, line=10, level=logging.INFO, name="test"):
+    return logging.LogRecord(name, level, "/src/module.py", line, message, None, None)
+
+
+def test_formatted_messages_from_one_call_site_share_a_bucket():
+    rate_limit = RateLimitFilter(max_per_second=0.001, burst=3)
+    passed = [rate_limit.filter(make_record(f"frame {index} done")) for index in range(10)]
+    assert passed == [True] * 3 + [False] * 7
+    assert len(rate_limit._buckets) == 1
+
+
+def test_call_sites_are_limited_independently():
+    rate_limit = RateLimitFilter(max_per_second=0.001, burst=1)
+    assert rate_limit.filter(make_record("same text", line=10))
+    assert rate_limit.filter(make_record("same text", line=20))
+    assert not rate_limit.filter(make_record("same text", line=10))
+
+
+def test_errors_always_pass_and_suppressed_count_is_reported():
+    rate_limit = RateLimitFilter(max_per_second=0.001, burst=1)
+    assert rate_limit.filter(make_record("tick"))
+    assert not rate_limit.filter(make_record("tick"))
+    assert rate_limit.filter(make_record("boom", level=logging.ERROR))
+
+    rate_limit._buckets[("test", "/src/module.py", 10)][0] = 1.0  # Refilled
+    record = make_record("tick")
+    assert rate_limit.filter(record)
+    assert "1 similar messages suppressed" in record.getMessage()
+
+
+@pytest.fixture
+def restore_root_logger():
+    root_logger = logging.getLogger()
+    handlers, level = list(root_logger.handlers), root_logger.level
+    yield
+    shutdown_logging()
+    root_logger.handlers[:] = handlers
+    root_logger.setLevel(level)
+
+
+def test_reconfiguring_closes_the_previous_handlers(tmp_path, restore_root_logger):
+    first_queue_handler = configure_logging(log_file=str(tmp_path / "first.log"), max_per_second=None)
+    first_listener = logging_setup._listener
+    first_file_handler = first_listener.handlers[1]
+    logging.getLogger("test").warning("to the first file")
+
+    configure_logging(log_file=str(tmp_path / "second.log"), max_per_second=None)
+    assert first_listener._thread is None  # Stopped
+    assert first_file_handler.stream is None  # Closed
+    assert first_queue_handler not in logging.getLogger().handlers
+    assert "to the first file" in (tmp_path / "first.log").read_text()
+
+    logging.getLogger("test").warning("to the second file")
+    shutdown_logging()
+    assert "to the second file" in (tmp_path / "second.log").read_text()
+    assert "to the second file" not in (tmp_path / "first.log").read_text()
@@ -0,0 +1,120 @@
+import cv2
+import numpy as np
+import pytest
+
+from utils import offline_batch
+from utils.offline_batch import match_overlap_tracks, merge_chunk_results, plan_chunks
+
+
+def frame_boxes(*tracks):
+    """
+    Builds one frame of (track_ids, boxes) from (track_id, x1, y1, x2, y2) tuples.
+    """
+    return (np.array([track[0] for track in tracks], dtype=np.int64),
+            np.array([track[1:] for track in tracks], dtype=np.float32).reshape(-1, 4))
+
+
+def chunk_result(video, chunk_index, events=(), speed_samples=None, head_boxes=None, tail_boxes=None):
+    return {"video": video, "chunk_index": chunk_index, "events": list(events), "speed_samples": speed_samples or {},
+            "head_boxes": head_boxes or {}, "tail_boxes": tail_boxes or {}, "processed_frames": 0, "seconds": 0.0}
+
+
+def test_overlap_tracks_are_matched_by_iou():
+    previous_tail = {frame: frame_boxes((5, 0, 0, 10, 10), (6, 100, 100, 120, 120)) for frame in (10, 11, 12)}
+    # The next chunk lists its tracks in another order, with slightly shifted boxes and one track of its own
+    next_head = {frame: frame_boxes((2, 101, 101, 121, 121), (1, 1, 0, 11, 10), (3, 300, 300, 310, 310))
+                 for frame in (10, 11, 12)}
+    assert match_overlap_tracks(previous_tail, next_head) == {1: 5, 2: 6}
+
+
+def test_overlap_tracks_need_most_shared_frames_above_the_threshold():
+    previous_tail = {frame: frame_boxes((5, 0, 0, 10, 10)) for frame in (10, 11, 12)}
+    next_head = {
+        10: frame_boxes((1, 0, 0, 10, 10)),
+        11: frame_boxes((1, 6, 0, 16, 10)),  # IoU 0.25
+        12: frame_boxes((1, 8, 0, 18, 10)),
+        13: frame_boxes((1, 0, 0, 10, 10)),  # Not shared with the previous chunk
+    }
+    assert match_overlap_tracks(previous_tail, next_head) == {}
+    assert match_overlap_tracks(previous_tail, next_head, iou_threshold=0.1) == {1: 5}
+
+
+def test_merge_stitches_track_ids_across_chunks():
+    overlap = {frame: frame_boxes((7, 0, 0, 10, 10)) for frame in (98, 99)}
+    first = chunk_result("cams/clip.mp4", 0, tail_boxes=overlap, events=[
+        {"event_type": "zone_enter", "source_id": "cams/clip.mp4", "track_id": 7, "frame_index": 40},
+    ], speed_samples={7: ["car", 2, 60.0, 35.0, 40]})
+    second = chunk_result("cams/clip.mp4", 1, head_boxes={frame: frame_boxes((1, 0, 0, 10, 10), (2, 50, 50, 60, 60))
+                                                          for frame in (98, 99)}, events=[
+        {"event_type": "zone_exit", "source_id": "cams/clip.mp4", "track_id": 1, "frame_index": 120},
+        {"event_type": "zone_enter", "source_id": "cams/clip.mp4", "track_id": 2, "frame_index": 130},
+    ], speed_samples={1: ["car", 1, 40.0, 40.0, 100]})
+
+    events = merge_chunk_results([second, first])
+    assert [(event["event_type"], event["track_id"]) for event in events] == [
+        ("zone_enter", "clip:0:7"),
+        ("speed_summary", "clip:0:7"),
+        ("zone_exit", "clip:0:7"),
+        ("zone_enter", "clip:1:2"),
+    ]
+    # Samples of the stitched track from both chunks roll up into a single summary
+    speed_summary = events[1]
+    assert speed_summary["samples"] == 3 and speed_summary["mean_speed_kph"] == 33.33
+    assert speed_summary["max_speed_kph"] == 40.0 and speed_summary["frame_index"] == 40
+
+
+def test_merge_does_not_stitch_across_videos():
+    overlap = {frame: frame_boxes((7, 0, 0, 10, 10)) for frame in (98, 99)}
+    events = merge_chunk_results([
+        chunk_result("b.mp4", 0, head_boxes=overlap, events=[{"source_id": "b.mp4", "track_id": 7, "frame_index": 5}]),
+        chunk_result("a.mp4", 0, tail_boxes=overlap, events=[{"source_id": "a.mp4", "track_id": 7, "frame_index": 9},
+                                                             {"source_id": "a.mp4", "track_id": 7, "frame_index": 3}]),
+    ])
+    assert [(event["source_id"], event["frame_index"], event["track_id"]) for event in events] == [
+        ("a.mp4", 3, "a:0:7"), ("a.mp4", 9, "a:0:7"), ("b.mp4", 5, "b:0:7"),
+    ]
+
+
+def write_video(path, frame_count, frames_per_second=10):
+    video_writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), frames_per_second, (32, 24))
+    for _ in range(frame_count):
+        video_writer.write(np.zeros((24, 32, 3), dtype=np.uint8))
+    video_writer.release()
+    return str(path)
+
+
+def test_plan_chunks_overlaps_consecutive_chunks(tmp_path):
+    video_path = write_video(tmp_path / "clip.avi", 25)
+    chunks = plan_chunks([video_path], chunk_seconds=1, overlap_seconds=0.5)
+    assert [(chunk.warmup_start_frame, chunk.start_frame, chunk.end_frame) for chunk in chunks] == [
+        (0, 0, 10), (5, 10, 20), (15, 20, 25),
+    ]
+    assert [chunk.chunk_index for chunk in chunks] == [0, 1, 2]
+    assert all(chunk.overlap_frames == 5 and chunk.frames_per_second == 10 for chunk in chunks)
+
+
+class UnknownLengthCapture:
+    def __init__(self, video_path):
+        pass
+
+    def isOpened(self):
+        return True
+
+    def get(self, property_id):
+        return 25.0 if property_id == cv2.CAP_PROP_FPS else 0.0
+
+    def release(self):
+        pass
+
+
+def test_plan_chunks_falls_back_to_one_chunk_without_frame_count(monkeypatch, caplog):
+    monkeypatch.setattr(offline_batch.cv2, "VideoCapture", UnknownLengthCapture)
+    chunks = plan_chunks(["stream.ts"], chunk_seconds=1, overlap_seconds=1)
+    assert len(chunks) == 1
+    assert chunks[0].start_frame == 0 and chunks[0].end_frame > 10 ** 9
+    assert "frame count" in caplog.text
+
+
+def test_plan_chunks_rejects_unreadable_videos(tmp_path):
+    with pytest.raises(ValueError):
+        plan_chunks([str(tmp_path / "missing.mp4")])
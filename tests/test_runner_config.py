@@ -0,0 +1,42 @@
+import pytest
+
+from TrafficAnalysisRunner.runner_config import DEFAULT_SPEED_CONFIG, normalize_runner_config
+
+
+def test_empty_speed_section_enables_speed_with_defaults():
+    config = normalize_runner_config({"sources": [{"input": "clip.mp4", "speed": {}}]})
+    assert config["sources"][0]["speed"] == DEFAULT_SPEED_CONFIG
+
+
+def test_speed_section_overrides_defaults():
+    config = normalize_runner_config({"sources": [{"input": "clip.mp4", "speed": {"threshold_kph": 50}}]})
+    assert config["sources"][0]["speed"]["threshold_kph"] == 50
+    assert config["sources"][0]["speed"]["pixels_per_meter"] == DEFAULT_SPEED_CONFIG["pixels_per_meter"]
+
+
+def test_unknown_speed_keys_are_rejected():
+    with pytest.raises(ValueError, match=r"sources\[0\]\.speed"):
+        normalize_runner_config({"sources": [{"input": "clip.mp4", "speed": {"pixel_per_meter": 12}}]})
+
+
+def test_source_without_analytics_is_rejected():
+    with pytest.raises(ValueError, match="no analytics"):
+        normalize_runner_config({"sources": [{"input": "clip.mp4"}]})
+
+
+def test_multiprocess_capture_rejects_inference_resolution():
+    with pytest.raises(ValueError, match="multiprocess_capture"):
+        normalize_runner_config({
+            "pipeline": {"multiprocess_capture": True},
+            "stream": {"inference_resolution": [640, 360]},
+            "sources": [{"input": "clip.mp4", "lines": [{"start": [0, 0], "end": [10, 10]}]}],
+        })
+
+
+@pytest.mark.parametrize("option", ["pipelined", "multiprocess_capture", "adaptive_stride"])
+def test_single_source_pipeline_options_reject_several_sources(option):
+    sources = [{"input": input_media_source, "lines": [{"start": [0, 0], "end": [10, 10]}]}
+               for input_media_source in ("a.mp4", "b.mp4")]
+    with pytest.raises(ValueError, match=f"pipeline.{option}"):
+        normalize_runner_config({"pipeline": {option: True}, "sources": sources})
+    assert len(normalize_runner_config({"pipeline": {option: True}, "sources": sources[:1]})["sources"]) == 1
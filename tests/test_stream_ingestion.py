@@ -0,0 +1,147 @@
+import threading
+
+import numpy as np
+import pytest
+
+from utils import stream_ingestion
+from utils.stream_ingestion import ResilientStream, reopen_with_backoff
+
+CORRUPT = "corrupt"
+
+
+class FakeCapture:
+    """
+    Scripted capture: every grab takes the next entry of frames. A number decodes to a frame filled with it,
+    CORRUPT grabs but fails to decode, and None is a failed grab (dropped source). Grabs fail once the script
+    is exhausted.
+    """
+    def __init__(self, frames=(), opened=True, start_event=None):
+        self.frames = list(frames)
+        self.opened = opened
+        self.start_event = start_event  # Hold the first grab until set
+        self.current = None
+        self.released = False
+
+    def isOpened(self):
+        return self.opened and not self.released
+
+    def grab(self):
+        if self.start_event is not None:
+            self.start_event.wait(timeout=5.0)
+            self.start_event = None
+        if not self.frames:
+            return False
+        self.current = self.frames.pop(0)
+        return self.current is not None
+
+    def retrieve(self, frame=None):
+        if self.current is None or self.current == CORRUPT:
+            return False, None
+        return True, np.full((2, 2, 3), self.current, dtype=np.uint8)
+
+    def read(self, frame=None):
+        if not self.grab():
+            return False, None
+        return self.retrieve(frame)
+
+    def get(self, property_id):
+        return 0.0
+
+    def release(self):
+        self.released = True
+
+
+@pytest.fixture
+def captures(monkeypatch):
+    """
+    Makes ResilientStream open the FakeCaptures appended to the returned list, one per (re)open.
+    """
+    scripted_captures = []
+    opened_captures = iter(scripted_captures)
+    monkeypatch.setattr(stream_ingestion, "open_capture", lambda *args, **kwargs: next(opened_captures))
+    return scripted_captures
+
+
+def read_all(stream):
+    values = []
+    while (captured := stream.read()) is not None:
+        values.append(int(captured[0][0, 0, 0]))
+    stream.release()
+    return values
+
+
+@pytest.mark.parametrize("latest_frame_only", [False, True])
+def test_failed_grab_reconnects(captures, latest_frame_only):
+    captures += [FakeCapture([1, None]), FakeCapture([2]), FakeCapture(opened=False)]
+    stream = ResilientStream("clip.mp4", reconnect=True, latest_frame_only=latest_frame_only,
+                             initial_backoff_seconds=0.0, max_reconnect_attempts=1)
+    values = read_all(stream)
+    assert values[-1] == 2 and set(values) <= {1, 2}
+    assert stream.reconnects == 1
+    assert stream.ended
+    assert captures[0].released and captures[1].released
+
+
+def test_without_reconnect_a_failed_read_ends_the_stream(captures):
+    captures += [FakeCapture([1, 2, None, 3])]
+    assert read_all(ResilientStream("clip.mp4", reconnect=False, latest_frame_only=False)) == [1, 2]
+
+
+def test_latest_frame_only_skips_stale_frames(captures):
+    captures += [FakeCapture([1, 2, 3, 4, 5])]
+    stream = ResilientStream("clip.mp4", reconnect=False, latest_frame_only=True)
+    stream._grab_thread.join(timeout=5.0)  # Nobody read while the source delivered all five frames
+    assert read_all(stream) == [5]
+    assert stream.stale_frames_skipped == 4
+
+
+def test_poll_returns_none_until_a_new_frame_arrives(captures):
+    start_event = threading.Event()
+    captures += [FakeCapture([7], start_event=start_event)]
+    stream = ResilientStream("clip.mp4", reconnect=False, latest_frame_only=True)
+    assert stream.poll() is None and not stream.ended
+    start_event.set()
+    stream._grab_thread.join(timeout=5.0)
+    assert int(stream.poll()[0][0, 0, 0]) == 7
+    assert stream.poll() is None and stream.ended
+    stream.release()
+
+
+def test_corrupt_retrieves_are_retried_without_recursion(captures):
+    start_event = threading.Event()
+    captures += [FakeCapture([CORRUPT] * 5000 + [9], start_event=start_event)]
+    stream = ResilientStream("clip.mp4", reconnect=False, latest_frame_only=True)
+    threading.Timer(0.1, start_event.set).start()  # Let the reader wait first, so corrupt frames reach it one by one
+    assert read_all(stream) == [9]
+    assert stream.corrupt_frames > 0
+
+
+def test_poll_gives_up_on_corrupt_frames_within_its_timeout(captures):
+    captures += [FakeCapture([CORRUPT])]
+    stream = ResilientStream("clip.mp4", reconnect=False, latest_frame_only=True)
+    stream._grab_thread.join(timeout=5.0)
+    assert stream.poll(timeout=0.1) is None
+    assert stream.corrupt_frames == 1
+    stream.release()
+
+
+def test_reopen_with_backoff_retries_until_opened():
+    attempts = [FakeCapture(opened=False), FakeCapture(opened=False), FakeCapture()]
+    opened = iter(attempts)
+    video_capture = reopen_with_backoff(lambda: next(opened), "rtsp://camera", threading.Event(), initial_backoff_seconds=0.0)
+    assert video_capture is attempts[2]
+    assert attempts[0].released and attempts[1].released
+
+
+def test_reopen_with_backoff_gives_up_after_max_attempts():
+    attempts = [FakeCapture(opened=False) for _ in range(3)]
+    opened = iter(attempts)
+    assert reopen_with_backoff(lambda: next(opened), "rtsp://camera", threading.Event(), initial_backoff_seconds=0.0,
+                               max_reconnect_attempts=2) is None
+    assert not attempts[2].released  # Never opened
+
+
+def test_reopen_with_backoff_stops_when_stop_event_is_set():
+    stop_event = threading.Event()
+    stop_event.set()
+    assert reopen_with_backoff(lambda: FakeCapture(), "rtsp://camera", stop_event) is None
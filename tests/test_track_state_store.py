@@ -0,0 +1,70 @@
+import numpy as np
+
+from utils.track_state_store import TrackStateStore
+
+
+def test_observe_returns_previous_centers():
+    store = TrackStateStore(max_tracks=8)
+    previous_centers, previous_timestamps = store.observe([1, 2], [(0, 0), (5, 5)], timestamp=0.0)
+    assert previous_centers.tolist() == [[0, 0], [5, 5]]  # New tracks get their current center
+    assert previous_timestamps.tolist() == [0.0, 0.0]
+
+    previous_centers, previous_timestamps = store.observe([2, 1], [(6, 6), (1, 1)], timestamp=0.5)
+    assert previous_centers.tolist() == [[5, 5], [0, 0]]
+    assert previous_timestamps.tolist() == [0.0, 0.0]
+
+
+def test_tracks_expire_after_ttl():
+    store = TrackStateStore(max_tracks=8, ttl_seconds=10.0)
+    store.observe([1, 2], [(0, 0), (0, 0)], timestamp=0.0)
+    store.observe([2], [(1, 1)], timestamp=8.0)
+    store.observe([3], [(2, 2)], timestamp=10.5)
+    assert sorted(store.slot_by_track_id) == [2, 3]
+    assert store.evicted_tracks == 1
+
+    previous_centers, _ = store.observe([1], [(9, 9)], timestamp=11.0)
+    assert previous_centers.tolist() == [[9, 9]]  # Forgotten, so treated as new
+
+
+def test_capacity_evicts_least_recently_seen():
+    store = TrackStateStore(max_tracks=3, ttl_seconds=None)
+    store.observe([1], [(0, 0)], timestamp=0.0)
+    store.observe([2], [(0, 0)], timestamp=1.0)
+    store.observe([3], [(0, 0)], timestamp=2.0)
+    store.observe([1], [(0, 0)], timestamp=3.0)
+    store.observe([4], [(0, 0)], timestamp=4.0)
+    assert sorted(store.slot_by_track_id) == [1, 3, 4]
+    assert store.stats() == {"live_tracks": 3, "evicted_tracks": 1, "peak_tracks": 3, "max_tracks": 3}
+
+
+def test_capacity_eviction_spares_tracks_later_in_the_same_frame():
+    store = TrackStateStore(max_tracks=3, ttl_seconds=None)
+    store.observe([1], [(10, 10)], timestamp=0.0)  # Least recently seen, but present in the next frame
+    store.observe([2, 3], [(20, 20), (30, 30)], timestamp=1.0)
+
+    previous_centers, _ = store.observe([4, 1], [(40, 40), (11, 11)], timestamp=2.0)
+
+    assert previous_centers.tolist() == [[40, 40], [10, 10]]  # Track 1 kept its history
+    assert sorted(store.slot_by_track_id) == [1, 3, 4]
+
+
+def test_history_ring_is_oldest_first():
+    store = TrackStateStore(max_tracks=4, history_length=3)
+    for step in range(5):
+        slots = store.record([7], [(step, step)], timestamp=float(step))
+    store.record([8], [(100, 100)], timestamp=5.0)
+
+    points, timestamps, valid = store.history(np.array([slots[0], store.slot_by_track_id[8]]))
+    assert points[0, :, 0].tolist() == [2, 3, 4]
+    assert timestamps[0].tolist() == [2.0, 3.0, 4.0]
+    assert valid.tolist() == [[True, True, True], [True, False, False]]
+    assert points[1, 0].tolist() == [100, 100]
+
+
+def test_reused_slot_starts_with_empty_history():
+    store = TrackStateStore(max_tracks=1, ttl_seconds=None, history_length=2)
+    store.record([1], [(1, 1)], timestamp=0.0)
+    store.record([1], [(2, 2)], timestamp=1.0)
+    slots = store.record([2], [(5, 5)], timestamp=2.0)
+    _, _, valid = store.history(slots)
+    assert valid.tolist() == [[True, False]]
@@ -0,0 +1,64 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from utils.events import ZoneEnterEvent
+from utils.traffic_counters import TrafficCounters, parse_start_time
+
+
+def test_increments_roll_up_into_every_resolution():
+    counters = TrafficCounters(resolutions={60: 10, 300: 10})
+    counters.increment("line", "gate", 1, "car", timestamp=30.0)
+    counters.increment("line", "gate", 1, "car", timestamp=90.0)
+    counters.increment("line", "gate", -1, "truck", timestamp=150.0)
+
+    minute_rows = counters.counts(60)
+    assert [(row["bucket_start"], row["direction"], row["count"]) for row in minute_rows] == [(0, 1, 1), (60, 1, 1), (120, -1, 1)]
+    assert counters.totals(300) == {("line", "gate", 1, "car"): 2, ("line", "gate", -1, "truck"): 1}
+
+
+def test_counts_filter_by_range_and_name():
+    counters = TrafficCounters(resolutions={60: 10})
+    counters.increment("line", "gate", 1, "car", timestamp=10.0)
+    counters.increment("zone", "parking", "enter", "car", timestamp=70.0)
+    counters.increment("zone", "parking", "enter", "car", timestamp=130.0)
+
+    assert [row["bucket_start"] for row in counters.counts(60, start=60, end=120)] == [60]
+    assert [row["name"] for row in counters.counts(60, kind="zone", name="parking")] == ["parking", "parking"]
+    with pytest.raises(ValueError):
+        counters.counts(30)
+
+
+def test_bucket_rollover_prunes_old_buckets():
+    counters = TrafficCounters(resolutions={60: 3})
+    for minute in range(5):
+        counters.increment("line", "gate", 1, "car", timestamp=minute * 60.0)
+    assert sorted(counters.buckets[60]) == [120, 180, 240]
+    assert counters.totals(60) == {("line", "gate", 1, "car"): 3}
+
+
+def test_snapshot_round_trip(tmp_path):
+    snapshot_path = str(tmp_path / "counts.json")
+    counters = TrafficCounters(resolutions={60: 10}, snapshot_path=snapshot_path, snapshot_interval_seconds=3600)
+    counters.increment("line", "gate", -1, "bus", timestamp=60.0, amount=4)
+    counters.close()
+
+    restored = TrafficCounters(resolutions={60: 10}, snapshot_path=snapshot_path, snapshot_interval_seconds=3600)
+    assert restored.totals(60) == {("line", "gate", -1, "bus"): 4}
+    restored.close()
+
+
+def test_media_timestamps_are_offset_by_start_time():
+    counters = TrafficCounters(resolutions={60: 10}, media_start_time=6000.0)
+    counters.record_events([ZoneEnterEvent("clip.mp4", 1, "car", 75.0, 0, "parking")], media_time=True)
+    counters.record_events([ZoneEnterEvent("cam", 2, "car", 6130.0, 1, "parking")])
+    assert [row["bucket_start"] for row in counters.counts(60)] == [6060, 6120]
+
+
+def test_parse_start_time():
+    assert parse_start_time(None) is None
+    assert parse_start_time(12.5) == 12.5
+    assert parse_start_time("1970-01-01T00:01:00+00:00") == 60.0
+    assert parse_start_time("2024-05-01T08:00:00+00:00") == datetime(2024, 5, 1, 8, tzinfo=timezone.utc).timestamp()
+    with pytest.raises(ValueError):
+        parse_start_time("yesterday")
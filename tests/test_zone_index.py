@@ -0,0 +1,54 @@
+import cv2
+import numpy as np
+import pytest
+
+from ZoneIntrusionDetector.zone_index import ZoneIndex, normalize_zones
+
+SQUARE = [(10, 10), (30, 10), (30, 30), (10, 30)]
+CONCAVE = [(0, 0), (40, 0), (40, 40), (20, 15), (0, 40)]  # Notch cut into the bottom edge
+TRIANGLE = [(5, 5), (35, 12), (12, 37)]  # Slanted edges through integer points
+
+
+def grid_points(size=45):
+    grid_x, grid_y = np.meshgrid(np.arange(-2, size), np.arange(-2, size))
+    return np.stack([grid_x.ravel(), grid_y.ravel()], axis=1)
+
+
+@pytest.mark.parametrize("polygon", [SQUARE, CONCAVE, TRIANGLE])
+def test_matches_point_polygon_test_including_edges_and_vertices(polygon):
+    points = grid_points()
+    contour = np.array(polygon, np.float32).reshape(-1, 1, 2)
+    expected = [cv2.pointPolygonTest(contour, (float(x), float(y)), False) >= 0 for x, y in points]
+
+    inside = ZoneIndex({"zone": polygon}).contains(points)
+
+    assert inside[:, 0].tolist() == expected
+
+
+def test_vertices_and_edge_points_count_as_inside():
+    index = ZoneIndex(SQUARE)
+    assert index.contains(SQUARE).all()
+    assert index.contains([(20, 10), (30, 20), (20, 30), (10, 20)]).all()
+    assert not index.contains([(9, 10), (31, 20), (20, 31)]).any()
+
+
+def test_several_zones_and_overlap():
+    index = ZoneIndex({"left": [(0, 0), (20, 0), (20, 20), (0, 20)], "right": [(10, 0), (30, 0), (30, 20), (10, 20)]})
+    inside = index.contains([(5, 5), (15, 5), (25, 5), (50, 5)])
+    assert inside.tolist() == [[True, False], [True, True], [False, True], [False, False]]
+    occupancy = index.occupancy([(5, 5), (15, 5)])
+    assert occupancy["left"].tolist() == [0, 1]
+    assert occupancy["right"].tolist() == [1]
+
+
+def test_degenerate_zones_are_ignored():
+    index = ZoneIndex({"line": [(0, 0), (10, 10)], "square": SQUARE})
+    assert index.zone_names == ["square"]
+    assert ZoneIndex(None).contains([(1, 1)]).shape == (1, 0)
+    assert ZoneIndex(SQUARE).contains(np.zeros((0, 2))).shape == (0, 1)
+
+
+def test_normalize_zones():
+    assert normalize_zones(None) == {}
+    assert normalize_zones(SQUARE) == {"zone": SQUARE}
+    assert normalize_zones({"a": SQUARE}) == {"a": SQUARE}
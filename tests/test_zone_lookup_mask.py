@@ -0,0 +1,51 @@
+import numpy as np
+
+from ZoneIntrusionDetector.zone_index import ZoneIndex
+from ZoneIntrusionDetector.zone_intrusion_detector import ZoneIntrusionDetector
+from ZoneIntrusionDetector.zone_lookup_mask import ZoneLookupMask
+from utils.frame_detections import FrameDetections
+
+FRAME_SHAPE = (120, 160, 3)
+BOTTOM_ZONE = [(0, 80), (160, 80), (160, 120), (0, 120)]  # Reaches the bottom and right frame edges
+
+
+def test_interior_points_agree_with_polygon_geometry():
+    zones = {"a": [(10, 10), (70, 15), (60, 70), (15, 60)], "b": [(90, 20), (150, 20), (120, 100)]}
+    mask = ZoneLookupMask()
+    mask.ensure(FRAME_SHAPE, zones)
+    index = ZoneIndex(zones)
+    points = np.array([(40, 40), (120, 40), (5, 5), (100, 110), (65, 20)])
+    assert mask.contains(points).tolist() == index.contains(points).tolist()
+
+
+def test_points_on_the_far_frame_edges_are_looked_up():
+    mask = ZoneLookupMask()
+    mask.ensure(FRAME_SHAPE, {"bottom": BOTTOM_ZONE})
+    inside = mask.contains([(80, 120), (160, 100), (160, 120), (80, 121), (161, 100), (-1, 100)])
+    assert inside[:, 0].tolist() == [True, True, True, False, False, False]
+
+
+def test_foot_anchor_of_object_touching_bottom_edge():
+    labels = {0: "person"}
+    for use_lookup_mask in (False, True):
+        detector = ZoneIntrusionDetector({"bottom": BOTTOM_ZONE}, use_lookup_mask=use_lookup_mask, anchor_point="foot")
+        detections = FrameDetections([[40, 90, 60, 120], [40, 10, 60, 40]], [0, 0], [1, 2], [0.9, 0.9], labels)
+        detector.detect_intrusion(detections, FRAME_SHAPE)
+        assert detections.intrusion_detected.tolist() == [True, False]
+
+
+def test_overlapping_zones_use_bitmask():
+    zones = {"left": [(0, 0), (100, 0), (100, 100), (0, 100)], "right": [(50, 0), (150, 0), (150, 100), (50, 100)]}
+    mask = ZoneLookupMask()
+    mask.ensure(FRAME_SHAPE, zones)
+    assert mask.uses_bitmask
+    assert mask.contains([(25, 50), (75, 50), (125, 50)]).tolist() == [[True, False], [True, True], [False, True]]
+
+
+def test_rebuilds_only_on_change():
+    mask = ZoneLookupMask()
+    mask.ensure(FRAME_SHAPE, {"bottom": BOTTOM_ZONE})
+    mask.ensure(FRAME_SHAPE, {"bottom": BOTTOM_ZONE})
+    assert mask.rebuild_count == 1
+    mask.ensure((240, 320, 3), {"bottom": BOTTOM_ZONE})
+    assert mask.rebuild_count == 2
@@ -0,0 +1,135 @@
+import math
+
+import cv2
+import numpy as np
+
+
+class ConstantVelocityPredictor:
+    def __init__(self, velocity_smoothing=0.5):
+        """
+        Carries tracks forward between detections by extrapolating each box with its last velocity.
+
+        :param velocity_smoothing: Weight of the newest velocity measurement (1.0 = no smoothing).
+        """
+        self.velocity_smoothing = velocity_smoothing
+        self.last_detections = None  # FrameDetections of the last real detection
+        self.last_frame_index = None
+        self.velocities = np.zeros((0, 4))  # Box change per frame, row-aligned with last_detections
+
+
+    def update(self, detections, frame_index):
+        """
+        Stores the FrameDetections of a real detection and refreshes their velocities.
+        Tracks that were not detected again are forgotten.
+        """
+        velocities = np.zeros((len(detections), 4))
+        if self.last_detections is not None and frame_index > self.last_frame_index:
+            _, current_rows, previous_rows = np.intersect1d(
+                detections.track_ids, self.last_detections.track_ids, assume_unique=True, return_indices=True
+            )
+            measured_velocities = ((detections.boxes[current_rows] - self.last_detections.boxes[previous_rows])
+                                   / (frame_index - self.last_frame_index))
+            velocities[current_rows] = (self.velocity_smoothing * measured_velocities
+                                        + (1 - self.velocity_smoothing) * self.velocities[previous_rows])
+
+        self.last_detections = detections
+        self.last_frame_index = frame_index
+        self.velocities = velocities
+
+
+    def predict(self, frame_index):
+        """
+        Returns a new FrameDetections with the last detected tracks moved to where they should be at frame_index.
+        """
+        if self.last_detections is None:
+            return None
+        predicted = self.last_detections.select(slice(None))
+        predicted.set_boxes(predicted.boxes + self.velocities * (frame_index - self.last_frame_index))
+        return predicted
+
+
+class AdaptiveStrideController:
+    def __init__(self, min_stride=1, max_stride=8, source_fps=30, target_utilization=0.8,
+                 scene_change_threshold=12.0, thumbnail_width=64):
+        """
+        Decides on which frames to run detection.
+
+        Detection runs every `stride` frames, where the stride grows with the measured inference latency
+        so detection takes at most `target_utilization` of the frame budget at the source frame rate.
+        A frame whose thumbnail differs strongly from the last detected frame triggers detection early.
+
+        :param min_stride: Smallest allowed stride (1 = detect on every frame).
+        :param max_stride: Largest allowed stride, bounding how long tracks are only predicted.
+        :param source_fps: Frame rate of the source.
+        :param target_utilization: Fraction of the frame time budget detection may use.
+        :param scene_change_threshold: Mean absolute grayscale difference (0-255) that forces detection.
+        :param thumbnail_width: Width of the grayscale thumbnail used for the motion/scene check.
+        """
+        self.min_stride = min_stride
+        self.max_stride = max_stride
+        self.source_fps = source_fps
+        self.target_utilization = target_utilization
+        self.scene_change_threshold = scene_change_threshold
+        self.thumbnail_width = thumbnail_width
+
+        self.stride = min_stride
+        self.average_inference_seconds = None
+        self.last_detection_frame = None
+        self.reference_thumbnail = None
+        self.detected_frames = 0
+        self.predicted_frames = 0
+
+
+    def set_source_fps(self, source_fps):
+        if source_fps and source_fps > 0:
+            self.source_fps = source_fps
+
+
+    def _thumbnail(self, frame):
+        height, width = frame.shape[:2]
+        thumbnail_height = max(1, int(height * self.thumbnail_width / width))
+        thumbnail = cv2.resize(frame, (self.thumbnail_width, thumbnail_height), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(thumbnail, cv2.COLOR_BGR2GRAY) if thumbnail.ndim == 3 else thumbnail
+
+
+    def should_detect(self, frame, frame_index):
+        """
+        Returns True if detection should run on this frame, False if tracks should be predicted instead.
+        """
+        thumbnail = self._thumbnail(frame)
+        detect = bool(
+            self.last_detection_frame is None
+            or frame_index - self.last_detection_frame >= self.stride
+            or self.reference_thumbnail is None
+            or thumbnail.shape != self.reference_thumbnail.shape
+            or cv2.absdiff(thumbnail, self.reference_thumbnail).mean() > self.scene_change_threshold
+        )
+
+        if detect:
+            self.last_detection_frame = frame_index
+            self.reference_thumbnail = thumbnail
+            self.detected_frames += 1
+        else:
+            self.predicted_frames += 1
+        return detect
+
+
+    def record_inference_latency(self, inference_seconds):
+        """
+        Updates the latency estimate after a detection and adapts the stride to it.
+        """
+        if self.average_inference_seconds is None:
+            self.average_inference_seconds = inference_seconds
+        else:
+            self.average_inference_seconds = 0.8 * self.average_inference_seconds + 0.2 * inference_seconds
+
+        frames_per_inference = self.average_inference_seconds * self.source_fps / self.target_utilization
+        self.stride = min(self.max_stride, max(self.min_stride, math.ceil(frames_per_inference)))
+
+
+    def detection_ratio(self):
+        """
+        Returns the fraction of frames that ran detection.
+        """
+        total_frames = self.detected_frames + self.predicted_frames
+        return self.detected_frames / total_frames if total_frames else 1.0
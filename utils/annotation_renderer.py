@@ -0,0 +1,148 @@
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from ZoneIntrusionDetector.zone_index import normalize_zones
+
+LINE_COLOR = (0, 0, 255)  # Red intrusion lines
+ZONE_COLOR = (0, 255, 255)  # Yellow zone boundaries
+INTRUSION_COLOR = (0, 0, 255)
+DEFAULT_COLOR = (0, 255, 0)
+
+
+class AnnotationRenderer:
+    def __init__(self, starting_points_of_lines=None, ending_points_of_lines=None, zones=None, preview_scale=1.0,
+                 render_every=1, label_cache_size=512, show_speed=True, font_scale=0.5, thickness=2):
+        """
+        Draws the same annotations as display_annotated_frame, but cheaply enough for 4K frames with many objects:
+        - intrusion lines and zones are drawn once per frame size into a cached layer and copied in as pixels,
+        - boxes are drawn with one polylines call per color,
+        - each distinct label (class, track ID, color, speed) is rasterized once into a sprite and then only
+          copied, with least recently used sprites evicted beyond label_cache_size.
+
+        :param zones: Dict of zone name -> polygon, or a single polygon.
+        :param preview_scale: Draw on a copy downscaled by this factor (e.g. 0.5 for a 4K feed shown in 1080p);
+                              1.0 draws on the frame itself.
+        :param render_every: Only render every Nth frame (see should_render); analytics still run on all frames.
+        :param label_cache_size: Maximum number of label sprites kept.
+        :param show_speed: Append the estimated speed to labels of objects that have one.
+        """
+        if preview_scale <= 0 or preview_scale > 1:
+            raise ValueError("preview_scale must be in (0, 1].")
+        if render_every < 1:
+            raise ValueError("render_every must be at least 1.")
+        self.lines = list(zip(starting_points_of_lines or (), ending_points_of_lines or ()))
+        self.zones = [points for points in normalize_zones(zones).values() if len(points) >= 3]
+        self.preview_scale = preview_scale
+        self.render_every = render_every
+        self.label_cache_size = label_cache_size
+        self.show_speed = show_speed
+        self.font_scale = font_scale
+        self.thickness = thickness
+
+        self.frame_counter = 0
+        self.label_sprites = OrderedDict()  # (class_id, track_id, intrusion, speed) -> (sprite, mask, text height)
+        self._overlay_shape = None
+        self._overlay_indices = None
+        self._overlay_pixels = None
+
+
+    def should_render(self):
+        """
+        Counts a frame and returns True if it is one of the frames to render.
+        """
+        self.frame_counter += 1
+        return (self.frame_counter - 1) % self.render_every == 0
+
+
+    def _build_static_overlay(self, frame_shape):
+        overlay = np.zeros(frame_shape[:2] + (3,), dtype=np.uint8)
+        scale = self.preview_scale
+        for starting_point, ending_point in self.lines:
+            cv2.line(overlay, (int(starting_point[0] * scale), int(starting_point[1] * scale)),
+                     (int(ending_point[0] * scale), int(ending_point[1] * scale)), LINE_COLOR, self.thickness)
+        for zone_points in self.zones:
+            polygon = (np.array(zone_points, np.float64) * scale).astype(np.int32).reshape((-1, 1, 2))
+            cv2.polylines(overlay, [polygon], isClosed=True, color=ZONE_COLOR, thickness=self.thickness)
+        self._overlay_indices = np.flatnonzero(overlay.any(axis=2))  # Only the drawn pixels are copied per frame
+        self._overlay_pixels = overlay.reshape(-1, 3)[self._overlay_indices]
+        self._overlay_shape = frame_shape[:2]
+
+
+    def _label_sprite(self, label_key, text, color):
+        sprite_and_mask = self.label_sprites.get(label_key)
+        if sprite_and_mask is not None:
+            self.label_sprites.move_to_end(label_key)
+            return sprite_and_mask
+
+        (text_width, text_height), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, self.font_scale, self.thickness)
+        padding = self.thickness  # Thick strokes reach past the nominal text box
+        sprite = np.zeros((text_height + baseline + 2 * padding, text_width + 2 * padding, 3), dtype=np.uint8)
+        cv2.putText(sprite, text, (padding, padding + text_height), cv2.FONT_HERSHEY_SIMPLEX, self.font_scale, color, self.thickness)
+        sprite_and_mask = (sprite, sprite.any(axis=2).astype(np.uint8), text_height)
+        self.label_sprites[label_key] = sprite_and_mask
+        if len(self.label_sprites) > self.label_cache_size:
+            self.label_sprites.popitem(last=False)
+        return sprite_and_mask
+
+
+    def _blit(self, frame, sprite, mask, x, y):
+        """
+        Copies the sprite's text pixels onto the frame with its top-left corner at (x, y), clipped to the frame.
+        """
+        frame_height, frame_width = frame.shape[:2]
+        sprite_height, sprite_width = mask.shape
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + sprite_width, frame_width), min(y + sprite_height, frame_height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        sprite_rows, sprite_columns = slice(y0 - y, y1 - y), slice(x0 - x, x1 - x)
+        cv2.copyTo(sprite[sprite_rows, sprite_columns], mask[sprite_rows, sprite_columns], frame[y0:y1, x0:x1])  # Writes into the frame view
+
+
+    def render(self, frame, tracked_objects):
+        """
+        Returns the annotated frame: the frame itself, or a downscaled copy when preview_scale < 1.
+        """
+        if self.preview_scale != 1.0:
+            frame = cv2.resize(frame, None, fx=self.preview_scale, fy=self.preview_scale, interpolation=cv2.INTER_AREA)
+        elif not frame.flags.c_contiguous:
+            frame = np.ascontiguousarray(frame)
+
+        if self.lines or self.zones:
+            if frame.shape[:2] != self._overlay_shape:
+                self._build_static_overlay(frame.shape)
+            frame.reshape(-1, 3)[self._overlay_indices] = self._overlay_pixels
+
+        if len(tracked_objects) == 0:
+            return frame
+
+        boxes = tracked_objects.pixel_boxes
+        if self.preview_scale != 1.0:
+            boxes = (tracked_objects.boxes * self.preview_scale).astype(np.int64)
+        corners = np.stack([boxes[:, [0, 1]], boxes[:, [2, 1]], boxes[:, [2, 3]], boxes[:, [0, 3]]], axis=1).astype(np.int32)
+        intrusion_detected = tracked_objects.intrusion_detected
+        for color, selected in ((INTRUSION_COLOR, intrusion_detected), (DEFAULT_COLOR, ~intrusion_detected)):
+            if selected.any():
+                cv2.polylines(frame, list(corners[selected]), isClosed=True, color=color, thickness=self.thickness)
+
+        class_labels = tracked_objects.class_labels
+        for (x0, y0, _, _), class_id, track_id, intrusion, speed in zip(
+                boxes.tolist(),
+                tracked_objects.class_ids.tolist(),
+                tracked_objects.track_ids.tolist(),
+                intrusion_detected.tolist(),
+                tracked_objects.speeds.tolist()):
+            color = INTRUSION_COLOR if intrusion else DEFAULT_COLOR
+            rounded_speed = round(speed) if self.show_speed and speed == speed else None  # NaN until estimated
+            label_key = (class_id, track_id, intrusion, rounded_speed)
+            text = None
+            if label_key not in self.label_sprites:
+                text = f"{class_labels[class_id]} [ID: {track_id}]"
+                if rounded_speed is not None:
+                    text += f" {rounded_speed} km/h"
+            sprite, mask, text_height = self._label_sprite(label_key, text, color)
+            # Same placement as cv2.putText with its baseline 10 px above the box
+            self._blit(frame, sprite, mask, x0 - self.thickness, y0 - 10 - text_height - self.thickness)
+        return frame
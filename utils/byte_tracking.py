@@ -0,0 +1,34 @@
+# torch and ultralytics are imported inside the functions so importing this module stays cheap
+
+
+def create_byte_tracker(tracker_config="bytetrack.yaml", frame_rate=30):
+    """
+    Creates a standalone ByteTrack instance, the same one ultralytics builds for model.track(persist=True).
+
+    :param tracker_config: Tracker YAML name or path.
+    :param frame_rate: Frame rate of the source, used by ByteTrack to size its lost-track buffer.
+    """
+    from ultralytics.trackers.byte_tracker import BYTETracker
+    from ultralytics.utils import IterableSimpleNamespace, yaml_load
+    from ultralytics.utils.checks import check_yaml
+
+    tracker_args = IterableSimpleNamespace(**yaml_load(check_yaml(tracker_config)))
+    return BYTETracker(args=tracker_args, frame_rate=frame_rate)
+
+
+def apply_byte_tracker(byte_tracker, detection_result, frame):
+    """
+    Runs ByteTrack on a single model.predict() result and returns the result with track IDs attached,
+    mirroring what ultralytics does internally in model.track().
+    """
+    detections = detection_result.boxes.cpu().numpy()
+    tracks = byte_tracker.update(detections, frame)
+    if len(tracks) == 0:
+        return detection_result  # No confirmed tracks; boxes stay without IDs
+
+    import torch
+
+    matched_indices = tracks[:, -1].astype(int)
+    tracked_result = detection_result[matched_indices]
+    tracked_result.update(boxes=torch.as_tensor(tracks[:, :-1]))
+    return tracked_result
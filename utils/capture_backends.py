@@ -0,0 +1,312 @@
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+
+import cv2
+import numpy as np
+
+from utils.frame_pipeline import is_live_source
+
+logger = logging.getLogger(__name__)
+
+CAPTURE_BACKENDS = ("opencv", "ffmpeg", "gstreamer")
+
+
+class OpenCvCapture:
+    def __init__(self, input_media_source, output_size=None, video_capture=None):
+        """
+        cv2.VideoCapture that optionally delivers frames at a reduced (width, height). Full-resolution frames are
+        decoded into one reused buffer and downscaled into the frame passed to read/retrieve, or a new one.
+
+        Like all capture backends it exposes the cv2.VideoCapture methods the stream code uses (isOpened, grab,
+        retrieve, read, get, release), plus source_size: the source's (width, height), or None until known.
+
+        :param video_capture: Already created cv2.VideoCapture to wrap instead of opening input_media_source.
+        """
+        self.video_capture = video_capture or cv2.VideoCapture(input_media_source)
+        self.output_size = tuple(output_size) if output_size else None
+        width = int(self.video_capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(self.video_capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.source_size = (width, height) if width > 0 and height > 0 else None  # Otherwise set by the first frame
+        self._decode_buffer = None
+
+
+    def isOpened(self):
+        return self.video_capture.isOpened()
+
+
+    def grab(self):
+        return self.video_capture.grab()
+
+
+    def retrieve(self, frame=None):
+        """
+        Decodes the grabbed frame, into frame when given and of the output shape.
+        """
+        if self.output_size is None:
+            return self.video_capture.retrieve(frame)
+        frame_available, decoded = self.video_capture.retrieve(self._decode_buffer)
+        if not frame_available or decoded is None:
+            return False, None
+        self._decode_buffer = decoded  # Decoded into in place from the second frame on
+        self.source_size = (decoded.shape[1], decoded.shape[0])
+        return True, cv2.resize(decoded, self.output_size, dst=frame, interpolation=cv2.INTER_AREA)
+
+
+    def read(self, frame=None):
+        if self.output_size is None:
+            return self.video_capture.read(frame)
+        if not self.video_capture.grab():
+            return False, None
+        return self.retrieve(frame)
+
+
+    def get(self, property_id):
+        return self.video_capture.get(property_id)
+
+
+    def release(self):
+        self.video_capture.release()
+
+
+def ffprobe_source(input_media_source):
+    """
+    Returns the (width, height) and FPS of the first video stream of a file or stream URL, using ffprobe.
+    """
+    command = ["ffprobe", "-v", "error", "-select_streams", "v:0", "-show_entries",
+               "stream=width,height,avg_frame_rate,r_frame_rate", "-of", "json", str(input_media_source)]
+    try:
+        probe = subprocess.run(command, capture_output=True, check=True, timeout=30)
+        stream = json.loads(probe.stdout)["streams"][0]
+    except (OSError, subprocess.SubprocessError, ValueError, KeyError, IndexError) as error:
+        raise ValueError(f"Error: ffprobe could not read {input_media_source}: {error}")
+
+    frames_per_second = 0.0
+    for rate in (stream.get("avg_frame_rate"), stream.get("r_frame_rate")):  # "30000/1001"; "0/0" when unknown
+        numerator, _, denominator = (rate or "0/0").partition("/")
+        if float(numerator) and float(denominator or 1):
+            frames_per_second = float(numerator) / float(denominator or 1)
+            break
+    return (int(stream["width"]), int(stream["height"])), frames_per_second
+
+
+class FfmpegPipeCapture:
+    def __init__(self, input_media_source, output_size=None, hwaccel=None):
+        """
+        Decodes with an ffmpeg subprocess that scales and converts to BGR before the pixels reach Python, and
+        reads each raw frame straight into the frame passed to read, or else into a preallocated buffer.
+
+        :param output_size: (width, height) to scale to in ffmpeg; the source resolution when None.
+        :param hwaccel: ffmpeg -hwaccel method, e.g. "auto", "cuda", "vaapi", "videotoolbox" or "qsv".
+                        Decoded frames are downloaded for the scale filter, so any method works with any output size.
+        """
+        if isinstance(input_media_source, int) or str(input_media_source).isdigit():
+            raise ValueError("The ffmpeg backend reads files and stream URLs, not webcam indices.")
+        self.source_size, self.frames_per_second = ffprobe_source(input_media_source)
+        self.output_size = tuple(output_size) if output_size else self.source_size
+        width, height = self.output_size
+
+        command = ["ffmpeg", "-nostdin", "-loglevel", "error"]
+        if hwaccel:
+            command += ["-hwaccel", hwaccel]
+        if str(input_media_source).startswith("rtsp://"):
+            command += ["-rtsp_transport", "tcp"]
+        command += ["-i", str(input_media_source), "-an", "-sn"]
+        if self.output_size != self.source_size:
+            command += ["-vf", f"scale={width}:{height}:flags=area"]
+        command += ["-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1"]
+        self.process = subprocess.Popen(command, stdout=subprocess.PIPE, bufsize=width * height * 3)
+
+        self._frame = np.empty((height, width, 3), dtype=np.uint8)
+        self._frame_grabbed = False
+        self.frame_index = -1
+
+
+    def _read_into(self, frame):
+        view = memoryview(frame.reshape(-1))
+        filled = 0
+        while filled < len(view):
+            received = self.process.stdout.readinto(view[filled:])
+            if not received:
+                return False  # End of stream, or ffmpeg exited
+            filled += received
+        self.frame_index += 1
+        return True
+
+
+    def isOpened(self):
+        return self.process is not None and (self.process.poll() is None or self._frame_grabbed)
+
+
+    def grab(self):
+        self._frame_grabbed = self.process is not None and self._read_into(self._frame)
+        return self._frame_grabbed
+
+
+    def retrieve(self, frame=None):
+        if not self._frame_grabbed:
+            return False, None
+        if frame is None or frame.shape != self._frame.shape:
+            return True, self._frame.copy()
+        np.copyto(frame, self._frame)
+        return True, frame
+
+
+    def read(self, frame=None):
+        if frame is not None and frame.shape == self._frame.shape and frame.flags.c_contiguous:
+            self._frame_grabbed = False
+            return (True, frame) if self._read_into(frame) else (False, None)  # No copy: straight into the caller's buffer
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+
+    def get(self, property_id):
+        if property_id == cv2.CAP_PROP_FPS:
+            return self.frames_per_second
+        if property_id == cv2.CAP_PROP_POS_MSEC:
+            return 1000.0 * self.frame_index / self.frames_per_second if self.frames_per_second else 0.0
+        if property_id == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.output_size[0])
+        if property_id == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.output_size[1])
+        return 0.0
+
+
+    def release(self):
+        if self.process is None:
+            return
+        self.process.stdout.close()
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=2.0)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+
+
+def gstreamer_available():
+    match = re.search(r"GStreamer:\s*(\w+)", cv2.getBuildInformation())
+    return match is not None and match.group(1) == "YES"
+
+
+def gstreamer_pipeline(input_media_source, output_size=None):
+    """
+    Builds a GStreamer pipeline that decodes with the highest-ranked decoder installed (NVDEC, VA-API, ...),
+    then scales and converts to BGR before handing frames to OpenCV.
+    """
+    if isinstance(input_media_source, int) or str(input_media_source).isdigit():
+        source = f"v4l2src device=/dev/video{int(input_media_source)} ! decodebin"
+    else:
+        uri = str(input_media_source)
+        if "://" not in uri:
+            uri = "file://" + os.path.abspath(uri)
+        source = f"uridecodebin uri={uri}"
+    caps = "video/x-raw,format=BGR"
+    if output_size:
+        caps += f",width={output_size[0]},height={output_size[1]}"
+    live = is_live_source(input_media_source)
+    appsink = f"appsink max-buffers=1 drop={'true' if live else 'false'} sync=false"
+    return f"{source} ! videoconvert ! videoscale ! {caps} ! {appsink}"
+
+
+def open_gstreamer_capture(input_media_source, output_size=None):
+    """
+    Returns an OpenCvCapture reading from a GStreamer pipeline that scales at decode (see gstreamer_pipeline).
+
+    The pipeline only reports its scaled caps, so the source size comes from ffprobe. Webcams and sources
+    ffprobe cannot read are decoded at full size instead, and downscaled by OpenCvCapture.
+    """
+    source_size = None
+    webcam = isinstance(input_media_source, int) or str(input_media_source).isdigit()
+    if output_size and not webcam and shutil.which("ffprobe") is not None:
+        try:
+            source_size, _ = ffprobe_source(input_media_source)
+        except ValueError as error:
+            logger.warning("%s; scaling after decoding instead.", error)
+
+    if output_size and source_size is None:
+        video_capture = cv2.VideoCapture(gstreamer_pipeline(input_media_source), cv2.CAP_GSTREAMER)
+        return OpenCvCapture(input_media_source, output_size, video_capture=video_capture)
+    video_capture = cv2.VideoCapture(gstreamer_pipeline(input_media_source, output_size), cv2.CAP_GSTREAMER)
+    capture = OpenCvCapture(input_media_source, video_capture=video_capture)  # Frames already arrive at output_size
+    if source_size is not None:
+        capture.source_size = source_size
+    return capture
+
+
+def open_capture(input_media_source, backend="opencv", output_size=None, hwaccel=None):
+    """
+    Opens a source with the requested capture backend, falling back to plain OpenCV decoding when the backend
+    is not available here (no ffmpeg binary, OpenCV built without GStreamer) or cannot open the source.
+
+    :param backend: "opencv", "ffmpeg" or "gstreamer".
+    :param output_size: (width, height) to decode at, e.g. the model's inference resolution; the source
+                        resolution when None.
+    :param hwaccel: Hardware decoder for the ffmpeg backend (see FfmpegPipeCapture); GStreamer picks one itself.
+    """
+    if backend not in CAPTURE_BACKENDS:
+        raise ValueError(f"Unknown capture backend '{backend}'. Use one of {CAPTURE_BACKENDS}.")
+
+    if backend == "ffmpeg":
+        if shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None:
+            logger.warning("ffmpeg/ffprobe not found; decoding %s with OpenCV instead.", input_media_source)
+        else:
+            try:
+                return FfmpegPipeCapture(input_media_source, output_size, hwaccel)
+            except ValueError as error:
+                logger.warning("%s; decoding with OpenCV instead.", error)
+    elif backend == "gstreamer":
+        if not gstreamer_available():
+            logger.warning("OpenCV was built without GStreamer; decoding %s with OpenCV instead.", input_media_source)
+        else:
+            capture = open_gstreamer_capture(input_media_source, output_size)
+            if capture.isOpened():
+                return capture
+            logger.warning("GStreamer could not open %s; decoding with OpenCV instead.", input_media_source)
+
+    return OpenCvCapture(input_media_source, output_size)
+
+
+class FrameScaler:
+    def __init__(self, inference_size):
+        """
+        Feeds the tracker frames at inference resolution and maps its boxes back to source pixels, where the
+        intrusion lines, zones and speed calibration are defined.
+
+        :param inference_size: (width, height) the tracker sees.
+        """
+        self.inference_size = tuple(inference_size)
+        self._buffer = None
+
+
+    def inference_frame(self, frame):
+        """
+        Returns the frame at inference resolution. Full-resolution frames are downscaled into one reused
+        buffer, which stays valid until the next call.
+        """
+        width, height = self.inference_size
+        if frame.shape[1] == width and frame.shape[0] == height:
+            return frame  # Already decoded at inference resolution
+        if self._buffer is None or self._buffer.shape != (height, width) + frame.shape[2:]:
+            self._buffer = np.empty((height, width) + frame.shape[2:], dtype=frame.dtype)
+        return cv2.resize(frame, self.inference_size, dst=self._buffer, interpolation=cv2.INTER_AREA)
+
+
+    def to_source_coordinates(self, tracked_objects, source_size):
+        """
+        Returns a copy of the tracked objects with their boxes scaled to a (width, height) source. The tracker's
+        own result is left untouched, since it may hand it out again for frames it skips.
+        """
+        width, height = self.inference_size
+        if len(tracked_objects) == 0 or tuple(source_size) == self.inference_size:
+            return tracked_objects
+        scale_x, scale_y = source_size[0] / width, source_size[1] / height
+        scaled_objects = tracked_objects.select(slice(None))
+        scaled_objects.set_boxes(scaled_objects.boxes * np.array([scale_x, scale_y, scale_x, scale_y]))
+        return scaled_objects
@@ -0,0 +1,41 @@
+import time
+
+import cv2
+
+from utils.frame_pipeline import is_live_source
+
+
+class CaptureClock:
+    def __init__(self, video_capture, input_media_source):
+        """
+        Assigns every captured frame a capture timestamp in seconds.
+
+        Files use the container timestamp (CAP_PROP_POS_MSEC), falling back to frame index / FPS, so results
+        do not depend on how fast the frames are processed. Live sources, where OpenCV often reports 0 or a
+        nominal FPS, use the wall clock at the moment the frame was read, so events and time-bucketed counts
+        carry real times.
+        """
+        self.video_capture = video_capture
+        self.live_source = is_live_source(input_media_source)
+        self.frames_per_second = video_capture.get(cv2.CAP_PROP_FPS) or None
+        self.frame_index = -1
+        self.last_timestamp = None
+
+
+    def next_timestamp(self):
+        """
+        Returns the capture timestamp of the frame that was just read.
+        """
+        self.frame_index += 1
+        if self.live_source:
+            timestamp = time.time()
+        else:
+            position_msec = self.video_capture.get(cv2.CAP_PROP_POS_MSEC)
+            if position_msec > 0 and (self.last_timestamp is None or position_msec / 1000.0 > self.last_timestamp):
+                timestamp = position_msec / 1000.0
+            elif self.frames_per_second:
+                timestamp = self.frame_index / self.frames_per_second
+            else:
+                timestamp = time.monotonic()
+        self.last_timestamp = timestamp
+        return timestamp
@@ -0,0 +1,191 @@
+import csv
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from utils.events import EVENT_FIELDS
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()  # Sentinel telling the writer thread to flush and exit
+
+FORMATS_BY_EXTENSION = {".jsonl": "jsonl", ".json": "jsonl", ".csv": "csv", ".parquet": "parquet",
+                        ".sqlite": "sqlite", ".sqlite3": "sqlite", ".db": "sqlite"}
+
+
+class JsonlEventBackend:
+    def __init__(self, output_path):
+        self.output_file = open(output_path, "a")
+
+    def write_batch(self, events):
+        self.output_file.write("".join(json.dumps(event) + "\n" for event in events))
+        self.output_file.flush()
+
+    def close(self):
+        self.output_file.close()
+
+
+class CsvEventBackend:
+    def __init__(self, output_path):
+        write_header = not os.path.exists(output_path) or os.path.getsize(output_path) == 0
+        self.output_file = open(output_path, "a", newline="")
+        self.csv_writer = csv.DictWriter(self.output_file, fieldnames=EVENT_FIELDS, extrasaction="ignore")
+        if write_header:
+            self.csv_writer.writeheader()
+
+    def write_batch(self, events):
+        self.csv_writer.writerows(events)
+        self.output_file.flush()
+
+    def close(self):
+        self.output_file.close()
+
+
+class ParquetEventBackend:
+    def __init__(self, output_path):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ValueError("Writing Parquet events requires pyarrow (pip install pyarrow).")
+        self.pyarrow = pyarrow
+        self.schema = pyarrow.schema([
+            ("event_type", pyarrow.string()), ("source_id", pyarrow.string()), ("track_id", pyarrow.int64()),
+            ("class_label", pyarrow.string()), ("timestamp", pyarrow.float64()), ("frame_index", pyarrow.int64()),
+            ("line", pyarrow.string()), ("direction", pyarrow.int8()), ("zone", pyarrow.string()),
+            ("dwell_seconds", pyarrow.float64()), ("speed_kph", pyarrow.float64()), ("threshold_kph", pyarrow.float64()),
+        ])
+        self.parquet_writer = pyarrow.parquet.ParquetWriter(output_path, self.schema)  # One row group per batch
+
+    def write_batch(self, events):
+        columns = {field: [event.get(field) for event in events] for field in EVENT_FIELDS}
+        columns["source_id"] = [None if value is None else str(value) for value in columns["source_id"]]
+        self.parquet_writer.write_table(self.pyarrow.table(columns, schema=self.schema))
+
+    def close(self):
+        self.parquet_writer.close()
+
+
+class SqliteEventBackend:
+    def __init__(self, output_path):
+        # Created on the writer thread, so the connection is only ever used from that thread
+        self.connection = sqlite3.connect(output_path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(f"CREATE TABLE IF NOT EXISTS events ({', '.join(EVENT_FIELDS)})")
+        self.insert_statement = f"INSERT INTO events VALUES ({', '.join('?' for _ in EVENT_FIELDS)})"
+
+    def write_batch(self, events):
+        with self.connection:  # One transaction per batch
+            self.connection.executemany(self.insert_statement, [
+                tuple(None if event.get(field) is None else
+                      str(event[field]) if field == "source_id" else event[field] for field in EVENT_FIELDS)
+                for event in events
+            ])
+
+    def close(self):
+        self.connection.close()
+
+
+EVENT_BACKENDS = {"jsonl": JsonlEventBackend, "csv": CsvEventBackend, "parquet": ParquetEventBackend, "sqlite": SqliteEventBackend}
+
+
+class EventWriter:
+    def __init__(self, output_path, output_format=None, batch_size=256, flush_interval=1.0, queue_size=100000):
+        """
+        Writes events from a background thread in batches, so the analytics loop never waits on disk I/O.
+
+        :param output_path: Destination file.
+        :param output_format: "jsonl", "csv", "parquet" or "sqlite"; inferred from the extension when None.
+        :param batch_size: Events written per batch (one transaction / row group / flush).
+        :param flush_interval: Maximum seconds an event waits before its batch is written.
+        :param queue_size: Events buffered before new ones are dropped (counted in dropped_events).
+                           Events are also dropped once the writer failed (see failed).
+        """
+        output_format = output_format or FORMATS_BY_EXTENSION.get(os.path.splitext(output_path)[1].lower())
+        if output_format not in EVENT_BACKENDS:
+            raise ValueError(f"Unknown event output format for {output_path}: {output_format}")
+        if output_format == "parquet":  # Fail here rather than on the writer thread
+            try:
+                import pyarrow.parquet  # noqa: F401
+            except ImportError:
+                raise ValueError("Writing Parquet events requires pyarrow (pip install pyarrow).")
+
+        self.output_path = output_path
+        self.output_format = output_format
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written_events = 0
+        self.dropped_events = 0
+        self.failed = False  # Set when the backend could not be opened or written; the error is logged
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._write_loop, name="event-writer", daemon=True)
+        self._thread.start()
+
+
+    def submit(self, events):
+        """
+        Queues events (TrafficEvent objects or dicts) without blocking.
+        """
+        if self.failed:
+            self.dropped_events += len(events)
+            return
+        for event in events:
+            try:
+                self._queue.put_nowait(event.to_dict() if hasattr(event, "to_dict") else event)
+            except queue.Full:
+                self.dropped_events += 1
+
+
+    def _write_loop(self):
+        backend = None
+        batch = []
+        stopping = False
+        try:
+            backend = EVENT_BACKENDS[self.output_format](self.output_path)
+            while not stopping:
+                try:
+                    event = self._queue.get(timeout=self.flush_interval)
+                    if event is _STOP:
+                        stopping = True
+                    else:
+                        batch.append(event)
+                        while len(batch) < self.batch_size:  # Drain whatever is already waiting
+                            event = self._queue.get_nowait()
+                            if event is _STOP:
+                                stopping = True
+                                break
+                            batch.append(event)
+                except queue.Empty:
+                    pass
+                if batch:
+                    backend.write_batch(batch)
+                    self.written_events += len(batch)
+                    batch = []
+        except Exception:
+            self.failed = True
+            logger.exception("Event writer for %s failed; further events are dropped", self.output_path)
+        finally:
+            if backend is not None:
+                backend.close()
+
+
+    def close(self, timeout=30.0):
+        """
+        Writes everything still queued and stops the writer thread, giving up after timeout seconds.
+        """
+        deadline = time.monotonic() + timeout
+        while self._thread.is_alive() and time.monotonic() < deadline:  # A failed writer never drains the queue
+            try:
+                self._queue.put(_STOP, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+        self._thread.join(max(0.0, deadline - time.monotonic()))
+        if self._thread.is_alive():
+            logger.warning("Event writer for %s did not finish within %.0f s", self.output_path, timeout)
+        if self.dropped_events:
+            logger.warning("Dropped %s events for %s", self.dropped_events, self.output_path)
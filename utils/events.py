@@ -0,0 +1,175 @@
+import numpy as np
+
+LINE_CROSSING = "line_crossing"
+ZONE_ENTER = "zone_enter"
+ZONE_EXIT = "zone_exit"
+SPEED_OVER_THRESHOLD = "speed_over_threshold"
+
+EVENT_FIELDS = ("event_type", "source_id", "track_id", "class_label", "timestamp", "frame_index",
+                "line", "direction", "zone", "dwell_seconds", "speed_kph", "threshold_kph")
+
+
+class TrafficEvent:
+    __slots__ = ("source_id", "track_id", "class_label", "timestamp", "frame_index")
+    event_type = None
+
+
+    def __init__(self, source_id, track_id, class_label, timestamp, frame_index):
+        """
+        Something that happened to one track on one frame.
+
+        :param source_id: Camera/file the event came from.
+        :param timestamp: Capture timestamp of the frame in seconds.
+        :param frame_index: Index of the frame within its source.
+        """
+        self.source_id = source_id
+        self.track_id = track_id
+        self.class_label = class_label
+        self.timestamp = timestamp
+        self.frame_index = frame_index
+
+
+    def to_dict(self):
+        """
+        Returns the event as a flat dict containing only the fields this event type has.
+        """
+        event = {"event_type": self.event_type}
+        for cls in reversed(type(self).__mro__):
+            for field in getattr(cls, "__slots__", ()):
+                event[field] = getattr(self, field)
+        return event
+
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()})"
+
+
+class LineCrossingEvent(TrafficEvent):
+    __slots__ = ("line", "direction")
+    event_type = LINE_CROSSING
+
+
+    def __init__(self, source_id, track_id, class_label, timestamp, frame_index, line, direction):
+        super().__init__(source_id, track_id, class_label, timestamp, frame_index)
+        self.line = line
+        self.direction = direction  # +1 or -1, see LineIntrusionDetector.line_crossing_engine
+
+
+class ZoneEnterEvent(TrafficEvent):
+    __slots__ = ("zone",)
+    event_type = ZONE_ENTER
+
+
+    def __init__(self, source_id, track_id, class_label, timestamp, frame_index, zone):
+        super().__init__(source_id, track_id, class_label, timestamp, frame_index)
+        self.zone = zone
+
+
+class ZoneExitEvent(TrafficEvent):
+    __slots__ = ("zone", "dwell_seconds")
+    event_type = ZONE_EXIT
+
+
+    def __init__(self, source_id, track_id, class_label, timestamp, frame_index, zone, dwell_seconds):
+        super().__init__(source_id, track_id, class_label, timestamp, frame_index)
+        self.zone = zone
+        self.dwell_seconds = dwell_seconds
+
+
+class SpeedOverThresholdEvent(TrafficEvent):
+    __slots__ = ("speed_kph", "threshold_kph")
+    event_type = SPEED_OVER_THRESHOLD
+
+
+    def __init__(self, source_id, track_id, class_label, timestamp, frame_index, speed_kph, threshold_kph):
+        super().__init__(source_id, track_id, class_label, timestamp, frame_index)
+        self.speed_kph = speed_kph
+        self.threshold_kph = threshold_kph
+
+
+def line_crossing_events(tracked_objects, timestamp, frame_index, source_id=None):
+    """
+    Turns the crossings the line detector wrote into tracked_objects.crossed_lines into events.
+    """
+    events = []
+    for row, crossings in tracked_objects.crossed_lines.items():
+        track_id = int(tracked_objects.track_ids[row])
+        class_label = tracked_objects.class_labels[int(tracked_objects.class_ids[row])]
+        for line_name, direction in crossings:
+            events.append(LineCrossingEvent(source_id, track_id, class_label, timestamp, frame_index, line_name, int(direction)))
+    return events
+
+
+class ZoneEventTracker:
+    def __init__(self, source_id=None, exit_grace_seconds=1.0):
+        """
+        Derives zone enter/exit events (with dwell time) from the per-frame zone membership matrix.
+
+        :param exit_grace_seconds: A track that disappears from the frame while inside a zone is reported
+                                   as exiting once it has been missing this long.
+        """
+        self.source_id = source_id
+        self.exit_grace_seconds = exit_grace_seconds
+        self.zone_entries = {}  # track_id -> {zone name: entry timestamp}
+        self.track_info = {}  # track_id -> (class label, last seen timestamp, last frame index)
+
+
+    def update(self, tracked_objects, timestamp, frame_index):
+        events = []
+        if tracked_objects.zone_membership is None:
+            return events
+
+        zone_names = tracked_objects.zone_names
+        for row, track_id in enumerate(tracked_objects.track_ids.tolist()):
+            class_label = tracked_objects.class_labels[int(tracked_objects.class_ids[row])]
+            current_zones = {zone_names[zone_index] for zone_index in np.flatnonzero(tracked_objects.zone_membership[row])}
+            entries = self.zone_entries.setdefault(track_id, {})
+            for zone_name in [zone_name for zone_name in entries if zone_name not in current_zones]:
+                events.append(ZoneExitEvent(self.source_id, track_id, class_label, timestamp, frame_index,
+                                            zone_name, round(timestamp - entries.pop(zone_name), 3)))
+            for zone_name in sorted(current_zones - entries.keys()):
+                entries[zone_name] = timestamp
+                events.append(ZoneEnterEvent(self.source_id, track_id, class_label, timestamp, frame_index, zone_name))
+            self.track_info[track_id] = (class_label, timestamp, frame_index)
+
+        # Tracks that vanished while inside a zone exit at their last sighting
+        for track_id, (class_label, last_seen, last_frame_index) in list(self.track_info.items()):
+            if timestamp - last_seen <= self.exit_grace_seconds:
+                continue
+            for zone_name, entered_at in self.zone_entries.pop(track_id, {}).items():
+                events.append(ZoneExitEvent(self.source_id, track_id, class_label, last_seen, last_frame_index,
+                                            zone_name, round(last_seen - entered_at, 3)))
+            del self.track_info[track_id]
+        return events
+
+
+class SpeedThresholdMonitor:
+    def __init__(self, threshold_kph, source_id=None, rearm_ratio=0.9, track_ttl_seconds=30.0):
+        """
+        Emits one event when a track's speed rises above threshold_kph; the track is re-armed once it
+        drops below threshold_kph * rearm_ratio.
+        """
+        self.threshold_kph = threshold_kph
+        self.source_id = source_id
+        self.rearm_ratio = rearm_ratio
+        self.track_ttl_seconds = track_ttl_seconds
+        self.tracks_over_threshold = {}  # track_id -> last seen timestamp
+
+
+    def update(self, tracked_objects, timestamp, frame_index):
+        events = []
+        speeds = tracked_objects.speeds
+        for row in np.flatnonzero(speeds > self.threshold_kph):
+            track_id = int(tracked_objects.track_ids[row])
+            if track_id not in self.tracks_over_threshold:
+                events.append(SpeedOverThresholdEvent(self.source_id, track_id,
+                                                      tracked_objects.class_labels[int(tracked_objects.class_ids[row])],
+                                                      timestamp, frame_index, float(speeds[row]), self.threshold_kph))
+            self.tracks_over_threshold[track_id] = timestamp
+
+        for track_id in tracked_objects.track_ids[speeds < self.threshold_kph * self.rearm_ratio].tolist():
+            self.tracks_over_threshold.pop(track_id, None)
+        for track_id, last_seen in list(self.tracks_over_threshold.items()):
+            if timestamp - last_seen > self.track_ttl_seconds:
+                del self.tracks_over_threshold[track_id]
+        return events
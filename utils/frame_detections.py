@@ -0,0 +1,151 @@
+import numpy as np
+
+
+class TrackedObjectView:
+    """
+    Lightweight per-object view into a FrameDetections row, exposing the attributes of the old
+    TrackedObjects class. Reads and writes go straight to the underlying arrays.
+    """
+    __slots__ = ("detections", "index")
+
+
+    def __init__(self, detections, index):
+        self.detections = detections
+        self.index = index
+
+
+    @property
+    def track_id(self):
+        return int(self.detections.track_ids[self.index])
+
+
+    @property
+    def class_id(self):
+        return int(self.detections.class_ids[self.index])
+
+
+    @property
+    def class_label(self):
+        return self.detections.class_labels[self.class_id]
+
+
+    @property
+    def confidence(self):
+        return float(self.detections.confidences[self.index])
+
+
+    @property
+    def bounding_box(self):
+        return self.detections.boxes[self.index].tolist()
+
+
+    @bounding_box.setter
+    def bounding_box(self, bounding_box):
+        self.detections.set_box(self.index, bounding_box)
+
+
+    @property
+    def intrusion_detected(self):
+        return bool(self.detections.intrusion_detected[self.index])
+
+
+    @intrusion_detected.setter
+    def intrusion_detected(self, intrusion_detected):
+        self.detections.intrusion_detected[self.index] = intrusion_detected
+
+
+    @property
+    def speed(self):
+        speed = self.detections.speeds[self.index]
+        return None if np.isnan(speed) else float(speed)
+
+
+    @property
+    def crossed_lines(self):
+        return self.detections.crossed_lines.get(self.index, [])
+
+
+    @property
+    def occupied_zones(self):
+        if self.detections.zone_membership is None:
+            return []
+        return [self.detections.zone_names[zone_index] for zone_index in np.flatnonzero(self.detections.zone_membership[self.index])]
+
+
+    def __repr__(self):
+        return f"TrackedObject(ID={self.track_id}, Class={self.class_label}, BBox={self.bounding_box})"
+
+
+class FrameDetections:
+    def __init__(self, boxes, class_ids, track_ids, confidences, class_labels):
+        """
+        Columnar tracking result for one frame: one contiguous array per field instead of one Python object
+        per detection. Analytics stages read and write the arrays directly; iterating yields TrackedObjectView
+        rows for code that still works object by object.
+
+        :param boxes: (N, 4) array of xyxy boxes.
+        :param class_ids: (N,) array of class IDs.
+        :param track_ids: (N,) array of track IDs.
+        :param confidences: (N,) array of confidence scores.
+        :param class_labels: Mapping of class ID -> class name (model.names).
+        """
+        self.class_labels = class_labels
+        self.class_ids = np.ascontiguousarray(class_ids, dtype=np.int64).reshape(-1)
+        self.track_ids = np.ascontiguousarray(track_ids, dtype=np.int64).reshape(-1)
+        self.confidences = np.ascontiguousarray(confidences, dtype=np.float32).reshape(-1)
+        self.set_boxes(boxes)
+
+        # Per-frame analytics output
+        self.intrusion_detected = np.zeros(len(self.track_ids), dtype=bool)
+        self.speeds = np.full(len(self.track_ids), np.nan)  # km/h, NaN until estimated
+        self.crossed_lines = {}  # row index -> [(line_name, direction)], only for rows that crossed a line
+        self.zone_membership = None  # (N, Z) bool matrix set by the zone detector
+        self.zone_names = []
+
+
+    @classmethod
+    def empty(cls, class_labels):
+        return cls(np.zeros((0, 4)), [], [], [], class_labels)
+
+
+    def set_boxes(self, boxes):
+        """
+        Replaces all boxes and refreshes the derived integer boxes and centers.
+        """
+        self.boxes = np.ascontiguousarray(boxes, dtype=np.float64).reshape(-1, 4)
+        self.pixel_boxes = self.boxes.astype(np.int64)  # Truncated like int(), as the drawing code expects
+        self.centers = (self.pixel_boxes[:, :2] + self.pixel_boxes[:, 2:]) // 2
+
+
+    def set_box(self, index, bounding_box):
+        self.boxes[index] = bounding_box
+        self.pixel_boxes[index] = self.boxes[index].astype(np.int64)
+        self.centers[index] = (self.pixel_boxes[index, :2] + self.pixel_boxes[index, 2:]) // 2
+
+
+    def select(self, row_mask):
+        """
+        Returns a new FrameDetections with only the rows selected by a bool mask or index array.
+        Analytics output is not carried over.
+        """
+        return FrameDetections(self.boxes[row_mask], self.class_ids[row_mask], self.track_ids[row_mask],
+                               self.confidences[row_mask], self.class_labels)
+
+
+    def __len__(self):
+        return len(self.track_ids)
+
+
+    def __getitem__(self, index):
+        if not -len(self) <= index < len(self):
+            raise IndexError("FrameDetections index out of range")
+        return TrackedObjectView(self, index % len(self))
+
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield TrackedObjectView(self, index)
+
+
+    def __repr__(self):
+        return f"FrameDetections(count={len(self)})"
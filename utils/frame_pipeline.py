@@ -0,0 +1,261 @@
+import logging
+import queue
+import threading
+import time
+
+
+DROP_OLDEST = "drop_oldest"  # Live feeds: always keep the newest frames
+BLOCK = "block"  # Files: never lose a frame, slow the producer down instead
+LIVE_SOURCE_PREFIXES = ("rtsp://", "rtmp://", "http://", "https://", "udp://", "tcp://")
+
+_END_OF_STREAM = object()  # Sentinel pushed through the queues when capture ends
+
+logger = logging.getLogger(__name__)
+
+
+def is_live_source(input_media_source):
+    """
+    Returns True for webcams (integer indices) and network streams, False for video files.
+    """
+    if isinstance(input_media_source, int):
+        return True
+    return str(input_media_source).lower().startswith(LIVE_SOURCE_PREFIXES)
+
+
+def default_drop_policy(input_media_source):
+    """
+    Picks drop-oldest for live feeds and block for files.
+    """
+    return DROP_OLDEST if is_live_source(input_media_source) else BLOCK
+
+
+class BoundedFrameQueue:
+    def __init__(self, maxsize=4, drop_policy=BLOCK):
+        """
+        Bounded queue connecting two pipeline stages.
+
+        :param maxsize: Maximum number of items waiting between the stages.
+        :param drop_policy: DROP_OLDEST discards the oldest waiting item when full,
+                            BLOCK makes the producer wait until there is room.
+        """
+        if drop_policy not in (DROP_OLDEST, BLOCK):
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.drop_policy = drop_policy
+        self.dropped_items = 0
+        self._queue = queue.Queue(maxsize=maxsize)
+
+
+    def put(self, item, stop_event=None):
+        """
+        Adds an item according to the drop policy. Returns False if the pipeline stopped while waiting.
+        """
+        if self.drop_policy == DROP_OLDEST:
+            while True:
+                try:
+                    self._queue.put_nowait(item)
+                    return True
+                except queue.Full:
+                    try:
+                        self._queue.get_nowait()  # Make room by discarding the oldest item
+                        self.dropped_items += 1
+                    except queue.Empty:
+                        pass
+        return self.put_blocking(item, stop_event)
+
+
+    def put_blocking(self, item, stop_event=None):
+        """
+        Waits for room regardless of the drop policy; used for items that must never be dropped.
+        """
+        while stop_event is None or not stop_event.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+
+    def get(self, timeout=0.1):
+        """
+        Returns the next item, raising queue.Empty if nothing arrived within the timeout.
+        """
+        return self._queue.get(timeout=timeout)
+
+
+    def qsize(self):
+        return self._queue.qsize()
+
+
+class StageThroughput:
+    def __init__(self, name):
+        """
+        Counts processed items and busy time for a single pipeline stage.
+        """
+        self.name = name
+        self.processed_items = 0
+        self.busy_seconds = 0.0
+        self.started_at = time.perf_counter()
+
+
+    def record(self, busy_seconds):
+        self.processed_items += 1
+        self.busy_seconds += busy_seconds
+
+
+    def report(self):
+        """
+        Returns a dict with items processed, items per second and the fraction of time the stage was busy.
+        """
+        elapsed = max(time.perf_counter() - self.started_at, 1e-9)
+        return {
+            "stage": self.name,
+            "processed": self.processed_items,
+            "fps": round(self.processed_items / elapsed, 2),
+            "busy_ratio": round(self.busy_seconds / elapsed, 3),
+        }
+
+
+class FramePipeline:
+    def __init__(self, read_frame, process_frame, render_frame, queue_size=4, drop_policy=BLOCK, report_interval=5.0, metrics=None):
+        """
+        Runs capture, inference and render as separate stages connected by bounded queues.
+
+        :param read_frame: Callable returning the next captured (frame, timestamp) pair, or None when the stream ended.
+        :param process_frame: Callable taking (frame, timestamp), running inference/analytics and returning its result.
+        :param render_frame: Callable taking (frame, result); returns False to stop the pipeline.
+        :param queue_size: Capacity of each inter-stage queue.
+        :param drop_policy: DROP_OLDEST or BLOCK, applied to both queues.
+        :param report_interval: Seconds between throughput reports (None or 0 disables logging them).
+        :param metrics: Optional PipelineMetrics; queue depths and dropped frame counts are exposed as its gauges
+                        while the pipeline runs.
+        """
+        self.read_frame = read_frame
+        self.process_frame = process_frame
+        self.render_frame = render_frame
+        self.report_interval = report_interval
+
+        self.capture_queue = BoundedFrameQueue(queue_size, drop_policy)
+        self.result_queue = BoundedFrameQueue(queue_size, drop_policy)
+        self.stage_throughput = {
+            name: StageThroughput(name) for name in ("capture", "inference", "render")
+        }
+        self._stop_event = threading.Event()
+        self._worker_errors = []
+
+        self.metrics = metrics
+        self._gauges = {
+            "capture_queue_depth": self.capture_queue.qsize,
+            "result_queue_depth": self.result_queue.qsize,
+            "dropped_before_inference": lambda: self.capture_queue.dropped_items,
+            "dropped_before_render": lambda: self.result_queue.dropped_items,
+        }
+        if metrics is not None:
+            for name, read_value in self._gauges.items():
+                metrics.register_gauge(name, read_value)
+
+
+    def _capture_loop(self):
+        stats = self.stage_throughput["capture"]
+        try:
+            while not self._stop_event.is_set():
+                started = time.perf_counter()
+                captured = self.read_frame()
+                if captured is None:
+                    break
+                stats.record(time.perf_counter() - started)
+                if not self.capture_queue.put(captured, self._stop_event):
+                    return
+        except Exception as e:
+            self._worker_errors.append(e)
+        self.capture_queue.put_blocking(_END_OF_STREAM, self._stop_event)  # The end marker must never be dropped
+
+
+    def _inference_loop(self):
+        stats = self.stage_throughput["inference"]
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    captured = self.capture_queue.get()
+                except queue.Empty:
+                    continue
+                if captured is _END_OF_STREAM:
+                    break
+                frame, timestamp = captured
+                started = time.perf_counter()
+                result = self.process_frame(frame, timestamp)
+                stats.record(time.perf_counter() - started)
+                if not self.result_queue.put((frame, result), self._stop_event):
+                    return
+        except Exception as e:
+            self._worker_errors.append(e)
+        self.result_queue.put_blocking(_END_OF_STREAM, self._stop_event)
+
+
+    def throughput_report(self):
+        """
+        Returns per-stage throughput plus queue depths and dropped frame counts.
+        """
+        return {
+            "stages": [stats.report() for stats in self.stage_throughput.values()],
+            "capture_queue_depth": self.capture_queue.qsize(),
+            "result_queue_depth": self.result_queue.qsize(),
+            "dropped_before_inference": self.capture_queue.dropped_items,
+            "dropped_before_render": self.result_queue.dropped_items,
+        }
+
+
+    def log_throughput_report(self):
+        report = self.throughput_report()
+        stages = ", ".join(f"{stage['stage']}: {stage['fps']} fps (busy {stage['busy_ratio']:.0%})" for stage in report["stages"])
+        logger.info("Pipeline throughput - %s, dropped: %s before inference, %s before render",
+                    stages, report["dropped_before_inference"], report["dropped_before_render"])
+
+
+    def run(self):
+        """
+        Starts the capture and inference threads and runs the render stage on the calling thread,
+        since OpenCV windows must be driven from the main thread. Blocks until the stream ends or
+        render_frame returns False.
+        """
+        workers = [
+            threading.Thread(target=self._capture_loop, name="capture", daemon=True),
+            threading.Thread(target=self._inference_loop, name="inference", daemon=True),
+        ]
+        for worker in workers:
+            worker.start()
+
+        stats = self.stage_throughput["render"]
+        last_report = time.perf_counter()
+        try:
+            while True:
+                try:
+                    item = self.result_queue.get()
+                except queue.Empty:
+                    if self._worker_errors:
+                        break
+                    continue
+                if item is _END_OF_STREAM:
+                    break
+
+                frame, result = item
+                started = time.perf_counter()
+                keep_running = self.render_frame(frame, result)
+                stats.record(time.perf_counter() - started)
+                if keep_running is False:
+                    break
+
+                if self.report_interval and time.perf_counter() - last_report >= self.report_interval:
+                    self.log_throughput_report()
+                    last_report = time.perf_counter()
+        finally:
+            self._stop_event.set()
+            for worker in workers:
+                worker.join(timeout=2.0)
+            if self.metrics is not None:
+                for name in self._gauges:
+                    self.metrics.unregister_gauge(name)
+
+        if self._worker_errors:
+            raise self._worker_errors[0]
+        return self.throughput_report()
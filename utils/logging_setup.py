@@ -0,0 +1,122 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+
+
+class RateLimitFilter(logging.Filter):
+    def __init__(self, max_per_second=5.0, burst=20):
+        """
+        Token bucket per call site (logger name, file and line), so a message logged every frame or
+        for every object is capped while rare messages always get through. The number of suppressed
+        records is appended to the next record that passes.
+
+        :param max_per_second: Sustained records per second allowed for one call site.
+        :param burst: Records one call site may emit at once before the rate applies.
+        """
+        super().__init__()
+        self.max_per_second = max_per_second
+        self.burst = burst
+        self._buckets = {}  # (logger name, file, line) -> [tokens, last refill time, suppressed count]
+        self._lock = threading.Lock()
+
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR:
+            return True  # Errors are never dropped
+
+        key = (record.name, record.pathname, record.lineno)  # Bounded by the number of call sites, whatever the message
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(self.burst), now, 0]
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.max_per_second)
+            bucket[1] = now
+            if bucket[0] < 1.0:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1.0
+            suppressed, bucket[2] = bucket[2], 0
+
+        if suppressed:
+            record.msg = f"{record.msg} [{suppressed} similar messages suppressed]"
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never blocks the caller: when the bounded queue is full the record is dropped and counted.
+    """
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped_records = 0
+
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped_records += 1
+
+
+_listener = None
+
+
+def configure_logging(level=logging.INFO, log_file=None, max_per_second=5.0, burst=20, queue_size=10000, quiet_ultralytics=True):
+    """
+    Routes all logging through a bounded queue drained by a background thread, so the processing loop
+    only pays for building a record (or nothing at all when the level is disabled).
+
+    :param level: Root level, e.g. logging.INFO; DEBUG turns on per-frame and per-object diagnostics.
+    :param log_file: Optional file receiving the same records as the console.
+    :param max_per_second: Rate limit per call site (None disables rate limiting).
+    :param burst: Burst size of the rate limit.
+    :param queue_size: Records buffered before new ones are dropped.
+    :param quiet_ultralytics: Raise the ultralytics logger to WARNING to drop its per-frame output.
+    :return: The DroppingQueueHandler installed on the root logger.
+    """
+    global _listener
+    shutdown_logging()  # Reconfiguring: flush and close the previous listener's handlers first
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    output_handlers = [logging.StreamHandler()]
+    if log_file:
+        output_handlers.append(logging.FileHandler(log_file))
+    for output_handler in output_handlers:
+        output_handler.setFormatter(formatter)
+
+    queue_handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+    if max_per_second:
+        queue_handler.addFilter(RateLimitFilter(max_per_second, burst))
+
+    root_logger = logging.getLogger()
+    for existing_handler in list(root_logger.handlers):
+        root_logger.removeHandler(existing_handler)
+        existing_handler.close()
+    root_logger.addHandler(queue_handler)
+    root_logger.setLevel(level)
+    if quiet_ultralytics:
+        logging.getLogger("ultralytics").setLevel(logging.WARNING)
+
+    _listener = logging.handlers.QueueListener(queue_handler.queue, *output_handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.unregister(shutdown_logging)  # Registered once, however often logging is reconfigured
+    atexit.register(shutdown_logging)
+    return queue_handler
+
+
+def shutdown_logging():
+    """
+    Flushes queued records, stops the background thread and closes the console and file handlers.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for output_handler in _listener.handlers:
+            output_handler.close()
+        _listener = None
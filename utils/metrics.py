@@ -0,0 +1,254 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+PIPELINE_STAGES = ("capture", "inference", "postprocess", "analytics", "annotation", "display")
+
+
+class RollingHistogram:
+    def __init__(self, window_size=1024):
+        """
+        Keeps the last `window_size` samples in a preallocated ring; recording is O(1) and percentiles
+        are only computed when a snapshot is taken.
+        """
+        self.samples = np.zeros(window_size, dtype=np.float64)
+        self.position = 0
+        self.filled = 0
+        self.count = 0
+        self.total = 0.0
+
+
+    def record(self, value):
+        self.samples[self.position] = value
+        self.position = (self.position + 1) % len(self.samples)
+        self.filled = min(self.filled + 1, len(self.samples))
+        self.count += 1
+        self.total += value
+
+
+    def summary(self, scale=1000.0):
+        """
+        Returns count, mean and p50/p95/p99 of the window, scaled (seconds -> milliseconds by default).
+        """
+        if self.filled == 0:
+            return {"count": self.count}
+        window = self.samples[:self.filled] * scale
+        p50, p95, p99 = np.percentile(window, (50, 95, 99))
+        return {
+            "count": self.count,
+            "mean_ms": round(float(window.mean()), 3),
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3),
+            "max_ms": round(float(window.max()), 3),
+        }
+
+
+class _StageTimer:
+    __slots__ = ("metrics", "stage", "started")
+
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+
+    def __exit__(self, *exc_info):
+        self.metrics.record(self.stage, time.perf_counter() - self.started)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class PipelineMetrics:
+    def __init__(self, enabled=True, window_size=1024):
+        """
+        Per-stage latency histograms (capture, inference, postprocess, analytics, annotation, display),
+        counters and gauges for one processing loop.
+
+        Cheap enough to leave on: a timed stage costs two perf_counter calls and one ring write.
+        Can be switched off and on at runtime with enabled, or over HTTP (see start_http_server).
+
+        :param enabled: Whether stages are timed; disabled timers are a shared no-op.
+        :param window_size: Number of recent samples each histogram keeps for its percentiles.
+        """
+        self.enabled = enabled
+        self.window_size = window_size
+        self.histograms = {stage: RollingHistogram(window_size) for stage in PIPELINE_STAGES}
+        self.counters = {}
+        self.gauges = {}  # name -> callable evaluated at snapshot time (queue depths, dropped frames, ...)
+        self.started_at = time.time()
+        self._http_server = None
+        self._dump_stop_event = threading.Event()
+        self._dump_thread = None
+
+
+    def time_stage(self, stage):
+        """
+        Context manager timing one stage:  with metrics.time_stage("inference"): ...
+        """
+        return _StageTimer(self, stage) if self.enabled else _NULL_TIMER
+
+
+    def record(self, stage, seconds):
+        if not self.enabled:
+            return
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms.setdefault(stage, RollingHistogram(self.window_size))
+        histogram.record(seconds)
+
+
+    def increment(self, counter, amount=1):
+        if self.enabled:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+
+    def register_gauge(self, name, read_value):
+        """
+        Registers a callable whose value is read whenever a snapshot is taken.
+        """
+        self.gauges[name] = read_value
+
+
+    def unregister_gauge(self, name):
+        self.gauges.pop(name, None)
+
+
+    def snapshot(self):
+        """
+        Returns all stage percentiles, counters and gauges as a JSON-serializable dict.
+        """
+        gauges = {}
+        for name, read_value in list(self.gauges.items()):
+            try:
+                gauges[name] = read_value()
+            except Exception as e:
+                gauges[name] = f"error: {e}"
+        return {
+            "timestamp": time.time(),
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "enabled": self.enabled,
+            "stages": {stage: histogram.summary() for stage, histogram in list(self.histograms.items())},
+            "counters": dict(self.counters),
+            "gauges": gauges,
+        }
+
+
+    def prometheus_text(self):
+        """
+        Renders the snapshot in the Prometheus text exposition format.
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for stage, summary in snapshot["stages"].items():
+            lines.append(f'traffic_stage_calls_total{{stage="{stage}"}} {summary["count"]}')
+            for quantile in ("p50", "p95", "p99"):
+                if f"{quantile}_ms" in summary:
+                    lines.append(f'traffic_stage_latency_ms{{stage="{stage}",quantile="0.{quantile[1:]}"}} {summary[quantile + "_ms"]}')
+        for name, value in snapshot["counters"].items():
+            lines.append(f'traffic_{name}_total {value}')
+        for name, value in snapshot["gauges"].items():
+            if isinstance(value, (int, float)):
+                lines.append(f'traffic_{name} {value}')
+        return "\n".join(lines) + "\n"
+
+
+    def start_http_server(self, port=9100, host="127.0.0.1"):
+        """
+        Serves metrics on a background thread:
+            GET  /metrics             JSON snapshot
+            GET  /metrics/prometheus  Prometheus text format
+            POST /metrics/enable, /metrics/disable   runtime toggle
+        """
+        metrics = self
+
+        class MetricsRequestHandler(BaseHTTPRequestHandler):
+            def _respond(self, status, body, content_type="application/json"):
+                payload = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                if self.path == "/metrics":
+                    self._respond(200, json.dumps(metrics.snapshot()))
+                elif self.path == "/metrics/prometheus":
+                    self._respond(200, metrics.prometheus_text(), "text/plain; version=0.0.4")
+                else:
+                    self._respond(404, json.dumps({"error": "not found"}))
+
+            def do_POST(self):
+                if self.path in ("/metrics/enable", "/metrics/disable"):
+                    metrics.enabled = self.path.endswith("enable")
+                    self._respond(200, json.dumps({"enabled": metrics.enabled}))
+                else:
+                    self._respond(404, json.dumps({"error": "not found"}))
+
+            def log_message(self, format, *args):
+                pass  # Keep scrapes out of the console
+
+        self._http_server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+        threading.Thread(target=self._http_server.serve_forever, name="metrics-http", daemon=True).start()
+        return self._http_server.server_address
+
+
+    def dump_json(self, output_path):
+        """
+        Writes the snapshot atomically (temporary file + rename) so readers never see a partial file.
+        """
+        temporary_path = f"{output_path}.tmp"
+        with open(temporary_path, "w") as output_file:
+            json.dump(self.snapshot(), output_file, indent=2)
+        os.replace(temporary_path, output_path)
+
+
+    def start_json_dump(self, output_path, interval_seconds=10.0):
+        """
+        Dumps the snapshot to output_path every interval_seconds on a background thread.
+        """
+        def dump_loop():
+            while not self._dump_stop_event.wait(interval_seconds):
+                self.dump_json(output_path)
+
+        self._dump_stop_event.clear()
+        self._dump_thread = threading.Thread(target=dump_loop, name="metrics-dump", daemon=True)
+        self._dump_thread.start()
+
+
+    def stop(self):
+        """
+        Stops the HTTP server and the periodic dump, if running.
+        """
+        if self._http_server is not None:
+            self._http_server.shutdown()
+            self._http_server.server_close()
+            self._http_server = None
+        if self._dump_thread is not None:
+            self._dump_stop_event.set()
+            self._dump_thread.join(timeout=2.0)
+            self._dump_thread = None
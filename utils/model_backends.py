@@ -0,0 +1,242 @@
+"""
+Optimized inference backends for the YOLO models: ONNX Runtime and OpenVINO exports, with optional FP16/INT8
+quantization, cached on disk by weights hash, input size, backend and precision.
+
+Usage (from the repository root):
+    python -m utils.model_backends export --model Models/Yolov12/weights/yolov12n.pt --backend openvino --precision int8
+    python -m utils.model_backends compare --model Models/Yolov12/weights/yolov12n.pt --clip media/videos/sample.mp4 \
+        --backends pytorch:fp32 onnx:fp32 onnx:int8 openvino:fp16 openvino:int8
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("pytorch", "onnx", "openvino")
+PRECISIONS = ("fp32", "fp16", "int8")
+DEFAULT_CACHE_DIR = os.path.join("Models", "cache")
+
+
+def weights_hash(model_path, chunk_size=1 << 20):
+    """
+    Returns the first 16 hex digits of the SHA-256 of the weights file.
+    """
+    digest = hashlib.sha256()
+    with open(model_path, "rb") as weights_file:
+        for chunk in iter(lambda: weights_file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def cached_artifact_path(model_path, backend, imgsz=640, precision="fp32", cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Returns where the exported model for this weights file/backend/input size/precision is cached.
+    """
+    model_name = os.path.splitext(os.path.basename(model_path))[0]
+    cache_key = f"{model_name}-{weights_hash(model_path)}-{backend}-{imgsz}-{precision}"
+    if backend == "onnx":
+        return os.path.join(cache_dir, f"{cache_key}.onnx")
+    return os.path.join(cache_dir, f"{cache_key}_openvino_model")  # ultralytics recognizes OpenVINO dirs by this suffix
+
+
+def export_model(model_path, backend, imgsz=640, precision="fp32", cache_dir=DEFAULT_CACHE_DIR, calibration_data=None):
+    """
+    Exports the .pt weights to ONNX or OpenVINO unless a cached export already exists, and returns its path.
+
+    :param backend: "onnx" or "openvino".
+    :param precision: "fp32", "fp16" or "int8". ONNX INT8 uses ONNX Runtime dynamic quantization;
+                      OpenVINO INT8 uses NNCF post-training quantization on calibration_data.
+    :param calibration_data: Dataset YAML for OpenVINO INT8 calibration (ultralytics defaults to coco8.yaml).
+    """
+    if backend not in ("onnx", "openvino"):
+        raise ValueError(f"Only onnx and openvino models are exported, not {backend}")
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision}")
+
+    artifact_path = cached_artifact_path(model_path, backend, imgsz, precision, cache_dir)
+    if os.path.exists(artifact_path):
+        return artifact_path
+
+    from ultralytics import YOLO  # Imported lazily: pulling in torch takes seconds
+
+    os.makedirs(cache_dir, exist_ok=True)
+    started = time.perf_counter()
+    export_options = {"format": backend, "imgsz": imgsz, "half": precision == "fp16"}
+    if backend == "openvino" and precision == "int8":
+        export_options["int8"] = True
+        if calibration_data:
+            export_options["data"] = calibration_data
+    exported_path = YOLO(model_path).export(**export_options)
+
+    if backend == "onnx" and precision == "int8":
+        try:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+        except ImportError:
+            raise ValueError("ONNX INT8 quantization requires onnxruntime (pip install onnxruntime).")
+        quantize_dynamic(exported_path, artifact_path, weight_type=QuantType.QUInt8)
+        os.remove(exported_path)
+    else:
+        shutil.move(exported_path, artifact_path)  # Exports land next to the weights; keep them in the cache instead
+
+    logger.info("Exported %s to %s in %.1f s", model_path, artifact_path, time.perf_counter() - started)
+    return artifact_path
+
+
+def load_model(model_path, backend="pytorch", imgsz=640, precision="fp32", cache_dir=DEFAULT_CACHE_DIR, calibration_data=None):
+    """
+    Loads a YOLO model on the requested backend, exporting and caching it on first use.
+    Exported models are driven through the same ultralytics API (predict/track) as .pt weights.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown model backend: {backend}")
+    from ultralytics import YOLO  # Imported lazily: pulling in torch takes seconds
+
+    if backend == "pytorch":
+        model = YOLO(model_path)
+        model.eval()  # Set model to evaluation mode
+        return model
+    return YOLO(export_model(model_path, backend, imgsz, precision, cache_dir, calibration_data), task="detect")
+
+
+def read_sample_frames(clip_path, max_frames=100):
+    video_capture = cv2.VideoCapture(clip_path)
+    if not video_capture.isOpened():
+        raise ValueError(f"Error: Could not open {clip_path}")
+    frames = []
+    while len(frames) < max_frames:
+        frame_available, frame = video_capture.read()
+        if not frame_available:
+            break
+        frames.append(frame)
+    video_capture.release()
+    return frames
+
+
+def _box_iou(boxes_a, boxes_b):
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(boxes_a[:, 2:] - boxes_a[:, :2], axis=1)
+    area_b = np.prod(boxes_b[:, 2:] - boxes_b[:, :2], axis=1)
+    return intersection / np.maximum(area_a[:, None] + area_b[None, :] - intersection, 1e-9)
+
+
+def detection_drift(reference_detections, candidate_detections, iou_threshold=0.5):
+    """
+    Compares per-frame detections (boxes, classes, confidences) of a candidate backend against a reference.
+
+    :return: Dict with the share of reference boxes matched by a same-class candidate box (recall), extra
+             candidate boxes, and the mean IoU and absolute confidence difference of the matches.
+    """
+    matched, reference_total, candidate_total = 0, 0, 0
+    matched_ious, confidence_differences = [], []
+    for (reference_boxes, reference_classes, reference_confidences), (boxes, classes, confidences) in zip(reference_detections, candidate_detections):
+        reference_total += len(reference_boxes)
+        candidate_total += len(boxes)
+        if len(reference_boxes) == 0 or len(boxes) == 0:
+            continue
+        iou = _box_iou(reference_boxes, boxes)
+        iou[reference_classes[:, None] != classes[None, :]] = 0.0
+        available = np.ones(len(boxes), dtype=bool)
+        for reference_index in np.argsort(-reference_confidences):  # Greedy matching, most confident first
+            candidate_ious = np.where(available, iou[reference_index], 0.0)
+            candidate_index = int(np.argmax(candidate_ious))
+            if candidate_ious[candidate_index] < iou_threshold:
+                continue
+            available[candidate_index] = False
+            matched += 1
+            matched_ious.append(iou[reference_index, candidate_index])
+            confidence_differences.append(abs(reference_confidences[reference_index] - confidences[candidate_index]))
+    return {
+        "reference_boxes": reference_total,
+        "candidate_boxes": candidate_total,
+        "recall_vs_reference": round(matched / max(reference_total, 1), 4),
+        "extra_boxes": candidate_total - matched,
+        "mean_matched_iou": round(float(np.mean(matched_ious)), 4) if matched_ious else None,
+        "mean_confidence_difference": round(float(np.mean(confidence_differences)), 4) if confidence_differences else None,
+    }
+
+
+def compare_backends(model_path, clip_path, backend_precisions, imgsz=640, max_frames=100, conf_threshold=0.25,
+                     cache_dir=DEFAULT_CACHE_DIR, calibration_data=None):
+    """
+    Runs every (backend, precision) pair over the same frames of a sample clip and reports load time,
+    latency percentiles and detection drift against the first pair (normally pytorch/fp32).
+    """
+    frames = read_sample_frames(clip_path, max_frames)
+    if not frames:
+        raise ValueError(f"No frames could be read from {clip_path}")
+
+    report = []
+    reference_detections = None
+    for backend, precision in backend_precisions:
+        load_started = time.perf_counter()
+        model = load_model(model_path, backend, imgsz, precision, cache_dir, calibration_data)
+        load_seconds = time.perf_counter() - load_started
+
+        model.predict(frames[0], imgsz=imgsz, conf=conf_threshold, verbose=False)  # Warm-up, not timed
+        latencies, detections = [], []
+        for frame in frames:
+            started = time.perf_counter()
+            result = model.predict(frame, imgsz=imgsz, conf=conf_threshold, verbose=False)[0]
+            latencies.append(time.perf_counter() - started)
+            detections.append((result.boxes.xyxy.cpu().numpy(), result.boxes.cls.cpu().numpy(), result.boxes.conf.cpu().numpy()))
+
+        latencies_ms = np.array(latencies) * 1000.0
+        entry = {
+            "backend": backend,
+            "precision": precision,
+            "load_seconds": round(load_seconds, 2),
+            "p50_ms": round(float(np.percentile(latencies_ms, 50)), 2),
+            "p95_ms": round(float(np.percentile(latencies_ms, 95)), 2),
+            "frames_per_second": round(1000.0 / float(latencies_ms.mean()), 2),
+        }
+        if reference_detections is None:
+            reference_detections = detections
+        else:
+            entry["drift"] = detection_drift(reference_detections, detections)
+        report.append(entry)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export and cache a model")
+    export_parser.add_argument("--backend", choices=("onnx", "openvino"), required=True)
+    export_parser.add_argument("--precision", choices=PRECISIONS, default="fp32")
+
+    compare_parser = subparsers.add_parser("compare", help="Compare latency and detection drift between backends")
+    compare_parser.add_argument("--clip", required=True, help="Sample video")
+    compare_parser.add_argument("--backends", nargs="+", default=["pytorch:fp32", "onnx:fp32", "openvino:fp32"],
+                                help="backend:precision pairs; the first one is the accuracy reference")
+    compare_parser.add_argument("--frames", type=int, default=100)
+
+    for subparser in (export_parser, compare_parser):
+        subparser.add_argument("--model", required=True, help="Path to the .pt weights")
+        subparser.add_argument("--imgsz", type=int, default=640)
+        subparser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+        subparser.add_argument("--calibration-data", default=None, help="Dataset YAML for OpenVINO INT8 calibration")
+    arguments = parser.parse_args()
+
+    if arguments.command == "export":
+        print(export_model(arguments.model, arguments.backend, arguments.imgsz, arguments.precision,
+                           arguments.cache_dir, arguments.calibration_data))
+    else:
+        backend_precisions = [tuple(pair.split(":")) if ":" in pair else (pair, "fp32") for pair in arguments.backends]
+        print(json.dumps(compare_backends(arguments.model, arguments.clip, backend_precisions, arguments.imgsz,
+                                          arguments.frames, cache_dir=arguments.cache_dir,
+                                          calibration_data=arguments.calibration_data), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    def __init__(self, method="diff", thumbnail_width=160, pixel_threshold=25, min_changed_fraction=0.002,
+                 regions=None, keepalive_frames=30, hold_frames=5, history=500):
+        """
+        Decides whether a frame needs detection by looking for motion on a small grayscale thumbnail.
+        Static frames (empty road at night) skip the model; the tracker re-emits its last tracks for them.
+
+        :param method: "diff" compares each thumbnail with the previous one; "mog2" uses OpenCV's MOG2
+                       background subtractor, which ignores slow lighting changes better but costs more.
+        :param thumbnail_width: Width the frame is downscaled to before the motion check.
+        :param pixel_threshold: Grayscale difference (0-255) for a thumbnail pixel to count as changed ("diff" only).
+        :param min_changed_fraction: Share of (masked) thumbnail pixels that must change to run detection.
+                                     Lower is more sensitive.
+        :param regions: Optional polygons (lists of (x, y) frame points) restricting the check to the area that
+                        matters, e.g. around the lines and zones. The whole frame is checked when None.
+        :param keepalive_frames: Detection runs at least every this many frames, so stopped objects stay confirmed.
+        :param hold_frames: Detection keeps running this many frames after the last motion, so objects leaving
+                            the scene are seen until they are gone.
+        :param history: Frames of background history for "mog2".
+        """
+        if method not in ("diff", "mog2"):
+            raise ValueError(f"Unknown motion gate method: {method}")
+        self.method = method
+        self.thumbnail_width = thumbnail_width
+        self.pixel_threshold = pixel_threshold
+        self.min_changed_fraction = min_changed_fraction
+        self.regions = regions
+        self.keepalive_frames = keepalive_frames
+        self.hold_frames = hold_frames
+        self.background_subtractor = cv2.createBackgroundSubtractorMOG2(history=history, detectShadows=False) if method == "mog2" else None
+
+        self.previous_thumbnail = None
+        self.mask = None
+        self.mask_pixels = 0
+        self.frames_since_detection = 0
+        self.frames_since_motion = None
+
+        self.detected_frames = 0
+        self.skipped_frames = 0
+        self.gate_seconds = 0.0
+        self.average_inference_seconds = None
+
+
+    def _thumbnail(self, frame):
+        height, width = frame.shape[:2]
+        thumbnail_height = max(1, int(height * self.thumbnail_width / width))
+        thumbnail = cv2.resize(frame, (self.thumbnail_width, thumbnail_height), interpolation=cv2.INTER_AREA)
+        if thumbnail.ndim == 3:
+            thumbnail = cv2.cvtColor(thumbnail, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(thumbnail, (3, 3), 0)  # Suppresses sensor noise that would count as motion
+
+
+    def _build_mask(self, frame_shape, thumbnail_shape):
+        self.mask = None
+        self.mask_pixels = thumbnail_shape[0] * thumbnail_shape[1]
+        if not self.regions:
+            return
+        scale = thumbnail_shape[1] / float(frame_shape[1])
+        self.mask = np.zeros(thumbnail_shape, dtype=np.uint8)
+        polygons = [np.round(np.asarray(points, dtype=np.float64) * scale).astype(np.int32).reshape((-1, 1, 2))
+                    for points in self.regions if len(points) >= 3]
+        cv2.fillPoly(self.mask, polygons, 255)
+        self.mask_pixels = max(1, cv2.countNonZero(self.mask))
+
+
+    def motion_fraction(self, thumbnail):
+        """
+        Returns the share of (masked) thumbnail pixels that changed, or None when there is nothing to compare to yet.
+        """
+        if self.background_subtractor is not None:
+            changed = self.background_subtractor.apply(thumbnail)
+            if self.previous_thumbnail is None:
+                return None  # The subtractor has no background model yet
+        else:
+            if self.previous_thumbnail is None:
+                return None
+            changed = cv2.threshold(cv2.absdiff(thumbnail, self.previous_thumbnail), self.pixel_threshold, 255, cv2.THRESH_BINARY)[1]
+        if self.mask is not None:
+            changed = cv2.bitwise_and(changed, self.mask)
+        return cv2.countNonZero(changed) / float(self.mask_pixels)
+
+
+    def should_detect(self, frame):
+        """
+        Returns True if the frame needs detection, False if the scene is static and the last tracks still hold.
+        """
+        started = time.perf_counter()
+        thumbnail = self._thumbnail(frame)
+        if self.previous_thumbnail is None or thumbnail.shape != self.previous_thumbnail.shape:
+            self._build_mask(frame.shape, thumbnail.shape)
+            self.previous_thumbnail = None
+
+        changed_fraction = self.motion_fraction(thumbnail)
+        self.previous_thumbnail = thumbnail
+        if changed_fraction is None or changed_fraction >= self.min_changed_fraction:
+            self.frames_since_motion = 0
+        elif self.frames_since_motion is not None:
+            self.frames_since_motion += 1
+
+        detect = bool(
+            self.frames_since_motion is None
+            or self.frames_since_motion <= self.hold_frames
+            or self.frames_since_detection + 1 >= self.keepalive_frames
+        )
+        if detect:
+            self.frames_since_detection = 0
+            self.detected_frames += 1
+        else:
+            self.frames_since_detection += 1
+            self.skipped_frames += 1
+        self.gate_seconds += time.perf_counter() - started
+        return detect
+
+
+    def record_inference_latency(self, inference_seconds):
+        """
+        Tracks the average detection cost, used to estimate the time saved by skipped frames.
+        """
+        if self.average_inference_seconds is None:
+            self.average_inference_seconds = inference_seconds
+        else:
+            self.average_inference_seconds = 0.8 * self.average_inference_seconds + 0.2 * inference_seconds
+
+
+    def stats(self):
+        """
+        Returns the skipped share of frames, the gate's own cost and the estimated detection time saved.
+        """
+        total_frames = self.detected_frames + self.skipped_frames
+        saved_seconds = None
+        if self.average_inference_seconds is not None:
+            saved_seconds = self.skipped_frames * self.average_inference_seconds - self.gate_seconds
+        return {
+            "frames": total_frames,
+            "skipped_frames": self.skipped_frames,
+            "skipped_fraction": round(self.skipped_frames / total_frames, 4) if total_frames else 0.0,
+            "gate_ms_per_frame": round(1000.0 * self.gate_seconds / total_frames, 3) if total_frames else 0.0,
+            "estimated_seconds_saved": round(saved_seconds, 2) if saved_seconds is not None else None,
+        }
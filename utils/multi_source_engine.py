@@ -0,0 +1,189 @@
+import logging
+import time
+from utils.byte_tracking import create_byte_tracker, apply_byte_tracker
+from utils.output_sinks import WindowSink
+from utils.frame_pipeline import is_live_source
+from utils.stream_ingestion import ResilientStream
+
+logger = logging.getLogger(__name__)
+
+
+class VideoSource:
+    def __init__(self, source_id, stream_manager, tracker_config="bytetrack.yaml", roi_cropper=None, motion_gate=None,
+                 stream_options=None):
+        """
+        One camera/file feeding the engine, with its own capture, ByteTrack state and analytics.
+
+        :param source_id: Name used for logging and the display window.
+        :param stream_manager: Line, Zone or Speed StreamManager whose analytics receive this source's results.
+        :param roi_cropper: Optional RoiCropper restricting this source's detection to its regions of interest.
+        :param motion_gate: Optional MotionGate; this source's static frames stay out of the batch.
+        :param stream_options: ResilientStream arguments such as reconnect, the backoff settings, the capture
+                               backend and inference_resolution. Live sources always grab on their own thread, so
+                               a dropped camera reconnects there while the other sources keep running.
+        """
+        self.source_id = source_id
+        self.stream_manager = stream_manager
+        self.roi_cropper = roi_cropper
+        self.motion_gate = motion_gate
+        self.last_tracked_objects = None
+        stream_options = dict(stream_options or {})
+        if is_live_source(stream_manager.input_media_source):
+            stream_options["latest_frame_only"] = True
+        self.stream = ResilientStream(
+            stream_manager.input_media_source,
+            metrics=stream_manager.metrics,
+            full_resolution=stream_manager.output_sink.requires_annotation,  # Full frames only when they are drawn on
+            **stream_options
+        )
+        self.frame = None  # Last delivered frame; the next one is decoded into it
+
+        frame_rate = self.stream.frames_per_second or 30
+        self.byte_tracker = create_byte_tracker(tracker_config, frame_rate=int(round(frame_rate)))
+        self.active = True
+
+
+    def read_frame(self):
+        """
+        Returns the next (frame, capture timestamp) pair without waiting for a live source, or None when it
+        has no new frame yet; a source that ended is closed (see active).
+        """
+        read_started = time.perf_counter()
+        captured = self.stream.poll(frame=self.frame)  # The last frame was rendered in the previous step
+        if captured is not None:
+            self.frame = captured[0]
+            self.stream_manager.metrics.record("capture", time.perf_counter() - read_started)
+        elif self.stream.ended:
+            logger.info("Source '%s' ended. Closing it.", self.source_id)
+            self.release()
+        return captured
+
+
+    def release(self):
+        if self.active:
+            self.active = False
+            self.stream.release()
+
+
+class MultiSourceEngine:
+    def __init__(self, tracker, tracker_config="bytetrack.yaml", stream_options=None, idle_wait_seconds=0.005):
+        """
+        Runs one shared YOLO model over many sources with a single batched predict call per step.
+
+        :param tracker: ObjectTracker holding the shared model, class filter and confidence threshold.
+                        Pass the same instance to every StreamManager added to the engine.
+        :param tracker_config: ByteTrack configuration; each source gets its own tracker instance so
+                               track IDs never mix between cameras.
+        :param stream_options: ResilientStream arguments for every source, e.g. the reconnect and backoff settings.
+        :param idle_wait_seconds: Pause before polling again when no source had a new frame.
+        """
+        self.tracker = tracker
+        self.tracker_config = tracker_config
+        self.stream_options = stream_options
+        self.idle_wait_seconds = idle_wait_seconds
+        self.sources = []
+
+
+    def add_source(self, source_id, stream_manager, roi_cropper=None, motion_gate=None):
+        """
+        Registers a StreamManager built with tracker=engine.tracker and opens its input.
+        With a roi_cropper, the source's crops join the batch instead of its full frame; with a motion_gate,
+        its frames only join the batch when something moved.
+        """
+        if isinstance(stream_manager.output_sink, WindowSink):
+            stream_manager.output_sink.window_name = f"Object Tracking [{source_id}]"
+        self.sources.append(VideoSource(source_id, stream_manager, self.tracker_config, roi_cropper, motion_gate,
+                                        self.stream_options))
+
+
+    def process_batch(self, sources, frames, timestamps):
+        """
+        Runs batched detection on one frame per source, then tracking and analytics per source. Sources with an
+        inference_resolution are detected and tracked at that size and their boxes mapped back to source pixels.
+
+        :param timestamps: Capture timestamp of each frame, passed on to the analytics.
+
+        :return: List of tracked objects, one entry per source, in the same order as frames.
+        """
+        metrics = self.tracker.metrics
+        batch_images, batch_slices, detection_frames = [], [], []
+        for source, frame in zip(sources, frames):
+            if (source.motion_gate is not None and source.last_tracked_objects is not None
+                    and not source.motion_gate.should_detect(frame)):
+                batch_slices.append(None)  # Static frame: the source keeps its last tracks
+                detection_frames.append(None)
+                metrics.increment("motion_gated_frames")
+                continue
+            detection_frame = source.stream.inference_frame(frame)
+            images = [detection_frame] if source.roi_cropper is None else source.roi_cropper.crop(detection_frame)
+            batch_slices.append(slice(len(batch_images), len(batch_images) + len(images)))
+            batch_images.extend(images)
+            detection_frames.append(detection_frame)
+
+        detection_results = []
+        if batch_images:
+            inference_started = time.perf_counter()
+            with metrics.time_stage("inference"):
+                detection_results = self.tracker.model.predict(
+                    batch_images,
+                    verbose=False,
+                    classes=self.tracker.expected_class_ids
+                )
+            image_seconds = (time.perf_counter() - inference_started) / len(batch_images)
+
+        tracked_objects_per_source = []
+        for source, frame, detection_frame, timestamp, batch_slice in zip(sources, frames, detection_frames, timestamps, batch_slices):
+            frame_shape = source.stream.source_frame_shape(frame)
+            if batch_slice is None:
+                tracked_objects = source.last_tracked_objects.select(slice(None))
+                source.stream_manager.run_analytics(tracked_objects, frame_shape, timestamp)
+                tracked_objects_per_source.append(tracked_objects)
+                continue
+            if source.motion_gate is not None:
+                source.motion_gate.record_inference_latency(image_seconds * (batch_slice.stop - batch_slice.start))
+            with metrics.time_stage("postprocess"):
+                if source.roi_cropper is None:
+                    detection_result = detection_results[batch_slice.start]
+                else:
+                    detection_result = source.roi_cropper.merge_results(detection_frame, detection_results[batch_slice])
+                tracked_result = apply_byte_tracker(source.byte_tracker, detection_result, detection_frame)
+                tracked_objects = self.tracker.process_tracked_objects([tracked_result])
+                tracked_objects = source.stream.to_source_coordinates(tracked_objects, frame_shape)
+            source.last_tracked_objects = tracked_objects
+            source.stream_manager.run_analytics(tracked_objects, frame_shape, timestamp)  # Route results to this source's analytics
+            source.stream.record_frame_age(timestamp)
+            tracked_objects_per_source.append(tracked_objects)
+        return tracked_objects_per_source
+
+
+    def run(self):
+        """
+        Reads one frame from every active source that has a new one, processes them as a batch and hands each
+        result to its stream manager's output sink until all sources end or a sink asks to stop. A source
+        that is reconnecting or has no new frame yet just sits out the step.
+        """
+        try:
+            while any(source.active for source in self.sources):
+                sources, frames, timestamps = [], [], []
+                for source in self.sources:
+                    if not source.active:
+                        continue
+                    captured = source.read_frame()
+                    if captured is not None:
+                        sources.append(source)
+                        frames.append(captured[0])
+                        timestamps.append(captured[1])
+
+                if not frames:
+                    time.sleep(self.idle_wait_seconds)  # No new frame anywhere; don't spin
+                    continue
+
+                tracked_objects_per_source = self.process_batch(sources, frames, timestamps)
+
+                for source, frame, tracked_objects in zip(sources, frames, tracked_objects_per_source):
+                    if not source.stream_manager.render_frame(frame, tracked_objects):
+                        return
+        finally:
+            for source in self.sources:
+                source.release()
+                source.stream_manager.output_sink.close()
@@ -0,0 +1,403 @@
+"""
+Offline reprocessing of recorded videos, sharded into overlapping time chunks across a process pool.
+
+Usage (from the repository root):
+    python -m utils.offline_batch recordings/ --model Models/Yolov12/weights/yolov12n.pt \
+        --lines '[[[50, 400], [1300, 200]]]' --zones '{"lot": [[100, 200], [400, 250], [350, 500]]}' \
+        --workers 4 --output events.jsonl
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from utils.events import SpeedThresholdMonitor, ZoneEventTracker, line_crossing_events
+
+logger = logging.getLogger(__name__)
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mkv", ".mov", ".m4v", ".ts")
+
+DEFAULT_ANALYTICS_CONFIG = {
+    "model_path": "Models/Yolov12/weights/yolov12n.pt",
+    "conf_threshold": 0.3,
+    "objects_of_interest": ["person", "car"],
+    "use_gpu": False,
+    "backend": "pytorch",  # "onnx"/"openvino" are exported once and shared by all workers through the cache
+    "precision": "fp32",
+    "starting_points_of_lines": [],
+    "ending_points_of_lines": [],
+    "line_names": None,
+    "zones": None,
+    "pixels_per_meter": 10,
+    "homography": None,
+    "speed_threshold_kph": None,
+}
+
+
+class VideoChunk:
+    __slots__ = ("video_path", "chunk_index", "warmup_start_frame", "start_frame", "end_frame",
+                 "frames_per_second", "overlap_frames")
+
+
+    def __init__(self, video_path, chunk_index, warmup_start_frame, start_frame, end_frame, frames_per_second, overlap_frames):
+        """
+        A time range of one video. Frames in [warmup_start_frame, start_frame) only warm up the tracker and are
+        used to stitch tracks with the previous chunk; events are emitted for [start_frame, end_frame).
+        """
+        self.video_path = video_path
+        self.chunk_index = chunk_index
+        self.warmup_start_frame = warmup_start_frame
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        self.frames_per_second = frames_per_second
+        self.overlap_frames = overlap_frames
+
+
+def collect_video_paths(inputs):
+    """
+    Expands a list of files and directories into a sorted list of video files.
+    """
+    video_paths = []
+    for input_path in inputs:
+        if os.path.isdir(input_path):
+            for directory, _, file_names in os.walk(input_path):
+                video_paths.extend(os.path.join(directory, file_name) for file_name in file_names
+                                   if file_name.lower().endswith(VIDEO_EXTENSIONS))
+        else:
+            video_paths.append(input_path)
+    return sorted(video_paths)
+
+
+def plan_chunks(video_paths, chunk_seconds=300, overlap_seconds=5):
+    """
+    Splits every video into chunks of chunk_seconds, each preceded by overlap_seconds of warm-up frames.
+    Videos whose container does not report a frame count are processed as one chunk.
+    """
+    chunks = []
+    for video_path in video_paths:
+        video_capture = cv2.VideoCapture(video_path)
+        if not video_capture.isOpened():
+            raise ValueError(f"Error: Could not open {video_path}")
+        frame_count = int(video_capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        frames_per_second = video_capture.get(cv2.CAP_PROP_FPS) or 30
+        video_capture.release()
+
+        chunk_frames = max(1, int(chunk_seconds * frames_per_second))
+        overlap_frames = int(overlap_seconds * frames_per_second)
+        if frame_count <= 0:
+            logger.warning("%s does not report its frame count; processing it as a single chunk.", video_path)
+            chunks.append(VideoChunk(video_path, 0, 0, 0, sys.maxsize, frames_per_second, overlap_frames))  # Read to the end
+            continue
+        for chunk_index, start_frame in enumerate(range(0, frame_count, chunk_frames)):
+            chunks.append(VideoChunk(
+                video_path, chunk_index,
+                warmup_start_frame=max(0, start_frame - overlap_frames),
+                start_frame=start_frame,
+                end_frame=min(frame_count, start_frame + chunk_frames),
+                frames_per_second=frames_per_second,
+                overlap_frames=overlap_frames
+            ))
+    return chunks
+
+
+_worker_state = {}
+
+
+def _initialize_worker(analytics_config):
+    """
+    Loads one model per worker process; it is reused for every chunk the worker receives.
+    """
+    from LineIntrusionDetector.object_tracker import ObjectTracker
+    _worker_state["config"] = analytics_config
+    _worker_state["tracker"] = ObjectTracker(
+        analytics_config["model_path"],
+        analytics_config["conf_threshold"],
+        analytics_config["objects_of_interest"],
+        analytics_config["use_gpu"],
+        backend=analytics_config["backend"],
+        precision=analytics_config["precision"]
+    )
+
+
+def _reset_tracker_state(tracker):
+    # ByteTrack state persists inside the ultralytics predictor; chunks must not inherit each other's tracks
+    predictor = getattr(tracker.model, "predictor", None)
+    for byte_tracker in getattr(predictor, "trackers", None) or []:
+        byte_tracker.reset()
+
+
+def _build_analytics(analytics_config):
+    from LineIntrusionDetector.line_intrusion_detector import LineIntrusionDetector
+    from SpeedEstimator.speed_estimator import SpeedEstimator
+    from ZoneIntrusionDetector.zone_intrusion_detector import ZoneIntrusionDetector
+
+    line_intrusion_detector = None
+    if analytics_config["starting_points_of_lines"]:
+        line_intrusion_detector = LineIntrusionDetector(
+            analytics_config["starting_points_of_lines"],
+            analytics_config["ending_points_of_lines"],
+            analytics_config["line_names"]
+        )
+    zone_intrusion_detector = ZoneIntrusionDetector(analytics_config["zones"]) if analytics_config["zones"] else None
+    speed_estimator = SpeedEstimator(
+        pixels_per_meter=analytics_config["pixels_per_meter"],
+        homography=analytics_config["homography"]
+    )
+    return line_intrusion_detector, zone_intrusion_detector, speed_estimator
+
+
+def process_chunk(chunk):
+    """
+    Runs tracking and analytics over one chunk inside a worker process.
+
+    :return: Dict with the chunk's events, per-track speed summaries, overlap boxes for stitching and frame counts.
+    """
+    tracker = _worker_state["tracker"]
+    _reset_tracker_state(tracker)
+    line_intrusion_detector, zone_intrusion_detector, speed_estimator = _build_analytics(_worker_state["config"])
+
+    video_capture = cv2.VideoCapture(chunk.video_path)
+    video_capture.set(cv2.CAP_PROP_POS_FRAMES, chunk.warmup_start_frame)
+
+    events = []
+    speed_samples = {}  # track_id -> [class_label, sample count, speed sum, max speed, first frame]
+    zone_event_tracker = ZoneEventTracker(chunk.video_path)
+    speed_threshold_kph = _worker_state["config"]["speed_threshold_kph"]
+    speed_threshold_monitor = SpeedThresholdMonitor(speed_threshold_kph, chunk.video_path) if speed_threshold_kph else None
+    head_boxes = {}  # frame_index -> (track_ids, boxes) during warm-up, matched against the previous chunk's tail
+    tail_boxes = {}  # frame_index -> (track_ids, boxes) during the last overlap_frames, matched against the next chunk
+    tail_start_frame = chunk.end_frame - chunk.overlap_frames
+    processed_frames = 0
+    started = time.perf_counter()
+
+    for frame_index in range(chunk.warmup_start_frame, chunk.end_frame):
+        frame_available, frame = video_capture.read()
+        if not frame_available or frame is None:
+            break
+
+        processed_frames += 1
+        timestamp = frame_index / chunk.frames_per_second
+        tracked_objects = tracker.process_frame(frame)
+        if line_intrusion_detector is not None:
+            line_intrusion_detector.detect_intrusion(tracked_objects, timestamp)
+        if zone_intrusion_detector is not None:
+            zone_intrusion_detector.detect_intrusion(tracked_objects, frame.shape)
+        speed_estimator.estimate_speed(tracked_objects, timestamp)
+
+        # Stateful event sources also see warm-up frames, so a track already inside a zone is not re-entered
+        frame_events = line_crossing_events(tracked_objects, round(timestamp, 3), frame_index, chunk.video_path)
+        if zone_intrusion_detector is not None:
+            frame_events += zone_event_tracker.update(tracked_objects, round(timestamp, 3), frame_index)
+        if speed_threshold_monitor is not None:
+            frame_events += speed_threshold_monitor.update(tracked_objects, round(timestamp, 3), frame_index)
+
+        if frame_index < chunk.start_frame:
+            head_boxes[frame_index] = (tracked_objects.track_ids.copy(), tracked_objects.boxes.copy())
+            continue  # Warm-up frames only establish tracks; the previous chunk reports their events
+        if frame_index >= tail_start_frame:
+            tail_boxes[frame_index] = (tracked_objects.track_ids.copy(), tracked_objects.boxes.copy())
+
+        events.extend(event.to_dict() for event in frame_events)
+
+        for row in np.flatnonzero(~np.isnan(tracked_objects.speeds)):
+            track_id = int(tracked_objects.track_ids[row])
+            speed = float(tracked_objects.speeds[row])
+            samples = speed_samples.setdefault(track_id, [tracked_objects.class_labels[int(tracked_objects.class_ids[row])], 0, 0.0, 0.0, frame_index])
+            samples[1] += 1
+            samples[2] += speed
+            samples[3] = max(samples[3], speed)
+
+    video_capture.release()
+    return {
+        "video": chunk.video_path,
+        "chunk_index": chunk.chunk_index,
+        "events": events,
+        "speed_samples": speed_samples,
+        "head_boxes": head_boxes,
+        "tail_boxes": tail_boxes,
+        "processed_frames": processed_frames,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def _box_iou(boxes_a, boxes_b):
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(boxes_a[:, 2:] - boxes_a[:, :2], axis=1)
+    area_b = np.prod(boxes_b[:, 2:] - boxes_b[:, :2], axis=1)
+    return intersection / np.maximum(area_a[:, None] + area_b[None, :] - intersection, 1e-9)
+
+
+def match_overlap_tracks(previous_tail_boxes, next_head_boxes, iou_threshold=0.5):
+    """
+    Matches the next chunk's track IDs to the previous chunk's by box overlap on the shared frames.
+
+    :return: Dict of next-chunk track ID -> previous-chunk track ID, for tracks that matched on most shared frames.
+    """
+    votes = {}
+    frames_seen = {}
+    for frame_index, (next_track_ids, next_boxes) in next_head_boxes.items():
+        if frame_index not in previous_tail_boxes or len(next_track_ids) == 0:
+            continue
+        previous_track_ids, previous_boxes = previous_tail_boxes[frame_index]
+        for track_id in next_track_ids.tolist():
+            frames_seen[track_id] = frames_seen.get(track_id, 0) + 1
+        if len(previous_track_ids) == 0:
+            continue
+
+        iou = _box_iou(next_boxes, previous_boxes)
+        for next_row, previous_row in enumerate(iou.argmax(axis=1)):
+            if iou[next_row, previous_row] >= iou_threshold:
+                key = (int(next_track_ids[next_row]), int(previous_track_ids[previous_row]))
+                votes[key] = votes.get(key, 0) + 1
+
+    track_mapping = {}
+    for (next_track_id, previous_track_id), vote_count in sorted(votes.items(), key=lambda item: -item[1]):
+        if next_track_id not in track_mapping and vote_count * 2 >= frames_seen[next_track_id]:
+            track_mapping[next_track_id] = previous_track_id
+    return track_mapping
+
+
+def merge_chunk_results(chunk_results):
+    """
+    Stitches track IDs across consecutive chunks of the same video and merges all events into one
+    time-ordered list. Stitched tracks get global IDs of the form "<video name>:<first chunk>:<track id>".
+    Dwell times of zone exits right after a chunk border only count from the start of that chunk's warm-up.
+    """
+    chunk_results = sorted(chunk_results, key=lambda result: (result["video"], result["chunk_index"]))
+    merged_events = []
+    previous_result = None
+    previous_global_ids = {}
+    speed_summaries = {}
+
+    for result in chunk_results:
+        video_name = os.path.splitext(os.path.basename(result["video"]))[0]
+        track_mapping = {}
+        if previous_result is not None and previous_result["video"] == result["video"]:
+            track_mapping = match_overlap_tracks(previous_result["tail_boxes"], result["head_boxes"])
+        else:
+            previous_global_ids = {}
+
+        def global_id(track_id):
+            if track_id in track_mapping and track_mapping[track_id] in previous_global_ids:
+                return previous_global_ids[track_mapping[track_id]]
+            return f"{video_name}:{result['chunk_index']}:{track_id}"
+
+        global_ids = {}
+        for event in result["events"]:
+            global_ids.setdefault(event["track_id"], global_id(event["track_id"]))
+            merged_events.append(dict(event, track_id=global_ids[event["track_id"]]))
+        for track_id, (class_label, sample_count, speed_sum, max_speed, first_frame) in result["speed_samples"].items():
+            key = global_ids.setdefault(track_id, global_id(track_id))
+            summary = speed_summaries.setdefault(key, {"source_id": result["video"], "track_id": key, "class_label": class_label,
+                                                       "first_frame": first_frame, "samples": 0, "speed_sum": 0.0, "max_speed_kph": 0.0})
+            summary["samples"] += sample_count
+            summary["speed_sum"] += speed_sum
+            summary["max_speed_kph"] = max(summary["max_speed_kph"], max_speed)
+
+        # Tracks alive in this chunk's tail inherit their global IDs in the next chunk
+        for track_ids, _ in result["tail_boxes"].values():
+            for track_id in track_ids.tolist():
+                global_ids.setdefault(track_id, global_id(track_id))
+        previous_global_ids = global_ids
+        previous_result = result
+
+    for summary in speed_summaries.values():
+        mean_speed = summary.pop("speed_sum") / summary["samples"]
+        merged_events.append({"event_type": "speed_summary", "source_id": summary["source_id"], "track_id": summary["track_id"],
+                              "frame_index": summary.pop("first_frame"), "class_label": summary["class_label"],
+                              "mean_speed_kph": round(mean_speed, 2), "max_speed_kph": summary["max_speed_kph"],
+                              "samples": summary["samples"]})
+
+    merged_events.sort(key=lambda event: (event["source_id"], event["frame_index"]))
+    return merged_events
+
+
+def process_videos_offline(inputs, analytics_config=None, chunk_seconds=300, overlap_seconds=5, workers=None, output_path=None):
+    """
+    Processes a directory or list of recorded videos with a process pool, one model per worker.
+
+    :param inputs: Video files and/or directories.
+    :param analytics_config: Overrides for DEFAULT_ANALYTICS_CONFIG (model, lines, zones, speed calibration).
+    :param chunk_seconds: Length of each chunk.
+    :param overlap_seconds: Warm-up overlap before each chunk, used to stitch tracks across chunk borders.
+    :param workers: Number of worker processes; defaults to the CPU count.
+    :param output_path: Optional JSONL file receiving the merged, time-ordered events.
+    :return: Tuple (events, throughput report).
+    """
+    config = dict(DEFAULT_ANALYTICS_CONFIG, **(analytics_config or {}))
+    chunks = plan_chunks(collect_video_paths(inputs), chunk_seconds, overlap_seconds)
+    if config["backend"] != "pytorch":
+        from utils.model_backends import export_model
+        export_model(config["model_path"], config["backend"], precision=config["precision"])  # Export once, not in every worker
+    workers = workers or os.cpu_count() or 1
+
+    started = time.perf_counter()
+    # "spawn" keeps CUDA/torch state out of forked children
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_initialize_worker, initargs=(config,)) as executor:
+        chunk_results = list(executor.map(process_chunk, chunks))
+    wall_seconds = time.perf_counter() - started
+
+    events = merge_chunk_results(chunk_results)
+    if output_path:
+        with open(output_path, "w") as output_file:
+            for event in events:
+                output_file.write(json.dumps(event) + "\n")
+
+    processed_frames = sum(result["processed_frames"] for result in chunk_results)
+    busy_seconds = sum(result["seconds"] for result in chunk_results)
+    report = {
+        "videos": len({chunk.video_path for chunk in chunks}),
+        "chunks": len(chunks),
+        "workers": workers,
+        "processed_frames": processed_frames,
+        "wall_seconds": round(wall_seconds, 2),
+        "frames_per_second": round(processed_frames / max(wall_seconds, 1e-9), 2),
+        "frames_per_second_per_core": round(processed_frames / max(wall_seconds, 1e-9) / workers, 2),
+        "frames_per_busy_second": round(processed_frames / max(busy_seconds, 1e-9), 2),
+        "events": len(events),
+    }
+    return events, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="Video files or directories")
+    parser.add_argument("--model", default=DEFAULT_ANALYTICS_CONFIG["model_path"])
+    parser.add_argument("--backend", choices=("pytorch", "onnx", "openvino"), default="pytorch")
+    parser.add_argument("--precision", choices=("fp32", "fp16", "int8"), default="fp32")
+    parser.add_argument("--lines", default="[]", help="JSON list of [[x1, y1], [x2, y2]] intrusion lines")
+    parser.add_argument("--zones", default=None, help="JSON dict of zone name -> list of [x, y] points")
+    parser.add_argument("--pixels-per-meter", type=float, default=DEFAULT_ANALYTICS_CONFIG["pixels_per_meter"])
+    parser.add_argument("--chunk-seconds", type=float, default=300)
+    parser.add_argument("--overlap-seconds", type=float, default=5)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default="events.jsonl")
+    arguments = parser.parse_args()
+
+    lines = json.loads(arguments.lines)
+    analytics_config = {
+        "model_path": arguments.model,
+        "backend": arguments.backend,
+        "precision": arguments.precision,
+        "starting_points_of_lines": [tuple(line[0]) for line in lines],
+        "ending_points_of_lines": [tuple(line[1]) for line in lines],
+        "zones": json.loads(arguments.zones) if arguments.zones else None,
+        "pixels_per_meter": arguments.pixels_per_meter,
+    }
+    _, report = process_videos_offline(arguments.inputs, analytics_config, arguments.chunk_seconds,
+                                       arguments.overlap_seconds, arguments.workers, arguments.output)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
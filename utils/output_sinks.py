@@ -0,0 +1,138 @@
+import threading
+from collections import deque
+
+import cv2
+
+
+class OutputSink:
+    """
+    Base class for where processed frames go. write() returns False to stop processing.
+    """
+    requires_annotation = True  # Sinks that never look at pixels set this to False to skip drawing
+
+
+    def write(self, frame):
+        raise NotImplementedError
+
+
+    def close(self):
+        pass
+
+
+class WindowSink(OutputSink):
+    def __init__(self, window_name="Object Tracking"):
+        """
+        Shows frames in an OpenCV window (the original behaviour). Needs a display.
+        """
+        self.window_name = window_name
+        self._window_created = False
+
+
+    def write(self, frame):
+        if not self._window_created:
+            cv2.namedWindow(self.window_name)
+            self._window_created = True
+        cv2.imshow(self.window_name, frame)  # Display frame
+        return not (cv2.waitKey(1) & 0xFF == ord('q'))  # Exit on 'q' key press
+
+
+    def close(self):
+        if self._window_created:
+            cv2.destroyWindow(self.window_name)
+            self._window_created = False
+
+
+class VideoFileSink(OutputSink):
+    def __init__(self, output_path, frames_per_second=30, codec="mp4v"):
+        """
+        Encodes frames into a video file. The writer is opened on the first frame so the output
+        size always matches the stream.
+
+        :param output_path: Destination file, e.g. "output/annotated.mp4".
+        :param frames_per_second: Frame rate written into the file.
+        :param codec: FourCC code understood by the local OpenCV build.
+        """
+        self.output_path = output_path
+        self.frames_per_second = frames_per_second
+        self.codec = codec
+        self.video_writer = None
+
+
+    def write(self, frame):
+        if self.video_writer is None:
+            height, width = frame.shape[:2]
+            fourcc = cv2.VideoWriter_fourcc(*self.codec)
+            self.video_writer = cv2.VideoWriter(self.output_path, fourcc, self.frames_per_second, (width, height))
+            if not self.video_writer.isOpened():
+                raise ValueError(f"Error: Could not open video writer for {self.output_path}")
+        self.video_writer.write(frame)
+        return True
+
+
+    def close(self):
+        if self.video_writer is not None:
+            self.video_writer.release()
+            self.video_writer = None
+
+
+class JpegRingSink(OutputSink):
+    def __init__(self, capacity=30, jpeg_quality=80):
+        """
+        Keeps the most recent frames in memory as JPEG bytes, e.g. for an MJPEG/HTTP preview.
+
+        :param capacity: Number of encoded frames kept; older frames are discarded.
+        :param jpeg_quality: JPEG quality from 0 to 100.
+        """
+        self.encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), jpeg_quality]
+        self.frames = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+
+    def write(self, frame):
+        encoded, jpeg_buffer = cv2.imencode(".jpg", frame, self.encode_params)
+        if encoded:
+            with self._lock:
+                self.frames.append(jpeg_buffer.tobytes())
+        return True
+
+
+    def latest_frame(self):
+        """
+        Returns the newest JPEG as bytes, or None if nothing was written yet.
+        """
+        with self._lock:
+            return self.frames[-1] if self.frames else None
+
+
+    def snapshot(self):
+        """
+        Returns a list copy of all buffered JPEG frames, oldest first.
+        """
+        with self._lock:
+            return list(self.frames)
+
+
+class NullSink(OutputSink):
+    """
+    Discards frames. Annotation is skipped entirely for analytics-only deployments.
+    """
+    requires_annotation = False
+
+
+    def write(self, frame):
+        return True
+
+
+def create_output_sink(sink_type="window", **sink_options):
+    """
+    Builds an output sink by name: "window", "video", "jpeg_ring" or "none".
+    """
+    sink_classes = {
+        "window": WindowSink,
+        "video": VideoFileSink,
+        "jpeg_ring": JpegRingSink,
+        "none": NullSink,
+    }
+    if sink_type not in sink_classes:
+        raise ValueError(f"Unknown output sink: {sink_type}")
+    return sink_classes[sink_type](**sink_options)
@@ -0,0 +1,134 @@
+import logging
+
+import numpy as np
+
+# torch and ultralytics are imported inside merge_results so importing this module stays cheap
+
+logger = logging.getLogger(__name__)
+
+
+def regions_from_analytics(lines=None, zones=None, margin=64):
+    """
+    Returns one (x0, y0, x1, y1) region per intrusion line and zone polygon, grown by margin pixels on every side
+    so that objects approaching a line or zone are already detected before they reach it.
+
+    :param lines: Iterable of (start_point, end_point) pairs.
+    :param zones: Iterable of polygons (lists of (x, y) points).
+    """
+    regions = []
+    for start_point, end_point in lines or ():
+        points = np.array([start_point, end_point], dtype=np.float64)
+        regions.append(tuple((points.min(axis=0) - margin).tolist() + (points.max(axis=0) + margin).tolist()))
+    for zone_points in zones or ():
+        if len(zone_points) < 3:
+            continue
+        points = np.asarray(zone_points, dtype=np.float64)
+        regions.append(tuple((points.min(axis=0) - margin).tolist() + (points.max(axis=0) + margin).tolist()))
+    return regions
+
+
+def merge_regions(regions, frame_shape):
+    """
+    Clips regions to the frame and merges overlapping ones, so no pixel is sent to the model twice and an
+    object in an overlap is not detected in two crops.
+
+    :return: List of integer (x0, y0, x1, y1) regions.
+    """
+    frame_height, frame_width = frame_shape[:2]
+    merged = []
+    for x0, y0, x1, y1 in regions:
+        region = [max(0, int(x0)), max(0, int(y0)), min(frame_width, int(np.ceil(x1))), min(frame_height, int(np.ceil(y1)))]
+        if region[2] > region[0] and region[3] > region[1]:
+            merged.append(region)
+
+    merged_any = True
+    while merged_any:  # Merging two regions can make the union overlap a third one
+        merged_any = False
+        for first in range(len(merged)):
+            for second in range(first + 1, len(merged)):
+                a, b = merged[first], merged[second]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    merged[first] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                    del merged[second]
+                    merged_any = True
+                    break
+            if merged_any:
+                break
+    return [tuple(region) for region in merged]
+
+
+class RoiCropper:
+    def __init__(self, regions=None, lines=None, zones=None, margin=64):
+        """
+        Restricts detection to regions of interest: explicit regions, or the area around the intrusion lines
+        and zones. The crops of one frame go through the model as one batch and the boxes are mapped back to
+        full-frame coordinates, so tracking and analytics are unaffected.
+
+        :param regions: Explicit (x0, y0, x1, y1) regions; when given, lines and zones are ignored.
+        :param lines: Iterable of (start_point, end_point) pairs to derive regions from.
+        :param zones: Iterable of polygons to derive regions from.
+        :param margin: Pixels added around each region (explicit or derived).
+        """
+        if regions:
+            self.raw_regions = [(x0 - margin, y0 - margin, x1 + margin, y1 + margin) for x0, y0, x1, y1 in regions]
+        else:
+            self.raw_regions = regions_from_analytics(lines, zones, margin)
+        if not self.raw_regions:
+            raise ValueError("ROI cropping needs explicit regions, intrusion lines or zones.")
+        self.frame_shape = None
+        self.regions = None
+
+
+    def regions_for(self, frame_shape):
+        """
+        Returns the merged regions for frames of this shape, recomputed only when the resolution changes.
+        """
+        if frame_shape[:2] != self.frame_shape:
+            self.frame_shape = frame_shape[:2]
+            self.regions = merge_regions(self.raw_regions, frame_shape)
+            logger.info("ROI cropping to %s region(s) covering %.0f%% of the %sx%s frame",
+                        len(self.regions), 100.0 * self.pixel_fraction(), frame_shape[1], frame_shape[0])
+        return self.regions
+
+
+    def pixel_fraction(self):
+        """
+        Share of the frame's pixels the crops cover (after regions_for has seen a frame).
+        """
+        frame_height, frame_width = self.frame_shape
+        covered = sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in self.regions)
+        return covered / float(frame_height * frame_width)
+
+
+    def crop(self, frame):
+        """
+        Returns the ROI crops of a frame. They are views into the frame, no pixels are copied.
+        """
+        return [frame[y0:y1, x0:x1] for x0, y0, x1, y1 in self.regions_for(frame.shape)]
+
+
+    def merge_results(self, frame, crop_results):
+        """
+        Combines the model results of a frame's crops (in crop order) into one full-frame ultralytics result,
+        which apply_byte_tracker and ObjectTracker.process_tracked_objects accept like a whole-frame prediction.
+        """
+        import torch
+        from ultralytics.engine.results import Results
+
+        shifted_boxes = []
+        for (x0, y0, _, _), crop_result in zip(self.regions_for(frame.shape), crop_results):
+            if crop_result.boxes is None or len(crop_result.boxes) == 0:
+                continue
+            boxes = crop_result.boxes.data[:, :6].clone()  # x0, y0, x1, y1, conf, cls
+            boxes[:, [0, 2]] += x0
+            boxes[:, [1, 3]] += y0
+            shifted_boxes.append(boxes)
+        boxes = torch.cat(shifted_boxes) if shifted_boxes else torch.zeros((0, 6))
+        return Results(orig_img=frame, path=crop_results[0].path, names=crop_results[0].names, boxes=boxes.cpu())
+
+
+    def detect(self, model, frame, **predict_options):
+        """
+        Runs model.predict on the frame's crops as one batch and returns the full-frame result.
+        """
+        return self.merge_results(frame, model.predict(self.crop(frame), **predict_options))
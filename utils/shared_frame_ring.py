@@ -0,0 +1,294 @@
+import logging
+import multiprocessing
+import queue
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from utils.capture_backends import open_capture
+from utils.capture_timestamps import CaptureClock
+from utils.frame_pipeline import BLOCK, DROP_OLDEST, default_drop_policy, is_live_source
+from utils.metrics import PipelineMetrics
+from utils.stream_ingestion import reopen_with_backoff
+
+logger = logging.getLogger(__name__)
+
+SLOT_METADATA_DTYPE = np.dtype([("frame_index", np.int64), ("timestamp", np.float64)])
+_END_OF_STREAM = -1  # Published instead of a slot index when capture ends
+
+
+class SharedFrameRing:
+    def __init__(self, slot_count, frame_shape, drop_policy=BLOCK, context=None):
+        """
+        Fixed set of preallocated frame slots in shared memory, handed between processes by index.
+
+        The producer takes a slot from the free queue, writes a frame into it and publishes the index on the
+        filled queue; consumers read the frame in place and release the slot back to the free queue when done.
+        Only slot indices cross process boundaries, frames are never pickled or copied.
+
+        :param slot_count: Number of frame slots; bounds how far the producer can run ahead of the consumers.
+        :param frame_shape: (height, width, channels) of every slot.
+        :param drop_policy: BLOCK makes the producer wait for a free slot (files); DROP_OLDEST reuses the oldest
+                            unread frame's slot instead (live feeds).
+        :param context: multiprocessing context whose queues connect the processes.
+        """
+        if drop_policy not in (DROP_OLDEST, BLOCK):
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        if slot_count < 2:
+            raise ValueError("A shared frame ring needs at least two slots.")
+        context = context or multiprocessing.get_context("spawn")
+        self.slot_count = slot_count
+        self.frame_shape = tuple(frame_shape)
+        self.drop_policy = drop_policy
+
+        frame_bytes = int(np.prod(self.frame_shape))
+        self._frames_memory = shared_memory.SharedMemory(create=True, size=slot_count * frame_bytes)
+        self._metadata_memory = shared_memory.SharedMemory(create=True, size=slot_count * SLOT_METADATA_DTYPE.itemsize)
+        self._owner = True  # Only the creating process unlinks the shared memory
+        self._attach_arrays()
+
+        self.free_slots = context.Queue()
+        self.filled_slots = context.Queue()
+        for slot in range(slot_count):
+            self.free_slots.put(slot)
+        self.dropped_frames = context.Value("q", 0)
+
+
+    def _attach_arrays(self):
+        self.frames = np.ndarray((self.slot_count,) + self.frame_shape, dtype=np.uint8, buffer=self._frames_memory.buf)
+        self.metadata = np.ndarray((self.slot_count,), dtype=SLOT_METADATA_DTYPE, buffer=self._metadata_memory.buf)
+
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for attribute in ("frames", "metadata", "_frames_memory", "_metadata_memory"):
+            del state[attribute]
+        state["_frames_memory_name"] = self._frames_memory.name
+        state["_metadata_memory_name"] = self._metadata_memory.name
+        state["_owner"] = False
+        return state
+
+
+    def __setstate__(self, state):
+        self._frames_memory = shared_memory.SharedMemory(name=state.pop("_frames_memory_name"))
+        self._metadata_memory = shared_memory.SharedMemory(name=state.pop("_metadata_memory_name"))
+        self.__dict__.update(state)
+        self._attach_arrays()
+
+
+    def acquire_slot(self, timeout=None):
+        """
+        Returns a free slot index for the producer to write into, raising queue.Empty if none freed up in time.
+        Under DROP_OLDEST the oldest unread frame is discarded when every slot is in use.
+        """
+        if self.drop_policy == DROP_OLDEST:
+            try:
+                return self.free_slots.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                slot = self.filled_slots.get_nowait()
+                with self.dropped_frames.get_lock():
+                    self.dropped_frames.value += 1
+                return slot
+            except queue.Empty:
+                pass  # Every slot is being read right now; wait for one to be released
+        return self.free_slots.get(timeout=timeout)
+
+
+    def publish(self, slot, frame_index, timestamp):
+        self.metadata[slot] = (frame_index, timestamp)
+        self.filled_slots.put(slot)
+
+
+    def end_stream(self):
+        self.filled_slots.put(_END_OF_STREAM)
+
+
+    def next_slot(self, timeout=None):
+        """
+        Returns the next filled slot index, None once the producer ended the stream, and raises queue.Empty
+        if nothing arrived within the timeout.
+        """
+        slot = self.filled_slots.get(timeout=timeout)
+        return None if slot == _END_OF_STREAM else slot
+
+
+    def frame(self, slot):
+        """
+        Returns the slot's frame as a view into shared memory; valid until the slot is released.
+        """
+        return self.frames[slot]
+
+
+    def frame_metadata(self, slot):
+        """
+        Returns the (frame_index, timestamp) the producer published with the slot.
+        """
+        return int(self.metadata[slot]["frame_index"]), float(self.metadata[slot]["timestamp"])
+
+
+    def release(self, slot):
+        self.free_slots.put(slot)
+
+
+    def close(self):
+        self.frames = None
+        self.metadata = None
+        try:
+            self._frames_memory.close()
+            self._metadata_memory.close()
+        except BufferError:
+            logger.warning("Frames from the shared frame ring are still referenced; the memory is freed once they are released.")
+        if self._owner:
+            self._frames_memory.unlink()
+            self._metadata_memory.unlink()
+
+
+def probe_source(input_media_source):
+    """
+    Returns the (height, width, 3) frame shape and the FPS of a source, reading one frame if the
+    container does not report its size.
+    """
+    video_capture = cv2.VideoCapture(input_media_source)
+    if not video_capture.isOpened():
+        raise ValueError(f"Error: Could not open {input_media_source}")
+    width = int(video_capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(video_capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    if width <= 0 or height <= 0:
+        frame_available, frame = video_capture.read()
+        if not frame_available or frame is None:
+            raise ValueError(f"Error: Could not read a frame from {input_media_source}")
+        height, width = frame.shape[:2]
+    frames_per_second = video_capture.get(cv2.CAP_PROP_FPS)
+    video_capture.release()
+    return (height, width, 3), frames_per_second
+
+
+def capture_into_ring(ring, input_media_source, stop_event, reconnect=False, initial_backoff_seconds=0.5,
+                      max_backoff_seconds=30.0, max_reconnect_attempts=None, backend="opencv", hwaccel=None):
+    """
+    Capture process body: decodes frames straight into free ring slots and publishes them with their
+    frame index and capture timestamp until the source ends or stop_event is set.
+
+    :param reconnect: Reopen the source with exponential backoff when a read fails instead of ending
+                      (see ResilientStream for the backoff parameters).
+    :param backend: Capture backend decoding into the slots, see utils.capture_backends.open_capture.
+    :param hwaccel: Hardware decoder for the ffmpeg backend.
+    """
+    video_capture = open_capture(input_media_source, backend, hwaccel=hwaccel)
+    capture_clock = CaptureClock(video_capture, input_media_source)
+    frame_height, frame_width = ring.frame_shape[:2]
+    frame_index = 0
+    try:
+        while not stop_event.is_set() and video_capture.isOpened():
+            try:
+                slot = ring.acquire_slot(timeout=0.1)
+            except queue.Empty:
+                continue  # Backpressure: every slot is waiting to be processed
+            slot_frame = ring.frame(slot)
+            frame_available, frame = video_capture.read(slot_frame)  # Decodes into shared memory when the shape matches
+            if not frame_available or frame is None:
+                ring.release(slot)
+                if not reconnect:
+                    break
+                video_capture.release()
+                video_capture = reopen_with_backoff(lambda: open_capture(input_media_source, backend, hwaccel=hwaccel), input_media_source,
+                                                    stop_event, initial_backoff_seconds, max_backoff_seconds,
+                                                    max_reconnect_attempts)
+                if video_capture is None:
+                    break
+                capture_clock = CaptureClock(video_capture, input_media_source)
+                continue
+            if not np.shares_memory(frame, slot_frame):  # The stream changed resolution
+                cv2.resize(frame, (frame_width, frame_height), dst=slot_frame)
+            ring.publish(slot, frame_index, capture_clock.next_timestamp())
+            frame_index += 1
+    finally:
+        if video_capture is not None:
+            video_capture.release()
+        ring.end_stream()
+        ring.close()
+
+
+class SharedMemoryCapture:
+    def __init__(self, input_media_source, slot_count=6, drop_policy=None, reconnect=None, initial_backoff_seconds=0.5,
+                 max_backoff_seconds=30.0, max_reconnect_attempts=None, backend="opencv", hwaccel=None):
+        """
+        Runs decoding in a separate process that fills a SharedFrameRing, so decoding does not compete with
+        inference and annotation for the GIL. Frames are decoded straight into the ring's slots at source
+        resolution. Like ResilientStream, the capture process reconnects live sources when they drop.
+
+        :param slot_count: Frame slots in the ring (frames being decoded, waiting and being processed).
+        :param drop_policy: "drop_oldest" or "block"; defaults to drop-oldest for live sources and block for files.
+        :param reconnect: Reopen the source with exponential backoff when a read fails. Defaults to True for live sources.
+        :param initial_backoff_seconds: Wait before the first reconnect attempt, doubled after every failed attempt.
+        :param max_backoff_seconds: Upper bound of the wait between reconnect attempts.
+        :param max_reconnect_attempts: Consecutive failed attempts after which the stream ends (None = never give up).
+        :param backend: Capture backend, "opencv", "ffmpeg" or "gstreamer" (see utils.capture_backends).
+        :param hwaccel: Hardware decoder for the ffmpeg backend, e.g. "auto" or "cuda".
+        """
+        self.input_media_source = input_media_source
+        frame_shape, self.frames_per_second = probe_source(input_media_source)
+        context = multiprocessing.get_context("spawn")  # Keep CUDA/torch state of the parent out of the child
+        self.ring = SharedFrameRing(slot_count, frame_shape, drop_policy or default_drop_policy(input_media_source), context)
+        self.stop_event = context.Event()
+        self.process = context.Process(
+            target=capture_into_ring,
+            args=(self.ring, input_media_source, self.stop_event,
+                  is_live_source(input_media_source) if reconnect is None else reconnect,
+                  initial_backoff_seconds, max_backoff_seconds, max_reconnect_attempts, backend, hwaccel),
+            name="capture",
+            daemon=True
+        )
+
+
+    def run(self, process_frame, render_frame, metrics=None):
+        """
+        Starts the capture process and processes frames in place from shared memory on the calling thread.
+
+        :param process_frame: Callable taking (frame, timestamp) and returning the analytics result.
+        :param render_frame: Callable taking (frame, result); returns False to stop.
+        :param metrics: Optional PipelineMetrics; waiting for frames counts as the capture stage.
+        """
+        metrics = metrics or PipelineMetrics(enabled=False)
+        metrics.register_gauge("dropped_before_inference", lambda: self.ring.dropped_frames.value)
+        self.process.start()
+        try:
+            while True:
+                try:
+                    with metrics.time_stage("capture"):
+                        slot = self.ring.next_slot(timeout=0.5)
+                except queue.Empty:
+                    if not self.process.is_alive():
+                        logger.warning("Capture process for %s exited unexpectedly.", self.input_media_source)
+                        break
+                    continue
+                if slot is None:
+                    logger.info("Empty frame received. Exiting loop.")
+                    break
+
+                frame = self.ring.frame(slot)
+                _, timestamp = self.ring.frame_metadata(slot)
+                try:
+                    keep_running = render_frame(frame, process_frame(frame, timestamp))
+                finally:
+                    frame = None  # Views into shared memory must be gone before the ring is closed
+                    self.ring.release(slot)  # The slot may be overwritten from here on
+                if keep_running is False:
+                    break
+        finally:
+            self.stop()
+        if self.ring.dropped_frames.value:
+            logger.info("Dropped %s frames before inference", self.ring.dropped_frames.value)
+        metrics.unregister_gauge("dropped_before_inference")
+
+
+    def stop(self):
+        self.stop_event.set()
+        self.process.join(timeout=2.0)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.ring.close()
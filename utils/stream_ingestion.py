@@ -0,0 +1,372 @@
+import logging
+import threading
+import time
+
+import cv2
+
+from utils.capture_backends import FrameScaler, open_capture
+from utils.capture_timestamps import CaptureClock
+from utils.frame_pipeline import FramePipeline, default_drop_policy, is_live_source
+from utils.metrics import PipelineMetrics, RollingHistogram
+
+logger = logging.getLogger(__name__)
+
+
+def reopen_with_backoff(open_source, input_media_source, stop_event, initial_backoff_seconds=0.5, max_backoff_seconds=30.0,
+                        max_reconnect_attempts=None):
+    """
+    Calls open_source() with exponential backoff until it returns an opened capture, and returns that capture.
+    Returns None after max_reconnect_attempts failed attempts in a row (None = never give up) or once
+    stop_event (a threading or multiprocessing Event) is set.
+    """
+    backoff = initial_backoff_seconds
+    attempts = 0
+    while not stop_event.is_set():
+        if max_reconnect_attempts is not None and attempts >= max_reconnect_attempts:
+            logger.error("Giving up on %s after %s reconnect attempts", input_media_source, attempts)
+            return None
+        attempts += 1
+        logger.warning("Lost %s; reconnecting in %.1f s (attempt %s)", input_media_source, backoff, attempts)
+        if stop_event.wait(backoff):
+            return None
+        video_capture = open_source()
+        if video_capture.isOpened():
+            logger.info("Reconnected to %s", input_media_source)
+            return video_capture
+        video_capture.release()
+        backoff = min(backoff * 2, max_backoff_seconds)
+    return None
+
+
+class ResilientStream:
+    def __init__(self, input_media_source, reconnect=None, latest_frame_only=None, initial_backoff_seconds=0.5,
+                 max_backoff_seconds=30.0, max_reconnect_attempts=None, gap_threshold_seconds=1.0, metrics=None,
+                 backend="opencv", hwaccel=None, inference_resolution=None, full_resolution=True):
+        """
+        Reads frames from a file, webcam or network stream, reconnecting live sources when they drop instead
+        of ending the stream, so the loaded model and the track state survive an RTSP hiccup.
+
+        Live sources are grabbed continuously on a background thread and only the newest grabbed frame is
+        decoded when the consumer asks for one, so a slow consumer never works through stale buffered frames.
+
+        :param reconnect: Reopen the source with exponential backoff when a read fails. Defaults to True for
+                          live sources; for files a failed read is the end of the stream.
+        :param latest_frame_only: Grab continuously and deliver only the newest frame. Defaults to True for live sources.
+        :param initial_backoff_seconds: Wait before the first reconnect attempt, doubled after every failed attempt.
+        :param max_backoff_seconds: Upper bound of the wait between reconnect attempts.
+        :param max_reconnect_attempts: Consecutive failed attempts after which the stream ends (None = never give up).
+        :param gap_threshold_seconds: Time without a new frame from a live source that counts as a gap in coverage.
+        :param metrics: Optional PipelineMetrics receiving frame ages, gaps and reconnect counts.
+        :param backend: Capture backend, "opencv", "ffmpeg" or "gstreamer" (see utils.capture_backends).
+        :param hwaccel: Hardware decoder for the ffmpeg backend, e.g. "auto" or "cuda".
+        :param inference_resolution: (width, height) the tracker works at (see track_frame); None tracks full frames.
+        :param full_resolution: Deliver frames at source resolution, e.g. for annotated output. When False and an
+                                inference_resolution is set, frames are scaled at decode and never exist at full size.
+        """
+        self.input_media_source = input_media_source
+        self.live_source = is_live_source(input_media_source)
+        self.reconnect = self.live_source if reconnect is None else reconnect
+        self.latest_frame_only = self.live_source if latest_frame_only is None else latest_frame_only
+        self.initial_backoff_seconds = initial_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.max_reconnect_attempts = max_reconnect_attempts
+        self.gap_threshold_seconds = gap_threshold_seconds
+        self.metrics = metrics or PipelineMetrics(enabled=False)
+        self.backend = backend
+        self.hwaccel = hwaccel
+        self.full_resolution = full_resolution or not inference_resolution
+        self.decode_size = None if self.full_resolution else tuple(inference_resolution)
+        self.frame_scaler = FrameScaler(inference_resolution) if inference_resolution else None
+
+        self.video_capture = open_capture(input_media_source, backend, self.decode_size, hwaccel)
+        if not self.video_capture.isOpened():
+            raise ValueError(f"Error: Could not open {input_media_source}")
+        self.frames_per_second = self.video_capture.get(cv2.CAP_PROP_FPS)
+        self.capture_clock = CaptureClock(self.video_capture, input_media_source)
+
+        self.reconnects = 0
+        self.gap_seconds = []
+        self.delivered_frames = 0
+        self.stale_frames_skipped = 0
+        self.corrupt_frames = 0
+        self.frame_age = RollingHistogram()
+        self.last_frame_time = None
+        self.ended = False
+
+        self._stop_event = threading.Event()
+        self._frame_ready = threading.Condition()  # Guards video_capture and the grab bookkeeping below
+        self._grabbed_sequence = 0
+        self._grabbed_at = None
+        self._delivered_sequence = 0
+        self._consumer_waiting = False
+        self._grab_thread = None
+        if self.latest_frame_only:
+            self._grab_thread = threading.Thread(target=self._grab_loop, name="grab", daemon=True)
+            self._grab_thread.start()
+
+
+    def _record_frame_time(self, frame_time):
+        if self.last_frame_time is not None and frame_time - self.last_frame_time > self.gap_threshold_seconds:
+            gap = frame_time - self.last_frame_time
+            self.gap_seconds.append(gap)
+            self.metrics.record("stream_gap", gap)
+            logger.warning("No frames from %s for %.1f s", self.input_media_source, gap)
+        self.last_frame_time = frame_time
+
+
+    def _reopen(self):
+        """
+        Releases the capture and reopens the source with exponential backoff. Returns False when giving up.
+        """
+        with self._frame_ready:
+            self.video_capture.release()
+        video_capture = reopen_with_backoff(
+            lambda: open_capture(self.input_media_source, self.backend, self.decode_size, self.hwaccel),
+            self.input_media_source,
+            self._stop_event,
+            self.initial_backoff_seconds,
+            self.max_backoff_seconds,
+            self.max_reconnect_attempts
+        )
+        if video_capture is None:
+            return False
+        with self._frame_ready:
+            self.video_capture = video_capture
+            self.capture_clock = CaptureClock(video_capture, self.input_media_source)
+        self.reconnects += 1
+        self.metrics.increment("stream_reconnects")
+        return True
+
+
+    def _grab_loop(self):
+        """
+        Grabs (without decoding) every frame the source delivers, so the capture buffer never holds stale frames.
+        """
+        while not self._stop_event.is_set():
+            with self._frame_ready:
+                grabbed = self.video_capture.grab()
+                if grabbed:
+                    self._grabbed_sequence += 1
+                    self._grabbed_at = time.time()
+                    self._frame_ready.notify_all()
+                    # Let a waiting consumer retrieve this frame before the next grab replaces it
+                    while (self._consumer_waiting and self._delivered_sequence != self._grabbed_sequence
+                           and not self._stop_event.is_set()):
+                        self._frame_ready.wait(timeout=0.5)
+            if grabbed:
+                if self.live_source:
+                    self._record_frame_time(self._grabbed_at)
+            elif not self.reconnect or not self._reopen():
+                break
+        with self._frame_ready:
+            self.ended = True
+            self._frame_ready.notify_all()
+
+
+    def _read_latest(self, timeout=None, frame=None):
+        """
+        Returns the newest grabbed frame that was not delivered yet, or None once the stream ended or no new
+        frame arrived within timeout seconds (None waits as long as the stream lasts).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if timeout is not None and self._grabbed_sequence == self._delivered_sequence:
+                return None  # Checked without the lock, which a grab holds for as long as a dropped source stalls
+            self._consumer_waiting = True  # Set before taking the lock, so the grab thread yields after its current grab
+            if not self._frame_ready.acquire(timeout=-1 if deadline is None else max(deadline - time.monotonic(), 0.0)):
+                self._consumer_waiting = False
+                return None  # The current grab is stuck on a stalled source
+            try:
+                while self._grabbed_sequence == self._delivered_sequence:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if self.ended or (remaining is not None and remaining <= 0):
+                        return None
+                    self._frame_ready.wait(timeout=0.5 if remaining is None else min(remaining, 0.5))
+                frame_available, decoded = self.video_capture.retrieve(frame)
+                skipped = self._grabbed_sequence - self._delivered_sequence - 1
+                if skipped:
+                    self.stale_frames_skipped += skipped
+                    self.metrics.increment("stale_frames_skipped", skipped)
+                self._delivered_sequence = self._grabbed_sequence
+                timestamp = self._grabbed_at
+            finally:
+                self._consumer_waiting = False
+                self._frame_ready.notify_all()
+                self._frame_ready.release()
+            if frame_available and decoded is not None:
+                return decoded, timestamp
+            self.corrupt_frames += 1  # Wait for the next grab, within what is left of the timeout
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+
+
+    def _read_next(self, frame=None):
+        while not self._stop_event.is_set():
+            frame_available, decoded = self.video_capture.read(frame)
+            if frame_available and decoded is not None:
+                timestamp = self.capture_clock.next_timestamp()
+                if self.live_source:  # Files are read as fast as they decode, so wall-clock pauses are not gaps
+                    self._record_frame_time(time.time())
+                return decoded, timestamp
+            if not self.reconnect or not self._reopen():
+                break
+        self.ended = True
+        return None
+
+
+    def read(self, frame=None):
+        """
+        Returns the next (frame, capture timestamp) pair, or None once the stream ended (end of file,
+        reconnecting given up, or release() called). Live sources deliver the newest frame and wait for
+        reconnects instead of ending.
+
+        :param frame: Array to decode into, e.g. the previous frame once nothing uses it anymore; a new
+                      array is returned when it does not have the delivered frame's shape.
+        """
+        captured = self._read_latest(frame=frame) if self.latest_frame_only else self._read_next(frame)
+        if captured is not None:
+            self.delivered_frames += 1
+        return captured
+
+
+    def poll(self, timeout=0.1, frame=None):
+        """
+        Like read, but returns None right away when a latest_frame_only stream has no new frame, instead of
+        waiting for one; check ended to tell that apart from the end of the stream. A dropped source keeps
+        reconnecting on its grab thread meanwhile. Other streams read their next frame as read does.
+
+        :param timeout: Longest wait for a grab in progress to hand over its frame.
+        :param frame: Array to decode into, see read.
+        """
+        if not self.latest_frame_only:
+            return self.read(frame)
+        captured = self._read_latest(timeout, frame)
+        if captured is not None:
+            self.delivered_frames += 1
+        return captured
+
+
+    def inference_frame(self, frame):
+        """
+        Returns a delivered frame at the inference resolution (see FrameScaler.inference_frame).
+        """
+        if self.frame_scaler is None:
+            return frame
+        with self.metrics.time_stage("inference_resize"):
+            return self.frame_scaler.inference_frame(frame)
+
+
+    def source_frame_shape(self, frame):
+        """
+        Returns the shape of the source frame a delivered frame stands for, also when it was decoded smaller.
+        """
+        if self.full_resolution:
+            return frame.shape
+        width, height = self.video_capture.source_size or self.frame_scaler.inference_size
+        return (height, width) + frame.shape[2:]
+
+
+    def to_source_coordinates(self, tracked_objects, source_frame_shape):
+        """
+        Maps objects tracked on an inference_frame back to the pixels of a source_frame_shape frame.
+        """
+        if self.frame_scaler is None:
+            return tracked_objects
+        return self.frame_scaler.to_source_coordinates(tracked_objects, (source_frame_shape[1], source_frame_shape[0]))
+
+
+    def track_frame(self, tracker, frame):
+        """
+        Tracks a frame of this stream at the inference resolution and returns (tracked objects in source pixels,
+        source frame shape) for the analytics, whose lines, zones and calibrations are in source pixels.
+        """
+        frame_shape = self.source_frame_shape(frame)
+        tracked_objects = tracker.process_frame(self.inference_frame(frame))
+        return self.to_source_coordinates(tracked_objects, frame_shape), frame_shape
+
+
+    def record_frame_age(self, timestamp):
+        """
+        Records how old a live frame is now, e.g. once its analytics are done (end-to-end frame age).
+        File timestamps are media time, so they are ignored.
+        """
+        if self.live_source:
+            age = time.time() - timestamp
+            self.frame_age.record(age)
+            self.metrics.record("frame_age", age)
+
+
+    def stats(self):
+        return {
+            "delivered_frames": self.delivered_frames,
+            "stale_frames_skipped": self.stale_frames_skipped,
+            "corrupt_frames": self.corrupt_frames,
+            "reconnects": self.reconnects,
+            "gaps": len(self.gap_seconds),
+            "longest_gap_seconds": round(max(self.gap_seconds), 2) if self.gap_seconds else 0.0,
+            "total_gap_seconds": round(sum(self.gap_seconds), 2),
+            "frame_age": self.frame_age.summary(),
+        }
+
+
+    def release(self):
+        self._stop_event.set()
+        if self._grab_thread is not None:
+            self._grab_thread.join(timeout=2.0)
+        with self._frame_ready:
+            self.video_capture.release()
+        if self.reconnects or self.gap_seconds or self.stale_frames_skipped or self.corrupt_frames:
+            logger.info("Stream %s: %s", self.input_media_source, self.stats())
+
+
+def process_stream(stream, process_frame, render_frame, output_sink, pipelined=False, queue_size=4, drop_policy=None,
+                   metrics=None, source_name=None):
+    """
+    Runs every frame of a stream through process_frame and render_frame, one after another or as a FramePipeline,
+    and always releases the stream and closes the output sink, also when a stage raises.
+
+    Run one after another, each frame is decoded into the previous one's array once it has been rendered,
+    so no frame is allocated per read. Pipelined frames wait in queues, so each read gets a new array.
+
+    :param stream: ResilientStream to read (frame, timestamp) pairs from.
+    :param process_frame: Callable taking (frame, timestamp) and returning the analytics result.
+    :param render_frame: Callable taking (frame, result); returns False to stop.
+    :param output_sink: The sink render_frame writes to; closed once the stream is done.
+    :param pipelined: Run capture, inference and rendering on separate stages connected by bounded queues.
+    :param queue_size: Capacity of each inter-stage queue in pipelined mode.
+    :param drop_policy: "drop_oldest" or "block"; defaults to drop-oldest for live sources and block for files.
+    :param metrics: Optional PipelineMetrics; reading a frame counts as the capture stage.
+    :param source_name: Name used in log messages; defaults to the stream's input.
+    """
+    metrics = metrics or PipelineMetrics(enabled=False)
+    source_name = source_name or stream.input_media_source
+
+    def read_frame(frame=None):
+        with metrics.time_stage("capture"):
+            captured = stream.read(frame)
+        if captured is None:
+            logger.info("Source '%s' ended. Exiting loop.", source_name)
+        return captured
+
+    try:
+        if pipelined:
+            pipeline = FramePipeline(
+                read_frame, process_frame, render_frame,
+                queue_size=queue_size,
+                drop_policy=drop_policy or default_drop_policy(stream.input_media_source),
+                metrics=metrics
+            )
+            pipeline.run()
+            pipeline.log_throughput_report()
+        else:
+            frame = None
+            while True:
+                captured = read_frame(frame)  # Reuses the last frame's array; its analytics and output are done
+                if captured is None:
+                    break
+                frame, timestamp = captured
+                if not render_frame(frame, process_frame(frame, timestamp)):
+                    break
+    finally:
+        stream.release()
+        output_sink.close()
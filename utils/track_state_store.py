@@ -0,0 +1,175 @@
+import time
+
+import numpy as np
+
+
+class TrackStateStore:
+    def __init__(self, max_tracks=4096, ttl_seconds=30.0, history_length=1):
+        """
+        Fixed-capacity per-track state (last center and its timestamp, plus an optional ring of the last
+        `history_length` observations) stored as a struct of arrays.
+
+        Tracks not seen for `ttl_seconds` are evicted, and when all `max_tracks` slots are taken the least
+        recently seen track is evicted to make room, so memory stays bounded on 24/7 feeds no matter how
+        many ByteTrack IDs go by.
+
+        :param max_tracks: Maximum number of tracks kept at once.
+        :param ttl_seconds: Time after the last sighting at which a track is forgotten (None disables TTL).
+        :param history_length: Number of past observations kept per track for windowed computations.
+        """
+        self.max_tracks = max_tracks
+        self.ttl_seconds = ttl_seconds
+
+        self.slot_by_track_id = {}
+        self.track_ids = np.full(max_tracks, -1, dtype=np.int64)
+        self.centers = np.zeros((max_tracks, 2), dtype=np.float64)
+        self.timestamps = np.zeros(max_tracks, dtype=np.float64)  # Time at which `centers` was recorded
+        self.last_seen = np.full(max_tracks, -np.inf, dtype=np.float64)
+        self.free_slots = list(range(max_tracks - 1, -1, -1))
+
+        self.history_length = history_length
+        self.history_points = np.zeros((max_tracks, history_length, 2), dtype=np.float64)
+        self.history_timestamps = np.zeros((max_tracks, history_length), dtype=np.float64)
+        self.history_head = np.zeros(max_tracks, dtype=np.intp)  # Next ring position to write
+        self.history_count = np.zeros(max_tracks, dtype=np.intp)
+
+        self.evicted_tracks = 0
+        self.peak_tracks = 0
+
+
+    @property
+    def live_tracks(self):
+        return len(self.slot_by_track_id)
+
+
+    def _release(self, slot):
+        del self.slot_by_track_id[int(self.track_ids[slot])]
+        self.track_ids[slot] = -1
+        self.last_seen[slot] = -np.inf
+        self.free_slots.append(int(slot))
+        self.evicted_tracks += 1
+
+
+    def evict_expired(self, now):
+        """
+        Drops every track whose last sighting is older than the TTL.
+        """
+        if self.ttl_seconds is None or not self.slot_by_track_id:
+            return
+        for slot in np.flatnonzero((self.track_ids >= 0) & (self.last_seen < now - self.ttl_seconds)):
+            self._release(slot)
+
+
+    def _allocate(self, track_id, now):
+        if not self.free_slots:
+            self._release(int(np.argmin(self.last_seen)))  # Full: evict the least recently seen track
+        slot = self.free_slots.pop()
+        self.slot_by_track_id[track_id] = slot
+        self.track_ids[slot] = track_id
+        self.last_seen[slot] = now
+        self.history_head[slot] = 0
+        self.history_count[slot] = 0
+        self.peak_tracks = max(self.peak_tracks, len(self.slot_by_track_id))
+        return slot
+
+
+    def slots_for(self, track_ids, now):
+        """
+        Returns (slots, is_new): the storage slot of every track ID, allocating slots for unseen IDs.
+
+        Every known ID of the batch is refreshed before any slot is allocated, so capacity eviction never picks
+        a track seen in the same batch (unless the batch alone holds more than max_tracks IDs).
+        """
+        slots = np.empty(len(track_ids), dtype=np.intp)
+        is_new = np.zeros(len(track_ids), dtype=bool)
+        track_ids = [int(track_id) for track_id in track_ids]
+        for index, track_id in enumerate(track_ids):
+            slot = self.slot_by_track_id.get(track_id)
+            if slot is None:
+                is_new[index] = True
+            else:
+                self.last_seen[slot] = now
+                slots[index] = slot
+        for index in np.flatnonzero(is_new):
+            slot = self.slot_by_track_id.get(track_ids[index])  # Repeated ID within the batch
+            if slot is None:
+                slot = self._allocate(track_ids[index], now)
+            slots[index] = slot
+        return slots, is_new
+
+
+    def _write(self, slots, points, now):
+        self.centers[slots] = points
+        self.timestamps[slots] = now
+        self.last_seen[slots] = now
+
+        heads = self.history_head[slots]
+        self.history_points[slots, heads] = points
+        self.history_timestamps[slots, heads] = now
+        self.history_head[slots] = (heads + 1) % self.history_length
+        self.history_count[slots] = np.minimum(self.history_count[slots] + 1, self.history_length)
+
+
+    def observe(self, track_ids, centers, timestamp=None):
+        """
+        Records the current centers of the given tracks and returns what was stored before.
+
+        :param track_ids: Sequence of N track IDs.
+        :param centers: (N, 2) array of current centers.
+        :param timestamp: Time of the observation in seconds; defaults to time.monotonic().
+        :return: Tuple (previous_centers, previous_timestamps). Tracks seen for the first time get their
+                 current center and the current timestamp.
+        """
+        now = time.monotonic() if timestamp is None else timestamp
+        self.evict_expired(now)
+
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+        slots, is_new = self.slots_for(track_ids, now)
+
+        previous_centers = self.centers[slots]
+        previous_timestamps = self.timestamps[slots]
+        previous_centers[is_new] = centers[is_new]
+        previous_timestamps[is_new] = now
+
+        self._write(slots, centers, now)
+        return previous_centers, previous_timestamps
+
+
+    def record(self, track_ids, points, timestamp=None):
+        """
+        Appends the given points to each track's history and returns the slots they were stored in.
+        """
+        now = time.monotonic() if timestamp is None else timestamp
+        self.evict_expired(now)
+
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        slots, _ = self.slots_for(track_ids, now)
+        self._write(slots, points, now)
+        return slots
+
+
+    def history(self, slots):
+        """
+        Returns the recorded history of the given slots, oldest observation first.
+
+        :return: Tuple (points, timestamps, valid) with shapes (K, H, 2), (K, H) and (K, H);
+                 entries where valid is False are padding for tracks with fewer than H observations.
+        """
+        counts = self.history_count[slots]
+        ring_offsets = np.arange(self.history_length)
+        ring_positions = (self.history_head[slots][:, None] - counts[:, None] + ring_offsets[None, :]) % self.history_length
+        valid = ring_offsets[None, :] < counts[:, None]
+        slot_rows = np.asarray(slots)[:, None]
+        return self.history_points[slot_rows, ring_positions], self.history_timestamps[slot_rows, ring_positions], valid
+
+
+    def stats(self):
+        """
+        Returns counters for live, evicted and peak tracks.
+        """
+        return {
+            "live_tracks": self.live_tracks,
+            "evicted_tracks": self.evicted_tracks,
+            "peak_tracks": self.peak_tracks,
+            "max_tracks": self.max_tracks,
+        }
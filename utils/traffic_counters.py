@@ -0,0 +1,214 @@
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+from utils.events import LINE_CROSSING, ZONE_ENTER
+
+DEFAULT_RESOLUTIONS = {60: 24 * 60, 300: 7 * 24 * 12, 900: 31 * 24 * 4}  # bucket seconds -> buckets kept (1 day, 1 week, 1 month)
+
+logger = logging.getLogger(__name__)
+
+
+def parse_start_time(start_time):
+    """
+    Returns epoch seconds for a number or an ISO 8601 string (e.g. "2024-05-01T08:00:00+02:00"), None for None.
+    """
+    if start_time is None or isinstance(start_time, (int, float)):
+        return start_time
+    try:
+        return datetime.fromisoformat(str(start_time)).timestamp()
+    except ValueError:
+        raise ValueError(f"Invalid start time '{start_time}'; use epoch seconds or ISO 8601.")
+
+
+class TrafficCounters:
+    def __init__(self, resolutions=None, snapshot_path=None, snapshot_interval_seconds=60.0, media_start_time=None):
+        """
+        Incremental traffic counts per line/zone, direction, class and time bucket, without keeping raw events.
+
+        Every crossing increments one counter per resolution (1, 5 and 15 minutes by default), so an update is
+        O(1) and the coarser buckets are always rolled up. Old buckets are dropped beyond each resolution's
+        retention. Counts are snapshotted to disk periodically by a background thread and restored on start,
+        so they survive restarts without the analytics thread ever waiting on disk I/O.
+
+        :param resolutions: Dict of bucket length in seconds -> number of buckets to keep.
+        :param snapshot_path: Optional JSON file for periodic snapshots; loaded on start if it exists.
+        :param snapshot_interval_seconds: Time between two automatic snapshots.
+        :param media_start_time: Wall-clock time (epoch seconds or ISO 8601) at which file sources start; their
+                                 media timestamps (0 at the first frame) are counted relative to it. Defaults
+                                 to the time the counters were created.
+        """
+        self.resolutions = dict(resolutions or DEFAULT_RESOLUTIONS)
+        self.buckets = {bucket_seconds: {} for bucket_seconds in self.resolutions}  # seconds -> {bucket start: {key: count}}
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval_seconds = snapshot_interval_seconds
+        media_start_time = parse_start_time(media_start_time)
+        self.media_start_time = time.time() if media_start_time is None else media_start_time
+        self._lock = threading.Lock()  # Guards buckets between the analytics and snapshot threads
+
+        if snapshot_path and os.path.exists(snapshot_path):
+            self.load(snapshot_path)
+
+        self._stop_event = threading.Event()
+        self._snapshot_thread = None
+        if snapshot_path:
+            self._snapshot_thread = threading.Thread(target=self._snapshot_loop, name="counter-snapshots", daemon=True)
+            self._snapshot_thread.start()
+
+
+    def increment(self, kind, name, direction, class_label, timestamp=None, amount=1, media_time=False):
+        """
+        Adds amount to the counter (kind, name, direction, class_label) in the bucket containing timestamp.
+
+        :param kind: "line" or "zone".
+        :param direction: +1/-1 for lines, "enter" for zones.
+        :param timestamp: Seconds since the epoch (capture time); defaults to now.
+        :param media_time: The timestamp is a file's media time, counted from media_start_time.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        elif media_time:
+            timestamp += self.media_start_time
+        key = (kind, name, direction, class_label)
+        with self._lock:
+            for bucket_seconds, buckets in self.buckets.items():
+                bucket_start = int(timestamp // bucket_seconds) * bucket_seconds
+                counts = buckets.get(bucket_start)
+                if counts is None:
+                    counts = buckets[bucket_start] = {}
+                    self._prune(bucket_seconds, bucket_start)
+                counts[key] = counts.get(key, 0) + amount
+
+
+    def _prune(self, bucket_seconds, newest_bucket_start):
+        oldest_kept = newest_bucket_start - (self.resolutions[bucket_seconds] - 1) * bucket_seconds
+        buckets = self.buckets[bucket_seconds]
+        for bucket_start in [bucket_start for bucket_start in buckets if bucket_start < oldest_kept]:
+            del buckets[bucket_start]
+
+
+    def record_line_crossings(self, tracked_objects, timestamp=None, media_time=False):
+        """
+        Counts the crossings the line detector wrote into tracked_objects.crossed_lines.
+
+        :param media_time: The timestamp is a file's media time (see increment).
+        """
+        for row, crossings in tracked_objects.crossed_lines.items():
+            class_label = tracked_objects.class_labels[int(tracked_objects.class_ids[row])]
+            for line_name, direction in crossings:
+                self.increment("line", line_name, int(direction), class_label, timestamp, media_time=media_time)
+
+
+    def record_events(self, events, media_time=False):
+        """
+        Counts line crossings and zone entries from a list of events (see utils.events); other events are ignored.
+
+        :param media_time: The event timestamps are a file's media time (see increment).
+        """
+        for event in events:
+            if event.event_type == LINE_CROSSING:
+                self.increment("line", event.line, event.direction, event.class_label, event.timestamp, media_time=media_time)
+            elif event.event_type == ZONE_ENTER:
+                self.increment("zone", event.zone, "enter", event.class_label, event.timestamp, media_time=media_time)
+
+
+    def counts(self, bucket_seconds=60, start=None, end=None, kind=None, name=None):
+        """
+        Returns rows {bucket_start, kind, name, direction, class_label, count} ordered by bucket,
+        optionally limited to [start, end) and to one kind/name.
+        """
+        if bucket_seconds not in self.buckets:
+            raise ValueError(f"No {bucket_seconds}s buckets are kept; available: {sorted(self.buckets)}")
+        with self._lock:
+            buckets = {bucket_start: dict(counts) for bucket_start, counts in self.buckets[bucket_seconds].items()}
+        rows = []
+        for bucket_start in sorted(buckets):
+            if (start is not None and bucket_start < start) or (end is not None and bucket_start >= end):
+                continue
+            for (counter_kind, counter_name, direction, class_label), count in buckets[bucket_start].items():
+                if (kind is None or counter_kind == kind) and (name is None or counter_name == name):
+                    rows.append({"bucket_start": bucket_start, "kind": counter_kind, "name": counter_name,
+                                 "direction": direction, "class_label": class_label, "count": count})
+        return rows
+
+
+    def totals(self, bucket_seconds=900):
+        """
+        Returns {(kind, name, direction, class_label): count} summed over every retained bucket.
+        """
+        totals = {}
+        with self._lock:
+            for counts in self.buckets[bucket_seconds].values():
+                for key, count in counts.items():
+                    totals[key] = totals.get(key, 0) + count
+        return totals
+
+
+    def _snapshot_loop(self):
+        while not self._stop_event.wait(self.snapshot_interval_seconds):
+            try:
+                self.snapshot()
+            except OSError:
+                logger.exception("Could not write the traffic counter snapshot %s", self.snapshot_path)
+
+
+    def snapshot(self, snapshot_path=None):
+        """
+        Writes all buckets to JSON atomically (temporary file + rename), so a crash never leaves a torn file.
+        Only copying the counts holds the lock; serializing and writing happen outside it.
+        """
+        snapshot_path = snapshot_path or self.snapshot_path
+        with self._lock:
+            buckets = {
+                str(bucket_seconds): [[bucket_start, [[*key, count] for key, count in counts.items()]]
+                                      for bucket_start, counts in buckets.items()]
+                for bucket_seconds, buckets in self.buckets.items()
+            }
+        state = {
+            "saved_at": time.time(),
+            "resolutions": {str(bucket_seconds): kept for bucket_seconds, kept in self.resolutions.items()},
+            "buckets": buckets,
+        }
+        temporary_path = f"{snapshot_path}.tmp"
+        with open(temporary_path, "w") as snapshot_file:
+            json.dump(state, snapshot_file)
+        os.replace(temporary_path, snapshot_path)
+
+
+    def close(self):
+        """
+        Stops the snapshot thread and writes a final snapshot.
+        """
+        self._stop_event.set()
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join()
+            self._snapshot_thread = None
+        if self.snapshot_path:
+            self.snapshot()
+
+
+    def load(self, snapshot_path):
+        """
+        Merges a snapshot into the current counters (only for resolutions this instance keeps).
+        """
+        with open(snapshot_path) as snapshot_file:
+            state = json.load(snapshot_file)
+        with self._lock:
+            self._merge_snapshot(state)
+
+
+    def _merge_snapshot(self, state):
+        for bucket_seconds, saved_buckets in state["buckets"].items():
+            buckets = self.buckets.get(int(bucket_seconds))
+            if buckets is None:
+                continue
+            for bucket_start, rows in saved_buckets:
+                counts = buckets.setdefault(bucket_start, {})
+                for kind, name, direction, class_label, count in rows:
+                    key = (kind, name, direction, class_label)
+                    counts[key] = counts.get(key, 0) + count
+            if buckets:
+                self._prune(int(bucket_seconds), max(buckets))